@@ -0,0 +1,56 @@
+"""
+Micro-benchmark for serializing the function and service lists
+
+Compares building the list response with as_dict, which parses every stored
+descriptor and serializes it again, with as_json, which splices the stored
+descriptor text into the response, for projects with hundreds of descriptors.
+
+Usage: python benchmarks/descriptor_list_benchmark.py [iterations]
+"""
+import json
+import sys
+import timeit
+
+# registers the models referenced by the descriptor relationships
+import son_editor.models.private_descriptor
+import son_editor.models.project
+import son_editor.models.repository
+import son_editor.models.user
+import son_editor.models.workspace
+from son_editor.models.descriptor import Function, Service
+from son_editor.util.requestutil import raw_json_list
+from yaml_codec_benchmark import sample_vnfd, sample_nsd
+
+
+def sample_project(function_count: int, service_count: int) -> list:
+    """ Creates unsaved function and service models like they are loaded from the database """
+    descriptors = []
+    for i in range(function_count):
+        vnfd = sample_vnfd(i)
+        function = Function(vnfd['name'], vnfd['version'], vnfd['vendor'], json.dumps(vnfd))
+        function.id = i
+        descriptors.append(function)
+    for i in range(service_count):
+        nsd = sample_nsd(i)
+        service = Service(nsd['name'], nsd['version'], nsd['vendor'], json.dumps(nsd),
+                          meta=json.dumps({'positions': [[i, i]] * 10}))
+        service.id = function_count + i
+        descriptors.append(service)
+    return descriptors
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    for function_count, service_count in [(100, 20), (500, 100)]:
+        descriptors = sample_project(function_count, service_count)
+        as_dict_time = timeit.timeit(lambda: json.dumps([d.as_dict() for d in descriptors]), number=iterations)
+        as_json_time = timeit.timeit(lambda: raw_json_list([d.as_json() for d in descriptors]), number=iterations)
+        print("{:>4} descriptors   as_dict: {:7.2f} ms   as_json: {:7.2f} ms   speedup: {:5.1f}x".format(
+            len(descriptors),
+            as_dict_time / iterations * 1000,
+            as_json_time / iterations * 1000,
+            as_dict_time / as_json_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of the SQLite connection profile under concurrent worker processes
+
+Several processes share one database file like the uWSGI workers do, each running
+a read-heavy mix of descriptor lookups by uid and descriptor updates for a fixed
+time. Compares the SQLite defaults (rollback journal, synchronous FULL) with the
+pragmas of DEFAULT_SQLITE_PRAGMAS and reports the operations per second and the
+"database is locked" errors.
+
+Usage: python benchmarks/sqlite_pragma_benchmark.py [processes] [seconds] [write percentage]
+"""
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from son_editor.app.database import DEFAULT_SQLITE_PRAGMAS, apply_sqlite_pragmas
+
+DESCRIPTORS = 5000
+
+
+def create_database(path: str) -> None:
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE descriptor (id INTEGER PRIMARY KEY, uid VARCHAR(150), descriptor TEXT)")
+    connection.execute("CREATE INDEX ix_descriptor_uid ON descriptor (uid)")
+    connection.executemany("INSERT INTO descriptor (uid, descriptor) VALUES (?, ?)",
+                           [("de.upb:vnf_{}:0.1".format(i), json.dumps({'name': "vnf_{}".format(i),
+                                                                        'payload': 'x' * 2000}))
+                            for i in range(DESCRIPTORS)])
+    connection.commit()
+    connection.close()
+
+
+def worker(args) -> tuple:
+    path, pragmas, seconds, write_percentage, seed = args
+    rand = random.Random(seed)
+    # no busy handler of the driver, waiting for locks is up to the pragmas
+    connection = sqlite3.connect(path, timeout=0)
+    apply_sqlite_pragmas(connection, pragmas)
+    operations = locked = 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        uid = "de.upb:vnf_{}:0.1".format(rand.randrange(DESCRIPTORS))
+        try:
+            if rand.randrange(100) < write_percentage:
+                connection.execute("UPDATE descriptor SET descriptor = ? WHERE uid = ?",
+                                   (json.dumps({'name': uid, 'payload': 'y' * 2000}), uid))
+                connection.commit()
+            else:
+                connection.execute("SELECT descriptor FROM descriptor WHERE uid = ?", (uid,)).fetchone()
+            operations += 1
+        except sqlite3.OperationalError as err:
+            if "locked" not in str(err):
+                raise
+            connection.rollback()
+            locked += 1
+    connection.close()
+    return operations, locked
+
+
+def run(pragmas: dict, processes: int, seconds: float, write_percentage: int) -> tuple:
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    try:
+        create_database(path)
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(worker, [(path, pragmas, seconds, write_percentage, seed)
+                                        for seed in range(processes)])
+    finally:
+        for suffix in ["", "-wal", "-shm", "-journal"]:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return sum(result[0] for result in results) / seconds, sum(result[1] for result in results)
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    write_percentage = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    # the defaults need a busy timeout as well, otherwise nearly every write fails
+    profiles = [("sqlite defaults", {'busy_timeout': DEFAULT_SQLITE_PRAGMAS['busy_timeout']}),
+                ("tuned profile", DEFAULT_SQLITE_PRAGMAS)]
+    for name, pragmas in profiles:
+        throughput, locked = run(pragmas, processes, seconds, write_percentage)
+        print("{:<16} {} processes, {:>2}% writes: {:9.0f} ops/s   {:>5} locked".format(
+            name, processes, write_percentage, throughput, locked))
+
+
+if __name__ == "__main__":
+    main()
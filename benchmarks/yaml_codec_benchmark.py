@@ -0,0 +1,130 @@
+"""
+Micro-benchmark for the YAML codec in son_editor.util.yamlutil
+
+Compares parse and dump throughput of the pure python SafeLoader / SafeDumper
+with the libyaml based CSafeLoader / CSafeDumper on VNF and network service
+descriptors shaped like the ones in the SONATA examples.
+
+Usage: python benchmarks/yaml_codec_benchmark.py [iterations]
+"""
+import sys
+import timeit
+
+import yaml
+
+
+def sample_vnfd(index: int) -> dict:
+    """ A VNF descriptor with a few VDUs, connection points and virtual links """
+    vdus = []
+    for vdu in range(3):
+        vdus.append({
+            "id": "vdu{:02d}".format(vdu),
+            "vm_image": "http://files.sonata-nfv.eu/son-demo/vnf_{}_vdu{}.qcow2".format(index, vdu),
+            "vm_image_format": "qcow2",
+            "resource_requirements": {
+                "cpu": {"vcpus": 2},
+                "memory": {"size": 4, "size_unit": "GB"},
+                "storage": {"size": 20, "size_unit": "GB"}
+            },
+            "monitoring_parameters": [
+                {"name": "vm_cpu_perc", "unit": "Percentage"},
+                {"name": "vm_mem_perc", "unit": "Percentage"},
+                {"name": "vm_net_rx_bps", "unit": "bps"},
+                {"name": "vm_net_tx_bps", "unit": "bps"}
+            ],
+            "connection_points": [
+                {"id": "vdu{:02d}:cp{:02d}".format(vdu, cp), "type": "interface"} for cp in range(3)
+            ]
+        })
+    return {
+        "descriptor_version": "vnfd-schema-01",
+        "vendor": "eu.sonata-nfv",
+        "name": "vnf-{}".format(index),
+        "version": "0.{}".format(index),
+        "author": "Steven van Rossem, iMinds",
+        "description": "A firewall VNF that forwards the traffic of the vTC and the vTU VNFs",
+        "virtual_deployment_units": vdus,
+        "connection_points": [
+            {"id": "vnf:mgmt", "type": "interface"},
+            {"id": "vnf:input", "type": "interface"},
+            {"id": "vnf:output", "type": "interface"}
+        ],
+        "virtual_links": [
+            {"id": "link-{}".format(link), "connectivity_type": "E-Line",
+             "connection_points_reference": ["vdu{:02d}:cp01".format(link), "vnf:input"]}
+            for link in range(3)
+        ],
+        "monitoring_rules": [
+            {"name": "mon:rule:vm_cpu_perc", "description": "Trigger events if CPU load is above 10 percent.",
+             "duration": 10, "duration_unit": "s", "condition": "vdu01:vm_cpu_perc > 10",
+             "notification": [{"name": "notification01", "type": "rabbitmq_message"}]}
+        ]
+    }
+
+
+def sample_nsd(index: int, function_count: int = 10) -> dict:
+    """ A network service descriptor referencing several functions """
+    functions = [{"vnf_id": "vnf_{}".format(i), "vnf_vendor": "eu.sonata-nfv",
+                  "vnf_name": "vnf-{}".format(i), "vnf_version": "0.{}".format(i)}
+                 for i in range(function_count)]
+    return {
+        "descriptor_version": "1.0",
+        "vendor": "eu.sonata-nfv.service-descriptor",
+        "name": "sonata-demo-{}".format(index),
+        "version": "0.2.1",
+        "author": "Michael Bredel, NEC Labs Europe",
+        "description": "The network service descriptor for the SONATA demo, comprising iperf, a firewall, and tcpump.",
+        "network_functions": functions,
+        "connection_points": [{"id": "ns:mgmt", "type": "interface"},
+                              {"id": "ns:input", "type": "interface"},
+                              {"id": "ns:output", "type": "interface"}],
+        "virtual_links": [
+            {"id": "link-{}".format(i), "connectivity_type": "E-Line",
+             "connection_points_reference": ["vnf_{}:output".format(i), "vnf_{}:input".format(i + 1)]}
+            for i in range(function_count - 1)
+        ],
+        "forwarding_graphs": [{
+            "fg_id": "ns:fg01",
+            "number_of_endpoints": 2,
+            "number_of_virtual_links": function_count - 1,
+            "constituent_virtual_links": ["link-{}".format(i) for i in range(function_count - 1)],
+            "constituent_vnfs": ["vnf_{}".format(i) for i in range(function_count)],
+            "network_forwarding_paths": [{
+                "fp_id": "ns:fg01:fp01",
+                "policy": "none",
+                "connection_points": [{"connection_point_ref": "vnf_{}:input".format(i), "position": i + 1}
+                                      for i in range(function_count)]
+            }]
+        }]
+    }
+
+
+def measure(name: str, loader, dumper, documents: list, iterations: int) -> None:
+    """ Measures and prints the parse and dump throughput of the given loader / dumper """
+    texts = [yaml.dump(document, Dumper=dumper, default_flow_style=False) for document in documents]
+    total_bytes = sum(len(text.encode('utf-8')) for text in texts)
+
+    parse_time = timeit.timeit(lambda: [yaml.load(text, Loader=loader) for text in texts], number=iterations)
+    dump_time = timeit.timeit(lambda: [yaml.dump(document, Dumper=dumper, default_flow_style=False)
+                                       for document in documents], number=iterations)
+    count = len(documents) * iterations
+    print("{:<8} parse: {:8.1f} docs/s {:8.2f} MB/s   dump: {:8.1f} docs/s".format(
+        name,
+        count / parse_time,
+        total_bytes * iterations / parse_time / 1e6,
+        count / dump_time))
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    documents = [sample_vnfd(i) for i in range(20)] + [sample_nsd(i) for i in range(5)]
+    print("{} descriptors, {} iterations".format(len(documents), iterations))
+    measure("python", yaml.SafeLoader, yaml.SafeDumper, documents, iterations)
+    if hasattr(yaml, 'CSafeLoader'):
+        measure("libyaml", yaml.CSafeLoader, yaml.CSafeDumper, documents, iterations)
+    else:
+        print("libyaml not available, install PyYAML with libyaml bindings to compare")
+
+
+if __name__ == "__main__":
+    main()
@@ -52,6 +52,9 @@ setup(
     # data_files=[('', ['src/config.yaml'])],
     include_package_data=True,
     install_requires=['flask-restplus==0.9.2', 'flask==0.12', 'sqlalchemy==1.1.6', 'requests==2.13.0', 'pyaml==16.12.2'],
+    extras_require={
+        'postgresql': ['psycopg2'],
+    },
     zip_safe=False,
     entry_points={
         'console_scripts': [
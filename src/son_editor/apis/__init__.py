@@ -1,4 +1,7 @@
 from son_editor.apis import configapi
+from son_editor.apis import metricsapi
+from son_editor.apis import prometheusapi
+from son_editor.apis import profilesapi
 from son_editor.apis import misc
 from son_editor.apis import cataloguesapi
 from son_editor.apis import catalogue_functionsapi
@@ -29,3 +32,6 @@ def init(api):
     api.add_namespace(gitapi.namespace)
     api.add_namespace(schemaapi.namespace)
     api.add_namespace(configapi.namespace)
+    api.add_namespace(metricsapi.namespace)
+    api.add_namespace(prometheusapi.namespace)
+    api.add_namespace(profilesapi.namespace)
@@ -0,0 +1,52 @@
+from flask_restplus import Resource, Namespace
+
+from son_editor.apis.configapi import requires_auth
+from son_editor.app.database import sql_stats
+from son_editor.impl import nsfslookupimpl
+from son_editor.util import httputil
+from son_editor.util.requestutil import prepare_response
+
+namespace = Namespace("metrics", description="Server metrics of the worker process answering the request")
+
+
+@namespace.route("/http")
+class HttpPools(Resource):
+    """ Outbound HTTP connection pools """
+
+    @requires_auth
+    def get(self):
+        """ Show HTTP pool usage
+
+        Shows the requests sent and connections opened per external server
+        (requires authentication via Basic Auth)
+        """
+        return prepare_response(httputil.get_pool_stats())
+
+
+@namespace.route("/catalogues")
+class CatalogueLatencies(Resource):
+    """ Catalogue lookup latencies """
+
+    @requires_auth
+    def get(self):
+        """ Show catalogue latencies
+
+        Shows how long listing each public catalogue took during the descriptor lookups
+        (requires authentication via Basic Auth)
+        """
+        return prepare_response(nsfslookupimpl.get_catalogue_latencies())
+
+
+@namespace.route("/sql")
+class SqlStatements(Resource):
+    """ SQL statements per endpoint """
+
+    @requires_auth
+    def get(self):
+        """ Show SQL statement counts
+
+        Shows the number and duration of the SQL statements sent per request by endpoint
+        and the number of queries slower than the configured threshold
+        (requires authentication via Basic Auth)
+        """
+        return prepare_response(sql_stats.snapshot())
@@ -3,13 +3,14 @@ Created on 22.07.2016
 
 @author: Jonas
 '''
+from flask import request
 from flask.globals import session
 from flask_restplus import Namespace, Model, fields
 from flask_restplus import Resource
 
 from son_editor.impl import nsfslookupimpl
 from son_editor.util.constants import WORKSPACES, PROJECTS, NSFS, SERVICES, VNFS
-from son_editor.util.requestutil import prepare_response
+from son_editor.util.requestutil import prepare_response, get_json
 
 namespace = Namespace(WORKSPACES + '/<int:ws_id>/' + PROJECTS + '/<int:project_id>/' + NSFS,
                       description="Resource Lookup")
@@ -41,6 +42,12 @@ serv_response = namespace.inherit("Response", serv, {
     "project_id": fields.Integer(description='The parent project id'),
 })
 
+resolve_request = namespace.model("Resolve", {
+    'functions': fields.List(fields.Nested(funct), description='The VNFs to resolve'),
+    'services': fields.List(fields.Nested(serv), description='The Services to resolve'),
+    'service_id': fields.Integer(description='Resolve the references of this project service instead')
+})
+
 
 @namespace.route('/' + SERVICES + vendor_name_version_path)
 @namespace.param('ws_id', 'The Workspace identifier')
@@ -72,3 +79,19 @@ class FunctionLookup(Resource):
         Finds a specific virtual network with given vendor / name / version"""
         function = nsfslookupimpl.find_vnf(session["user_data"], ws_id, project_id, vendor, name, version)
         return prepare_response(function)
+
+
+@namespace.route('/resolve')
+@namespace.param('ws_id', 'The Workspace identifier')
+@namespace.param('project_id', 'The Project identifier')
+class ResolveLookup(Resource):
+    @namespace.expect(resolve_request)
+    def post(self, ws_id, project_id):
+        """Resolves many VNFs and network services at once
+
+        Finds the given VNFs and network services, or all references of the given service,
+        in one pass over the project, the private catalogue and the public catalogues.
+        Returns the "functions" and "services" by vendor:name:version with the source
+        they were found in, or null if they were not found"""
+        result = nsfslookupimpl.resolve_references(ws_id, project_id, get_json(request))
+        return prepare_response(result)
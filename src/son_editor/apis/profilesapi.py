@@ -0,0 +1,51 @@
+from flask import request, send_file, make_response
+from flask_restplus import Resource, Namespace
+
+from son_editor.apis.configapi import requires_auth
+from son_editor.app import profiler
+from son_editor.app.exceptions import InvalidArgument
+from son_editor.util.requestutil import prepare_response
+
+namespace = Namespace("profiles", path="/metrics/profiles",
+                      description="Stored request profiles of the worker processes")
+
+SORT_KEYS = ['cumulative', 'tottime', 'calls', 'ncalls', 'filename', 'name']
+
+
+@namespace.route("")
+class Profiles(Resource):
+    """ Request profiles """
+
+    @requires_auth
+    def get(self):
+        """ List profiles
+
+        Lists the stored profiles, newest first
+        (requires authentication via Basic Auth)
+        """
+        return prepare_response(profiler.list_profiles())
+
+
+@namespace.route("/<string:profile_id>")
+@namespace.param("profile_id", "The profile file name")
+class Profile(Resource):
+    """ Single request profile """
+
+    @namespace.param("format", "'text' for a pstats report instead of the pstats file")
+    @namespace.param("sort", "The sort key of the text report, default 'cumulative'")
+    @requires_auth
+    def get(self, profile_id):
+        """ Download profile
+
+        Downloads the profile as pstats file, e.g. for snakeviz, or as text report
+        (requires authentication via Basic Auth)
+        """
+        if request.args.get('format') == 'text':
+            sort = request.args.get('sort', 'cumulative')
+            if sort not in SORT_KEYS:
+                raise InvalidArgument("Sort key must be one of {}".format(", ".join(SORT_KEYS)))
+            response = make_response(profiler.format_profile(profile_id, sort))
+            response.headers['Content-Type'] = 'text/plain; charset=utf-8'
+            return response
+        return send_file(profiler.get_profile_path(profile_id), mimetype='application/octet-stream',
+                         as_attachment=True, attachment_filename=profile_id)
@@ -11,7 +11,7 @@ from son_editor.app.exceptions import InvalidArgument
 from son_editor.impl import functionsimpl
 from son_editor.impl.private_catalogue_impl import publish_private_nsfs
 from son_editor.util.constants import WORKSPACES, PROJECTS, VNFS
-from son_editor.util.requestutil import prepare_response, get_json
+from son_editor.util.requestutil import prepare_response, prepare_page_response, get_json, get_page_args
 
 namespace = Namespace(WORKSPACES + '/<int:ws_id>/' + PROJECTS + "/<int:project_id>/" + VNFS,
                       description="Project VNF Resources")
@@ -55,13 +55,16 @@ namespace.add_model(funct_response.name, funct_response)
 class Functions(Resource):
     """Resource methods for all function descriptors of this directory"""
 
+    @namespace.param("fields", "Comma separated fields to list, e.g. id,uid,name,vendor,version")
+    @namespace.param("limit", "The maximum number of descriptors to return")
+    @namespace.param("cursor", "The X-Next-Cursor header value of the previous page")
     @namespace.response(200, "OK", [funct_response])
     def get(self, ws_id, project_id):
         """List all functions
 
         Lists all available functions in the given project or catalogue."""
-        functions = functionsimpl.get_functions(ws_id, project_id)
-        return prepare_response(functions)
+        functions, next_cursor = functionsimpl.get_functions(ws_id, project_id, **get_page_args(request))
+        return prepare_page_response(functions, next_cursor)
 
     @namespace.expect(funct)
     @namespace.response(201, "Created", funct_response)
@@ -11,7 +11,7 @@ from flask_restplus import Model, Resource, Namespace, fields
 from son_editor.impl import servicesimpl
 from son_editor.impl.private_catalogue_impl import publish_private_nsfs
 from son_editor.util.constants import WORKSPACES, PROJECTS, SERVICES
-from son_editor.util.requestutil import prepare_response, get_json
+from son_editor.util.requestutil import prepare_response, prepare_page_response, get_json, get_page_args
 
 logger = logging.getLogger(__name__)
 
@@ -54,12 +54,15 @@ class Services(Resource):
     """
 
     @namespace.doc("Gets a list of services")
+    @namespace.param("fields", "Comma separated fields to list, e.g. id,uid,name,vendor,version")
+    @namespace.param("limit", "The maximum number of descriptors to return")
+    @namespace.param("cursor", "The X-Next-Cursor header value of the previous page")
     @namespace.response(200, "OK", [serv_response])
     def get(self, ws_id, project_id):
         """Get a list of all Services
         Returns a list of all services available in this resource"""
-        service = servicesimpl.get_services(ws_id, project_id)
-        return prepare_response(service)
+        service, next_cursor = servicesimpl.get_services(ws_id, project_id, **get_page_args(request))
+        return prepare_page_response(service, next_cursor)
 
     @namespace.doc("Creates a new service in the project/platform or catalogue")
     @namespace.expect(serv)
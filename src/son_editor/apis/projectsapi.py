@@ -10,7 +10,7 @@ from flask_restplus import Namespace
 from flask_restplus import Resource
 from flask_restplus import fields
 
-from son_editor.impl import projectsimpl
+from son_editor.impl import projectsimpl, dependenciesimpl
 from son_editor.util.constants import WORKSPACES, PROJECTS
 from son_editor.util.requestutil import prepare_response, get_json
 
@@ -21,6 +21,20 @@ pj = namespace.model("Project", {
     'name': fields.String(required=True, description='The Project Name')
 })
 
+dependent = namespace.model("Dependent", {
+    'uid': fields.String(description='The vendor:name:version of the depending service'),
+    'id': fields.Integer(description='The service ID')
+})
+
+dependencies_response = namespace.model("Dependencies", {
+    'kind': fields.String(description='Either "function" or "service"'),
+    'uid': fields.String(description='The vendor:name:version of the descriptor'),
+    'id': fields.Integer(description='The descriptor ID, null if the descriptor is not part of the project'),
+    'dependents': fields.List(fields.Nested(dependent), description='The services referencing the descriptor'),
+    'all_dependents': fields.List(fields.Nested(dependent),
+                                  description='The services depending on the descriptor, also through nested services')
+})
+
 pj_response = namespace.inherit("ProjectResponse", pj, {
     "rel_path": fields.String(description='The Projects location relative to its workpace'),
     "id": fields.Integer(description='The Project ID'),
@@ -78,3 +92,18 @@ class Project(Resource):
 
         Gets information of a given project"""
         return prepare_response(projectsimpl.get_project(ws_id, project_id))
+
+
+@namespace.route('/<int:project_id>/dependencies')
+@namespace.param("ws_id", "The workpace ID")
+@namespace.param("project_id", "The project ID")
+@namespace.param("uid", "Only list the descriptor with this vendor:name:version")
+class Dependencies(Resource):
+    @namespace.response(200, "OK", [dependencies_response])
+    @namespace.response(404, "Project or descriptor not found")
+    def get(self, ws_id, project_id):
+        """Lists dependencies
+
+        Lists the services that depend on each function and service of the project,
+        directly and transitively through nested services"""
+        return prepare_response(dependenciesimpl.get_dependencies(ws_id, project_id, request.args.get("uid")))
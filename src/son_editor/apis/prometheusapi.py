@@ -0,0 +1,25 @@
+from flask import make_response
+from flask_restplus import Resource, Namespace
+
+from son_editor.apis.configapi import requires_auth
+from son_editor.util import metricsutil
+
+namespace = Namespace("prometheus", path="/metrics/prometheus",
+                      description="Latency histograms of the worker process answering the request")
+
+
+@namespace.route("")
+class PrometheusMetrics(Resource):
+    """ Prometheus scrape target """
+
+    @requires_auth
+    def get(self):
+        """ Show latency histograms
+
+        Shows the request latencies per namespace and route, the time spent in external tools
+        and the outbound HTTP latencies per host in the Prometheus text format
+        (requires authentication via Basic Auth)
+        """
+        response = make_response(metricsutil.REGISTRY.render())
+        response.headers['Content-Type'] = metricsutil.CONTENT_TYPE
+        return response
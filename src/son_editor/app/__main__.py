@@ -4,20 +4,24 @@ Created on 18.07.2016
 @author: Jonas
 '''
 import logging
+import time
 import urllib
 import os
 from os import path
 from sys import platform
 
-from flask import Flask, session
+from flask import Flask, session, g
 from flask.globals import request
 from flask_restplus import Api
 
 from son_editor import apis
-from son_editor.app.database import db_session, init_db, scan_workspaces_dir
+from son_editor.app.database import db_session, init_db, scan_workspaces_dir, engine, sql_stats
+from son_editor.app.profiler import init_profiler
 from son_editor.app.exceptions import NameConflict, NotFound, ExtNotReachable, PackException, InvalidArgument, \
     UnauthorizedException, StillReferenced
 from son_editor.app.securityservice import check_access
+from son_editor.util.descriptorutil import get_schemas
+from son_editor.util.metricsutil import REQUEST_DURATION
 from son_editor.util.requestutil import get_config, prepare_response, prepare_error
 
 app = Flask(__name__)
@@ -88,16 +92,67 @@ apis.init(api)
 # print(app.url_map)
 
 
+# profiling hooks are only registered if configured, unconfigured requests skip them entirely
+if 'profiling' in get_config():
+    init_profiler(app)
+
+
 @app.teardown_appcontext
 def shutdown_session(exception=None):
     db_session.remove()
 
 
+@app.teardown_request
+def record_sql_stats(exception=None):
+    sql_stats.finish_request()
+
+
+_endpoint_namespaces = {}
+
+
+def get_namespace(endpoint: str) -> str:
+    """
+    Returns the name of the api namespace the endpoint belongs to
+
+    :param endpoint: The flask endpoint name
+    :return: The namespace name or 'app' for endpoints outside of the api namespaces
+    """
+    namespace = _endpoint_namespaces.get(endpoint)
+    if namespace is None:
+        # restplus names the endpoints '<namespace>_<resource>', the longest prefix wins
+        # as the namespace names of nested resources start with the names of their parents
+        names = [ns.name for ns in api.namespaces if endpoint.startswith(ns.name + '_')]
+        namespace = max(names, key=len) if names else 'app'
+        _endpoint_namespaces[endpoint] = namespace
+    return namespace
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_duration(response):
+    start = g.get('request_start')
+    if start is not None:
+        endpoint = request.endpoint
+        REQUEST_DURATION.observe(time.perf_counter() - start,
+                                 namespace=get_namespace(endpoint) if endpoint else 'app',
+                                 route=request.url_rule.rule if request.url_rule else 'unmatched',
+                                 method=request.method,
+                                 status=response.status_code)
+    return response
+
+
 @app.before_request
 def check_logged_in():
     if request.method == 'OPTIONS':
         return prepare_response()
-    elif request.endpoint in ['login', 'doc', 'specs', 'config_configuration', 'restplus_doc.static']:
+    elif request.endpoint in ['login', 'doc', 'specs', 'config_configuration', 'metrics_http_pools',
+                              'metrics_catalogue_latencies', 'metrics_sql_statements', 'prometheus_prometheus_metrics',
+                              'profiles_profiles', 'profiles_profile',
+                              'restplus_doc.static']:
         # no github login requiered
         return
     elif get_config()['testing']:
@@ -127,14 +182,21 @@ def handle_unauthorized(msg: str):
 def setup():
     setup_logging()
     # Check check if database exists, otherwise create sqlite file
-    dbFile = get_config()['database']['location']
-    if path.exists(dbFile):
-        logger.info('Using database file "%s"' % dbFile)
+    if engine.dialect.name != 'sqlite':
+        logger.info('Using database "%r"' % engine.url)
+    elif path.exists(engine.url.database):
+        logger.info('Using database file "%s"' % engine.url.database)
     else:
-        logger.info('Init database on "%s"' % dbFile)
-        init_db()
-    # parse all workspaces already on the hard drive
+        logger.info('Init database on "%s"' % engine.url.database)
+    # creates the tables that do not exist yet and upgrades the existing ones
+    logger.info("Database schema version {}".format(init_db()))
+    # parse all workspaces already on the hard drive, skipping files that did not change since the last start
     scan_workspaces_dir()
+    # load the schemas from the local cache so the first validation does not have to wait for the download
+    try:
+        get_schemas()
+    except Exception as err:
+        logger.warning("Could not load schemas: {}".format(err))
     # Start the flask server
     logger.info("Launch flask server")
 
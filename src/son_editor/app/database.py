@@ -1,24 +1,222 @@
 import contextlib
+import hashlib
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import shutil
-from sqlalchemy import create_engine
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import create_engine, event, exc, select, inspect
+from sqlalchemy.engine.url import URL, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 
-from son_editor.util.descriptorutil import load_ns_vnf_from_disk, load_workspace_descriptor, get_file_path, \
+from son_editor.util.descriptorutil import read_ns_vnf_from_disk, load_workspace_descriptor, get_file_path, \
     get_file_name, \
     sync_project_descriptor
 from son_editor.util.requestutil import get_config
 
-# DB URI
 logger = logging.getLogger(__name__)
-DATABASE_SQLITE_URI = "sqlite:///%s" % get_config()['database']['location']
-logger.info("DBSQLITE_URI: " + DATABASE_SQLITE_URI)
 
-engine = create_engine(DATABASE_SQLITE_URI, convert_unicode=True)
+
+def get_database_url() -> URL:
+    """ Returns the configured "database.url" or the sqlite url of the "database.location" file """
+    config = get_config()['database']
+    return make_url(config.get('url') or "sqlite:///%s" % config['location'])
+
+
+# DB URI
+DATABASE_URI = get_database_url()
+logger.info("DATABASE_URI: " + repr(DATABASE_URI))
+
+# Connection profile for several worker processes that mostly read:
+# the write-ahead log lets readers continue while one worker writes, synchronous NORMAL
+# only syncs the log at checkpoints, writers wait busy_timeout milliseconds for the lock
+# instead of failing with "database is locked", cache_size (negative: KiB) and mmap_size
+# (bytes) keep the hot pages in memory
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,
+    'mmap_size': 268435456,
+    'busy_timeout': 5000,
+    'foreign_keys': 'ON'
+}
+
+
+def get_sqlite_pragmas() -> dict:
+    """ Returns the default pragmas updated with the "database.sqlite-pragmas" configuration """
+    pragmas = dict(DEFAULT_SQLITE_PRAGMAS)
+    pragmas.update(get_config()['database'].get('sqlite-pragmas') or {})
+    return pragmas
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict) -> None:
+    """
+    Sets the pragmas on a new sqlite3 connection
+
+    :param dbapi_connection: The sqlite3 connection
+    :param pragmas: The pragma values by name, pragmas set to None are skipped
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        # the busy timeout goes first, switching the journal mode needs to wait for the other workers
+        for name, value in sorted(pragmas.items(), key=lambda pragma: pragma[0] != 'busy_timeout'):
+            if value is None:
+                continue
+            if not name.isidentifier() or not str(value).replace('-', '').isalnum():
+                raise ValueError("Invalid sqlite pragma {}={}".format(name, value))
+            cursor.execute("PRAGMA {}={}".format(name, value))
+    finally:
+        cursor.close()
+
+
+def get_engine_options(url: URL) -> dict:
+    """
+    Builds the create_engine arguments of the database
+
+    A database server gets a connection pool sized by "database.pool", PostgreSQL additionally
+    the "database.statement-timeout". SQLite keeps the default pool of the dialect
+
+    :param url: The database url
+    :return: The keyword arguments of create_engine
+    """
+    options = {'convert_unicode': True}
+    if url.get_backend_name() == 'sqlite':
+        return options
+    config = get_config()['database']
+    pool = config.get('pool') or {}
+    options.update(pool_size=pool.get('size', 10),
+                   max_overflow=pool.get('max-overflow', 20),
+                   pool_timeout=pool.get('timeout', 30),
+                   pool_recycle=pool.get('recycle', 1800))
+    if url.get_backend_name() == 'postgresql' and config.get('statement-timeout'):
+        options['connect_args'] = {'options': '-c statement_timeout={:d}'.format(config['statement-timeout'])}
+    return options
+
+
+def enable_pre_ping(pinged_engine) -> None:
+    """
+    Tests every connection taken from the pool with a "SELECT 1" and reconnects
+    if the database server closed it, e.g. after a restart or an idle timeout
+
+    :param pinged_engine: The engine
+    """
+
+    @event.listens_for(pinged_engine, "engine_connect")
+    def _ping(connection, branch):
+        if branch:
+            # sub-connections share the tested connection
+            return
+        should_close_with_result = connection.should_close_with_result
+        connection.should_close_with_result = False
+        try:
+            connection.scalar(select([1]))
+        except exc.DBAPIError as err:
+            # the pool was invalidated, the second try gets a new connection
+            if err.connection_invalidated:
+                connection.scalar(select([1]))
+            else:
+                raise
+        finally:
+            connection.should_close_with_result = should_close_with_result
+
+
+engine = create_engine(DATABASE_URI, **get_engine_options(DATABASE_URI))
+
+if engine.dialect.name == 'sqlite':
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, get_sqlite_pragmas())
+elif (get_config()['database'].get('pool') or {}).get('pre-ping', True):
+    enable_pre_ping(engine)
+
+
+class SqlStats:
+    """
+    Counts the SQL statements and their duration per request and endpoint
+
+    The counters of the running request are kept in flask.g and added to the
+    totals of its endpoint when the request ends. Statements outside of a
+    request, e.g. of the startup scan, are counted under the endpoint None
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+        self._slow_queries = 0
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float) -> None:
+        """
+        Counts a statement and logs it if it took longer than "database.slow-query-ms"
+
+        :param statement: The SQL statement
+        :param seconds: The execution time
+        """
+        endpoint = None
+        if has_request_context():
+            g.sql_statements = g.get('sql_statements', 0) + 1
+            g.sql_seconds = g.get('sql_seconds', 0.0) + seconds
+            endpoint = request.endpoint
+        else:
+            self._add(None, 1, seconds, requests=0)
+        threshold = get_config()['database'].get('slow-query-ms')
+        if threshold and seconds * 1000 >= threshold:
+            with self._lock:
+                self._slow_queries += 1
+            logger.warning("Slow query on {} took {:.0f} ms: {}".format(endpoint, seconds * 1000,
+                                                                       " ".join(statement.split())))
+
+    def finish_request(self) -> None:
+        """ Adds the counters of the current request to the totals of its endpoint """
+        if 'sql_statements' in g:
+            self._add(request.endpoint, g.pop('sql_statements'), g.pop('sql_seconds'))
+
+    def _add(self, endpoint, statements: int, seconds: float, requests: int = 1) -> None:
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {'requests': 0, 'statements': 0, 'seconds': 0.0,
+                                                          'max_statements': 0, 'max_seconds': 0.0})
+            stats['requests'] += requests
+            stats['statements'] += statements
+            stats['seconds'] += seconds
+            stats['max_statements'] = max(stats['max_statements'], statements)
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def snapshot(self) -> dict:
+        """
+        Returns the totals of this process
+
+        :return: The requests, statements and seconds by endpoint with the maximum of a single
+                 request, and the number of slow queries
+        """
+        with self._lock:
+            return {'endpoints': {str(endpoint): dict(stats) for endpoint, stats in self._endpoints.items()},
+                    'slow_queries': self._slow_queries}
+
+
+sql_stats = SqlStats()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    sql_stats.record(statement, time.perf_counter() - conn.info['query_start'].pop())
+
+
+@event.listens_for(engine, "handle_error")
+def _handle_error(exception_context):
+    # failed statements are not counted
+    if exception_context.connection is not None and exception_context.connection.info.get('query_start'):
+        exception_context.connection.info['query_start'].pop()
+
+
 db_session = scoped_session(sessionmaker(autocommit=False,
                                          autoflush=False,
                                          bind=engine))
@@ -33,6 +231,10 @@ def init_db():
     Import all modules here that might define models so that
         they will be registered properly on the metadata.  Otherwise
         you will have to import them first before calling init_db()
+
+    Creates the missing tables and applies the pending schema migrations
+
+    :return: The schema version of the database
     """
     import son_editor.models.project
     import son_editor.models.user
@@ -40,7 +242,37 @@ def init_db():
     import son_editor.models.descriptor
     import son_editor.models.repository
     import son_editor.models.private_descriptor
-    Base.metadata.create_all(bind=engine)
+    import son_editor.models.scan_index
+    from son_editor.app import migrations
+    return migrations.upgrade(engine)
+
+
+def _backfill_descriptor_references(session=None):
+    """
+    Creates the references of the services stored before the descriptor_reference table existed
+
+    The rows are written in bulk, without loading the services as models
+
+    :param session: The database session, the db_session of the application if None
+    """
+    import json
+    from son_editor.models.descriptor import Service, DescriptorReference, get_descriptor_references
+    session = session or db_session()
+    references = []
+    services = session.query(Service.id, Service.descriptor).all()
+    for service_id, descriptor in services:
+        try:
+            refs = get_descriptor_references(json.loads(descriptor))
+        except (TypeError, ValueError, AttributeError):
+            continue
+        references.extend({'service_id': service_id, 'kind': kind, 'vendor': vendor, 'name': name,
+                           'version': version} for kind, vendor, name, version in refs)
+    session.query(DescriptorReference).delete(synchronize_session=False)
+    if references:
+        session.execute(DescriptorReference.__table__.insert(), references)
+    session.commit()
+    if services:
+        logger.info("Indexed the references of {} services".format(len(services)))
 
 
 def reset_db():
@@ -58,30 +290,181 @@ def reset_db():
         trans.commit()
 
 
-def scan_workspaces_dir():
+class ScanIndex:
+    """
+    Scan index
+
+    Keeps track of the descriptor files visited during a scan and compares them against
+    the index persisted in the database. Files whose modification time and size or,
+    failing that, content hash did not change since the last scan are skipped.
+    Counts the skipped, parsed and removed files for the scan report.
+    """
+
+    def __init__(self, session, prefix: str = None, processes: int = 1, parallel_threshold: int = 50):
+        """
+        Loads the persisted index entries
+
+        :param session: The database session
+        :param prefix: Only load the entries below this path, loads all entries if None
+        :param processes: The number of processes to parse descriptors in, 1 to parse them in this process
+        :param parallel_threshold: The number of files parsed at once from which on the process pool is used
+        """
+        from son_editor.models.scan_index import ScanIndexEntry
+        self.session = session
+        self.processes = processes
+        self.parallel_threshold = parallel_threshold
+        self._pool = None
+        query = session.query(ScanIndexEntry)
+        if prefix is not None:
+            prefix = os.path.join(os.path.normpath(prefix), "")
+            query = query.filter(ScanIndexEntry.path.like(prefix + "%"))
+        self.entries = {entry.path: entry for entry in query
+                        if prefix is None or entry.path.startswith(prefix)}
+        self.pending = {}
+        self.seen = set()
+        self.skipped = 0
+        self.parsed = 0
+        self.removed = 0
+
+    def needs_parsing(self, file_path: str) -> bool:
+        """
+        Checks if the file changed since the last scan
+
+        :param file_path: The path of the descriptor file
+        :return: True if the file is new or has changed, False if it can be skipped
+        """
+        file_path = os.path.normpath(file_path)
+        self.seen.add(file_path)
+        stat = os.stat(file_path)
+        entry = self.entries.get(file_path)
+        if entry is not None and entry.mtime == stat.st_mtime and entry.size == stat.st_size:
+            self.skipped += 1
+            return False
+        digest = _file_digest(file_path)
+        if entry is not None and entry.digest == digest:
+            # touched but not changed
+            entry.mtime = stat.st_mtime
+            entry.size = stat.st_size
+            self.skipped += 1
+            return False
+        self.pending[file_path] = (stat.st_mtime, stat.st_size, digest)
+        self.parsed += 1
+        return True
+
+    def parse(self, file_paths: list) -> dict:
+        """
+        Parses the given descriptor files, in the process pool if configured
+
+        :param file_paths: The paths of the descriptor files
+        :return: The parsed descriptor data by file path, None for files that could not be parsed
+        """
+        if self.processes > 1 and len(file_paths) >= max(self.parallel_threshold, 2):
+            # started on first use, so scans with few changed files do not fork at all
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes)
+            results = self._pool.map(_parse_descriptor, file_paths, chunksize=16)
+        else:
+            results = map(_parse_descriptor, file_paths)
+        return dict(zip(file_paths, results))
+
+    def indexed(self, file_path: str, new_path: str = None) -> None:
+        """
+        Records a successfully parsed file in the index
+
+        :param file_path: The path the file was parsed from
+        :param new_path: The path the file was moved to after parsing, if any
+        """
+        from son_editor.models.scan_index import ScanIndexEntry
+        file_path = os.path.normpath(file_path)
+        mtime, size, digest = self.pending.pop(file_path)
+        if new_path is not None:
+            file_path = os.path.normpath(new_path)
+            self.seen.add(file_path)
+        entry = self.entries.get(file_path)
+        if entry is None:
+            entry = ScanIndexEntry(file_path)
+            self.session.add(entry)
+            self.entries[file_path] = entry
+        entry.mtime = mtime
+        entry.size = size
+        entry.digest = digest
+
+    def rollback(self) -> None:
+        """ Rolls back the session and forgets the entries added by the failed transaction """
+        self.session.rollback()
+        for path, entry in list(self.entries.items()):
+            # the changed entries that were persisted before are reloaded on access
+            if not inspect(entry).persistent:
+                del self.entries[path]
+
+    def close(self) -> None:
+        """ Stops the process pool, if it was started """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def remove_unseen(self) -> None:
+        """ Removes the entries of all files that were not visited during this scan """
+        for path, entry in list(self.entries.items()):
+            if path not in self.seen:
+                self.session.delete(entry)
+                del self.entries[path]
+                self.removed += 1
+
+    def report(self) -> dict:
+        """ Returns the number of skipped, parsed and removed files """
+        return {"skipped": self.skipped, "parsed": self.parsed, "removed": self.removed}
+
+
+def _file_digest(file_path: str) -> str:
+    """ Computes the sha1 hash of the files content """
+    sha1 = hashlib.sha1()
+    with open(file_path, 'rb') as stream:
+        for chunk in iter(lambda: stream.read(65536), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def scan_workspaces_dir() -> dict:
     """
     Scan workpaces directory
     
     Scans the workpaces directory for any users.
-        Will visit every one to add new workspaces etc via _scan_user_dir
+        Will visit every one to add new workspaces etc via _scan_user_dir.
+        Descriptor files that did not change since the last scan are skipped,
+        the others are parsed in a process pool if configured under "workspace-scan".
+
+    :return: A report containing the number of skipped, parsed and removed descriptor files
     """
     from son_editor.models.user import User
     wss_dir = os.path.normpath(os.path.expanduser(get_config()["workspaces-location"]))
-    if os.path.exists(wss_dir):
-        session = db_session()
-        for user_name in os.listdir(wss_dir):
-            if not Path(os.path.join(wss_dir, user_name)).is_dir():
-                continue
-            user = session.query(User).filter(User.name == user_name).first()
-            if user is None:
-                logger.info("Found user: {}!".format(user_name))
-                user = User(user_name)
-                session.add(user)
-                session.commit()
-            _scan_user_dir(wss_dir, user)
+    session = db_session()
+    scan_config = get_config().get('workspace-scan', {})
+    index = ScanIndex(session, processes=_get_parser_processes(),
+                      parallel_threshold=scan_config.get('parallel-threshold', 50))
+    try:
+        if os.path.exists(wss_dir):
+            for user_name in os.listdir(wss_dir):
+                if not Path(os.path.join(wss_dir, user_name)).is_dir():
+                    continue
+                user = session.query(User).filter(User.name == user_name).first()
+                if user is None:
+                    logger.info("Found user: {}!".format(user_name))
+                    user = User(user_name)
+                    session.add(user)
+                    session.commit()
+                _scan_user_dir(wss_dir, user, index)
+    finally:
+        index.close()
+    index.remove_unseen()
+    session.commit()
+    report = index.report()
+    logger.info("Workspace scan finished: {skipped} files skipped, "
+                "{parsed} files parsed, {removed} files removed".format(**report))
+    return report
 
 
-def _scan_user_dir(ws_dir, user):
+def _scan_user_dir(ws_dir, user, index):
     """
     Scan users directory
     
@@ -90,6 +473,7 @@ def _scan_user_dir(ws_dir, user):
         
     :param ws_dir: the workspace dir to scan
     :param user: the current user from the database to attach the workpace to
+    :param index: the scan index
     """
     from son_editor.models.workspace import Workspace
     session = db_session()
@@ -106,10 +490,10 @@ def _scan_user_dir(ws_dir, user):
             load_workspace_descriptor(ws)
             session.add(ws)
             session.commit()
-        _scan_workspace_dir(ws_path, ws)
+        _scan_workspace_dir(ws_path, ws, index)
 
 
-def _scan_workspace_dir(ws_path, ws):
+def _scan_workspace_dir(ws_path, ws, index):
     """
     Scan a workspace directory
 
@@ -118,11 +502,12 @@ def _scan_workspace_dir(ws_path, ws):
         
     :param ws_path: the workspaces path to scan
     :param ws: the current workspace from the database to attach the projects to
+    :param index: the scan index
     """
     from son_editor.models.project import Project
     session = db_session()
     # Scan private catalogue in workspace
-    _scan_private_catalogue(ws_path + "/catalogues", ws)
+    _scan_private_catalogue(ws_path + "/catalogues", ws, index)
 
     for project_name in os.listdir(os.path.join(ws_path, "projects")):
         if not Path(os.path.join(ws_path, "projects", project_name)).is_dir():
@@ -136,160 +521,245 @@ def _scan_workspace_dir(ws_path, ws):
             sync_project_descriptor(pj)
             session.add(pj)
             session.commit()
-        scan_project_dir(os.path.join(ws_path, "projects", project_name), pj)
+        scan_project_dir(os.path.join(ws_path, "projects", project_name), pj, index)
 
 
-def scan_project_dir(project_path, pj):
+def scan_project_dir(project_path, pj, index=None):
     """
     Scan project dir
     
     Scans the project dir for any new functions and services 
-        via _scan_for_functions and _scan_for_services 
+        via _scan_for_functions and _scan_for_services.
+        The changed descriptor files are parsed in one go and
+        written to the database in one transaction per project.
     
     :param project_path: The path of the project to scan
     :param pj: The project from the database to attach the descriptors to
-    :return: 
+    :param index: The scan index of the running scan, if None the index of this project is used
+    :return: The scan report of this project, if no index was given
+    """
+    from son_editor.models.descriptor import Function, Service
+    session = db_session()
+    if index is None:
+        project_index = ScanIndex(session, project_path)
+        scan_project_dir(project_path, pj, project_index)
+        project_index.remove_unseen()
+        session.commit()
+        return project_index.report()
+    service_files = _scan_for_services(os.path.join(project_path, "sources", "nsd"), index)
+    function_files = _scan_for_functions(os.path.join(project_path, "sources", "vnf"), index)
+    if not service_files and not function_files:
+        return
+    parsed = index.parse(service_files + function_files)
+    try:
+        services = {service.uid: service for service in
+                    session.query(Service).filter(Service.project_id == pj.id)}
+        functions = {function.uid: function for function in
+                     session.query(Function).filter(Function.project_id == pj.id)}
+        for file_path in service_files:
+            if parsed[file_path] is not None:
+                service = _add_or_update(session, services, Service, parsed[file_path], project=pj)
+                _move_service_file(index, file_path, service)
+        for file_path in function_files:
+            if parsed[file_path] is not None:
+                function = _add_or_update(session, functions, Function, parsed[file_path], project=pj)
+                _move_function_folder(index, file_path, function)
+        session.commit()
+    except:
+        logger.exception("Could not load descriptors of project {}:".format(pj.name))
+        index.rollback()
+
+
+def _add_or_update(session, existing: dict, model_class, data: dict, **relations):
+    """
+    Updates the descriptor of the existing model with the same uid or adds a new model to the session
+
+    :param session: The database session
+    :param existing: The existing models by uid, the new model gets added to it
+    :param model_class: The class of the descriptor model
+    :param data: The parsed descriptor data
+    :param relations: The parent relation(s) to set on a new model
+    :return: The updated or created model
+    """
+    model = model_class(**data)
+    if model.uid in existing:
+        existing[model.uid].descriptor = model.descriptor
+        return existing[model.uid]
+    logger.info("Found {}: {}".format(model_class.__name__, model.uid))
+    for key, value in relations.items():
+        setattr(model, key, value)
+    session.add(model)
+    existing[model.uid] = model
+    return model
+
+
+def _move_service_file(index, file_path, service):
+    """
+    Renames the service file to the expected name format and records it in the scan index
+
+    :param index: The scan index
+    :param file_path: The path the service was parsed from
+    :param service: The service model
+    """
+    target_path = get_file_path("nsd", service)
+    if target_path != file_path:
+        shutil.move(file_path, target_path)  # rename to expected name format
+        index.indexed(file_path, target_path)
+    else:
+        index.indexed(file_path)
+
+
+def _move_function_folder(index, file_path, function):
+    """
+    Renames the function folder and file to the expected name format and records it in the scan index
+
+    :param index: The scan index
+    :param file_path: The path the function was parsed from
+    :param function: The function model
     """
-    _scan_for_services(os.path.join(project_path, "sources", "nsd"), pj)
-    _scan_for_functions(os.path.join(project_path, "sources", "vnf"), pj)
+    parsed_path = file_path
+    folder_path = os.path.dirname(file_path)
+    # rename folder if necessary
+    target_folder = os.path.normpath(
+        get_file_path("vnf", function).replace(get_file_name(function), ''))
+    if os.path.normpath(folder_path) != target_folder:
+        shutil.move(folder_path, target_folder)
+        file_path = file_path.replace(folder_path, target_folder)
+    # rename file if necessary
+    if not os.path.exists(get_file_path("vnf", function)):
+        shutil.move(file_path, get_file_path("vnf", function))
+    index.indexed(parsed_path, get_file_path("vnf", function))
 
 
-def _scan_private_catalogue(catalogue_dir, ws):
+def _scan_private_catalogue(catalogue_dir, ws, index=None):
     """
     Scans the private Workspace catalogue for new service and function 
         descriptors and adds them to the database 
     :param catalogue_dir: The directory of the private catalogue in the workspace 
     :param ws: The database workspace
+    :param index: The scan index of the running scan, if None the index of this catalogue is used
     """
     from son_editor.models.private_descriptor import PrivateFunction, PrivateService
+    session = db_session()
+    if index is None:
+        catalogue_index = ScanIndex(session, catalogue_dir)
+        _scan_private_catalogue(catalogue_dir, ws, catalogue_index)
+        catalogue_index.remove_unseen()
+        session.commit()
+        return
     # Configure ns catalogue path
-    ns_path = Path(catalogue_dir + "/ns_catalogue/")
-    vnf_path = Path(catalogue_dir + "/vnf_catalogue/")
-
-    _scan_catalogue(ns_path, PrivateService(), ws)
-    _scan_catalogue(vnf_path, PrivateFunction(), ws)
+    ns_files = _scan_catalogue(Path(catalogue_dir + "/ns_catalogue/"), index)
+    vnf_files = _scan_catalogue(Path(catalogue_dir + "/vnf_catalogue/"), index)
+    if not ns_files and not vnf_files:
+        return
+    parsed = index.parse(ns_files + vnf_files)
+    try:
+        for model_class, files in [(PrivateService, ns_files), (PrivateFunction, vnf_files)]:
+            existing = {model.uid: model for model in
+                        session.query(model_class).filter(model_class.ws_id == ws.id)}
+            for file_path in files:
+                if parsed[file_path] is not None:
+                    _add_or_update(session, existing, model_class, parsed[file_path], workspace=ws)
+                    index.indexed(file_path)
+        session.commit()
+    except:
+        logger.exception("Could not load private catalogue of workspace {}:".format(ws.name))
+        index.rollback()
 
 
-def _scan_catalogue(cat_path, model, ws):
+def _scan_catalogue(cat_path, index) -> list:
     """
     Scan a private catalogue dir
     
-    Scans the given catalogue path for new descriptors 
-    and writes it into the descriptor model
+    Scans the given catalogue path for new or changed descriptors
     
     :param cat_path: The catalogue path containing either nss or vnfs 
-    :param model: The descriptor model
-    :param ws: The workspace to attach the descriptors to
+    :param index: The scan index
+    :return: The paths of the descriptor files that need to be parsed
     """
-    from pathlib import Path
-    from son_editor.models.private_descriptor import PrivateDescriptor
-    session = db_session()
-    try:
-        for vendor in cat_path.iterdir():
-            if not vendor.is_dir():
+    files = []
+    if not cat_path.is_dir():
+        return files
+    for vendor in cat_path.iterdir():
+        if not vendor.is_dir():
+            continue
+        for name in vendor.iterdir():
+            if not name.is_dir():
                 continue
-            for name in vendor.iterdir():
-                if not name.is_dir():
-                    continue
-                for version in name.iterdir():
-                    path = Path(str(version) + "/descriptor.yml")
-                    if path.exists() and path.is_file():
-                        logger.info("Found private ns/vnf: {}".format(path))
-                        model = load_ns_vnf_from_disk(str(path), model)
-                        model.workspace = ws
-                        if not session.query(PrivateDescriptor).filter(PrivateDescriptor.uid == model.uid).first():
-                            session.add(model)
-                            session.commit()
-                        else:
-                            session.rollback()
-    except:
-        session.rollback()
+            for version in name.iterdir():
+                path = Path(str(version) + "/descriptor.yml")
+                if path.exists() and path.is_file() and index.needs_parsing(str(path)):
+                    logger.info("Found private ns/vnf: {}".format(path))
+                    files.append(str(path))
+    return files
 
 
-def _scan_for_services(services_dir, pj):
+def _scan_for_services(services_dir, index) -> list:
     """
     Scan project for services
     
-    Scans the given directory for services and adds them to the project.
+    Scans the given directory for new or changed service descriptors.
     
     :param services_dir: The services directory in the project
-    :param pj: The project model from the database
+    :param index: The scan index
+    :return: The paths of the service files that need to be parsed
     """
-    from son_editor.models.descriptor import Service
-    session = db_session()
-    try:
-        for service_file in os.listdir(services_dir):
-            if service_file.endswith(".yml"):
-                service = Service()
-                file_path = os.path.join(services_dir, service_file)
-                load_ns_vnf_from_disk(file_path, service)
-                db_service = session.query(Service). \
-                    filter(Service.project == pj). \
-                    filter(Service.name == service.name). \
-                    filter(Service.vendor == service.vendor). \
-                    filter(Service.version == service.version). \
-                    first()
-                if not db_service:
-                    logger.info("Found service in project {}: {}".format(pj.name, service.uid))
-                    service.project = pj
-                    session.add(service)
-                    session.commit()
-                else:
-                    session.rollback()
-                if get_file_path("nsd", service) != file_path:
-                    shutil.move(file_path, get_file_path("nsd", service))  # rename to expected name format
-            elif os.path.isdir(os.path.join(services_dir, service_file)):
-                _scan_for_services(os.path.join(services_dir, service_file), pj)
-    except:
-        session.rollback()
+    files = []
+    if not os.path.isdir(services_dir):
+        return files
+    for service_file in os.listdir(services_dir):
+        file_path = os.path.join(services_dir, service_file)
+        if service_file.endswith(".yml"):
+            if index.needs_parsing(file_path):
+                files.append(file_path)
+        elif os.path.isdir(file_path):
+            files.extend(_scan_for_services(file_path, index))
+    return files
 
 
-def _scan_for_functions(function_dir, pj):
+def _scan_for_functions(function_dir, index) -> list:
     """
     Scan project for functions
     
-    Scans the given directory for functions and adds them to the project.
+    Scans the given directory for new or changed function descriptors.
     
     :param function_dir: The functions directory in the project
-    :param pj: The project model from the database
+    :param index: The scan index
+    :return: The paths of the function files that need to be parsed
     """
-    session = db_session()
-    from son_editor.models.descriptor import Function
-    try:
-        for function_folder in os.listdir(function_dir):
-            folder_path = os.path.join(function_dir, function_folder)
-            if os.path.isdir(folder_path):
-                yaml_files = [file for file in os.listdir(folder_path) if file.endswith(".yml")]
-                if len(yaml_files) == 1:
-                    function = Function()
-                    file_path = os.path.join(folder_path, yaml_files[0])
-                    load_ns_vnf_from_disk(file_path, function)
-                    db_function = session.query(Function). \
-                        filter(Function.project == pj). \
-                        filter(Function.name == function.name). \
-                        filter(Function.vendor == function.vendor). \
-                        filter(Function.version == function.version). \
-                        first()
-                    if not db_function:
-                        logger.info("Found function in project {}: {}".format(pj.name, function.uid))
-                        function.project = pj
-                        session.add(function)
-                        session.commit()
-                    else:
-                        function = db_function
-                    # rename folder if necessary
-                    target_folder = os.path.normpath(
-                        get_file_path("vnf", function).replace(get_file_name(function), ''))
-                    if os.path.normpath(folder_path) != target_folder:
-                        shutil.move(folder_path, target_folder)
-                        file_path = file_path.replace(folder_path, target_folder)
-                    # rename file if necessary
-                    if not os.path.exists(get_file_path("vnf", function)):
-                        shutil.move(file_path, get_file_path("vnf", function))
-                else:
-                    logger.info("Multiple or no yaml files in folder {}. Ignoring".format(folder_path))
+    files = []
+    if not os.path.isdir(function_dir):
+        return files
+    for function_folder in os.listdir(function_dir):
+        folder_path = os.path.join(function_dir, function_folder)
+        if os.path.isdir(folder_path):
+            yaml_files = [file for file in os.listdir(folder_path) if file.endswith(".yml")]
+            if len(yaml_files) == 1:
+                file_path = os.path.join(folder_path, yaml_files[0])
+                if index.needs_parsing(file_path):
+                    files.append(file_path)
+            else:
+                logger.info("Multiple or no yaml files in folder {}. Ignoring".format(folder_path))
+    return files
 
+
+def _parse_descriptor(file_path: str):
+    """
+    Parses a descriptor file, runs in the worker processes of the parser pool
+
+    :param file_path: The path of the descriptor file
+    :return: The keyword arguments for the descriptor model, None if the file could not be parsed
+    """
+    try:
+        return read_ns_vnf_from_disk(file_path)
     except:
-        logger.exception("Could not load function descriptor:")
-    finally:
-        session.rollback()
+        logging.getLogger(__name__).exception("Could not load descriptor {}:".format(file_path))
+        return None
+
+
+def _get_parser_processes() -> int:
+    """ Returns the number of processes to parse descriptors in, according to the "workspace-scan" configuration """
+    processes = get_config().get('workspace-scan', {}).get('processes', 1)
+    if processes == 0:
+        processes = os.cpu_count() or 1
+    return processes
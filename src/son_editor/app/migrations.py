@@ -0,0 +1,187 @@
+"""
+Versioned schema migrations of the database
+
+The database records the versions of the applied migrations in the schema_version
+table. At startup init_db creates the tables missing so far and applies every
+migration newer than the recorded version in order, so existing databases are
+upgraded in place instead of being wiped. A new database gets all tables from the
+models and is stamped with the latest version without running the migrations.
+
+Migrations must not rewrite tables. SQLite creates an index and adds a column with a
+constant default without copying the table, but cannot add a constraint to an existing
+table, so unique constraints are created as unique indexes. A migration that fails because the stored rows violate
+such an index is not recorded and stops the upgrade, it is retried on the next start.
+"""
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import inspect, MetaData, Table, Column, Integer, String, DateTime, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn
+
+from son_editor.app.database import Base
+
+logger = logging.getLogger(__name__)
+
+# kept apart from the models, so resetting the model tables keeps the recorded versions
+version_metadata = MetaData()
+schema_version = Table('schema_version', version_metadata,
+                       Column('version', Integer, primary_key=True),
+                       Column('description', String(255)),
+                       Column('applied', DateTime))
+
+
+def _model_indexes(names=None) -> list:
+    """ Returns the Index objects of the models with the given names, all if names is None """
+    indexes = [index for table in Base.metadata.sorted_tables
+               for index in sorted(table.indexes, key=lambda index: index.name)]
+    if names is None:
+        return indexes
+    by_name = {index.name: index for index in indexes}
+    return [by_name[name] for name in names]
+
+
+def missing_indexes(engine, names=None) -> list:
+    """
+    Finds the indexes of the models that do not exist in the database
+
+    :param engine: The database engine
+    :param names: Only check the indexes with these names
+    :return: The missing sqlalchemy Index objects
+    """
+    inspector = inspect(engine)
+    existing = {}
+    missing = []
+    for index in _model_indexes(names):
+        table_name = index.table.name
+        if table_name not in existing:
+            existing[table_name] = {row['name'] for row in inspector.get_indexes(table_name)}
+        if index.name not in existing[table_name]:
+            missing.append(index)
+    return missing
+
+
+def create_indexes(engine, names: list) -> list:
+    """
+    Creates the indexes of the models with the given names that do not exist in the database
+
+    :param engine: The database engine
+    :param names: The index names
+    :return: The names of the created indexes
+    :raises IntegrityError: if the stored rows violate a unique index
+    """
+    created = []
+    for index in missing_indexes(engine, names):
+        index.create(bind=engine)
+        logger.info("Created index {} on {}".format(index.name, index.table.name))
+        created.append(index.name)
+    return created
+
+
+def _indexes_migration(names: list):
+    """ Returns a migration creating the indexes with the given names """
+    return lambda engine: create_indexes(engine, names)
+
+
+def add_columns(engine, columns: list) -> list:
+    """
+    Adds the columns of the models that do not exist in the database
+
+    :param engine: The database engine
+    :param columns: The (table name, column name) of the columns
+    :return: The added columns
+    """
+    inspector = inspect(engine)
+    added = []
+    for table_name, column_name in columns:
+        if column_name in {column['name'] for column in inspector.get_columns(table_name)}:
+            continue
+        column = Base.metadata.tables[table_name].c[column_name]
+        engine.execute("ALTER TABLE {} ADD COLUMN {}".format(table_name,
+                                                             CreateColumn(column).compile(dialect=engine.dialect)))
+        logger.info("Added column {} to {}".format(column_name, table_name))
+        added.append((table_name, column_name))
+    return added
+
+
+def _backfill_references(engine) -> None:
+    from son_editor.app.database import _backfill_descriptor_references
+    session = sessionmaker(bind=engine)()
+    try:
+        _backfill_descriptor_references(session)
+    finally:
+        session.close()
+
+
+# (version, description, function called with the engine), ordered by version.
+# Each migration lists its indexes by name, so it does the same whatever indexes are added to the models later
+MIGRATIONS = [
+    (1, "Index the references of the services stored before the descriptor_reference table", _backfill_references),
+    (2, "Create the descriptor and private catalogue lookup indexes",
+     _indexes_migration(['ix_descriptor_project_uid', 'ix_descriptor_lookup', 'ix_private_descriptor_lookup'])),
+    # kept apart as it fails on duplicate names, it is retried on every start until the names are cleaned up
+    (3, "Create the unique project and workspace name indexes",
+     _indexes_migration(['uix_project_workspace_name', 'uix_workspace_owner_name'])),
+    (4, "Add the descriptor revision of the projects",
+     lambda engine: add_columns(engine, [('project', 'descriptor_revision')])),
+]
+
+
+def get_version(engine):
+    """
+    Reads the schema version of the database
+
+    :param engine: The database engine
+    :return: The version of the latest applied migration, 0 if the database predates the migrations
+             and None if the database is empty
+    """
+    if not engine.has_table(schema_version.name):
+        return 0 if engine.has_table('workspace') else None
+    with engine.connect() as connection:
+        return connection.execute(select([func.max(schema_version.c.version)])).scalar() or 0
+
+
+def _record_version(engine, version: int, description: str) -> bool:
+    """ Records the applied migration, returns False if another process recorded it first """
+    try:
+        with engine.begin() as connection:
+            connection.execute(schema_version.insert().values(version=version, description=description,
+                                                              applied=datetime.utcnow()))
+        return True
+    except IntegrityError:
+        return False
+
+
+def upgrade(engine) -> int:
+    """
+    Brings the database schema up to date with the models
+
+    :param engine: The database engine
+    :return: The schema version of the database afterwards
+    """
+    version = get_version(engine)
+    version_metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    if version is None:
+        # new database, the tables were created from the current models
+        for migration_version, description, _ in MIGRATIONS:
+            _record_version(engine, migration_version, description)
+        return get_version(engine)
+    for migration_version, description, migrate in MIGRATIONS:
+        if migration_version <= version:
+            continue
+        start = time.monotonic()
+        try:
+            migrate(engine)
+        except IntegrityError as err:
+            # not recorded, so the migration runs again on the next start
+            logger.error("Could not migrate database to version {}, the stored rows conflict with it: {}".format(
+                migration_version, err))
+            return version
+        if _record_version(engine, migration_version, description):
+            logger.info("Migrated database to version {} in {:.2f}s: {}".format(
+                migration_version, time.monotonic() - start, description))
+        version = migration_version
+    return version
@@ -0,0 +1,194 @@
+"""
+Opt-in cProfile profiling of single requests
+
+The hooks are only registered on the app if the "profiling" section is configured at
+startup, otherwise requests do not pass through this module at all. A request is
+profiled if the admin flag "profiling: enabled" is set or if it carries a header signed
+with the configured secret::
+
+    X-Son-Editor-Profile: <expires>:<hex HMAC-SHA256 of "<expires>:<METHOD>:<path>">
+
+where expires is a unix timestamp after which the signature is rejected, see
+sign_request. The profiles are stored as pstats files in the configured location and
+can be downloaded from the profiles namespace.
+"""
+import cProfile
+import hashlib
+import hmac
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+
+from flask import g, request
+
+from son_editor.app.exceptions import NotFound
+from son_editor.util.requestutil import get_config
+
+PROFILE_HEADER = 'X-Son-Editor-Profile'
+PROFILE_ID_HEADER = 'X-Son-Editor-Profile-Id'
+# the endpoints serving the profiles are never profiled, so downloading does not evict them
+PROFILES_ENDPOINT_PREFIX = 'profiles_'
+
+logger = logging.getLogger(__name__)
+_file_lock = threading.Lock()
+
+
+def get_profiling_config() -> dict:
+    """ Returns the "profiling" configuration, None if profiling is not configured """
+    return get_config().get('profiling')
+
+
+def get_profiles_dir() -> str:
+    """ Returns the directory the profiles are stored in """
+    location = (get_profiling_config() or {}).get('location', '~/son-editor/profiles/')
+    return os.path.normpath(os.path.expanduser(location))
+
+
+def sign_request(secret: str, method: str, path: str, expires: int) -> str:
+    """
+    Creates the value of the profiling header for a request
+
+    :param secret: The configured profiling secret
+    :param method: The HTTP method of the request
+    :param path: The path of the request without the query string
+    :param expires: Unix timestamp until which the header is accepted
+    :return: The header value
+    """
+    message = "{}:{}:{}".format(int(expires), method.upper(), path).encode()
+    signature = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return "{}:{}".format(int(expires), signature)
+
+
+def verify_signature(secret: str, method: str, path: str, value: str) -> bool:
+    """
+    Checks a profiling header value
+
+    :return: True if the signature matches the request and has not expired
+    """
+    expires = value.partition(':')[0]
+    try:
+        if int(expires) < time.time():
+            return False
+    except ValueError:
+        return False
+    return hmac.compare_digest(sign_request(secret, method, path, int(expires)), value.strip())
+
+
+def should_profile() -> bool:
+    """ Decides if the current request is profiled """
+    config = get_profiling_config()
+    if not config or (request.endpoint or '').startswith(PROFILES_ENDPOINT_PREFIX):
+        return False
+    if config.get('enabled'):
+        return True
+    header = request.headers.get(PROFILE_HEADER)
+    secret = config.get('secret')
+    return bool(header and secret and verify_signature(secret, request.method, request.path, header))
+
+
+def start_profile():
+    if should_profile():
+        profile = cProfile.Profile()
+        g.profile = profile
+        endpoint = re.sub(r'[^A-Za-z0-9_.-]+', '_', request.endpoint or 'unmatched')
+        g.profile_id = "{}-{:03d}-{}-{}-{}.prof".format(time.strftime('%Y%m%d-%H%M%S'),
+                                                        int(time.time() * 1000) % 1000,
+                                                        os.getpid(), request.method, endpoint)
+        profile.enable()
+
+
+def add_profile_header(response):
+    if g.get('profile') is not None:
+        response.headers[PROFILE_ID_HEADER] = g.profile_id
+    return response
+
+
+def save_profile(exception=None):
+    profile = g.get('profile')
+    if profile is None:
+        return
+    profile.disable()
+    g.profile = None
+    try:
+        save_stats(profile, g.profile_id)
+    except OSError as err:
+        logger.warning("Could not save profile {}: {}".format(g.profile_id, err))
+
+
+def save_stats(profile: cProfile.Profile, profile_id: str) -> None:
+    """
+    Stores the profile and removes the oldest profiles above the configured number
+
+    :param profile: The disabled profiler
+    :param profile_id: The file name of the profile
+    """
+    directory = get_profiles_dir()
+    keep = (get_profiling_config() or {}).get('keep', 50)
+    with _file_lock:
+        os.makedirs(directory, exist_ok=True)
+        profile.dump_stats(os.path.join(directory, profile_id))
+        if keep:
+            for old in list_profiles()[keep:]:
+                os.remove(os.path.join(directory, old['id']))
+    logger.info("Saved profile {}".format(profile_id))
+
+
+def list_profiles() -> list:
+    """ Returns the id, size and creation time of the stored profiles, newest first """
+    directory = get_profiles_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        file_path = os.path.join(directory, name)
+        if name.endswith('.prof') and os.path.isfile(file_path):
+            stat = os.stat(file_path)
+            profiles.append({'id': name, 'size': stat.st_size, 'created': stat.st_mtime})
+    profiles.sort(key=lambda entry: (entry['created'], entry['id']), reverse=True)
+    return profiles
+
+
+def get_profile_path(profile_id: str) -> str:
+    """
+    Returns the path of a stored profile
+
+    :param profile_id: The profile file name
+    :raises NotFound: if there is no profile with this id
+    """
+    if profile_id not in [entry['id'] for entry in list_profiles()]:
+        raise NotFound("No profile with id {} exists".format(profile_id))
+    return os.path.join(get_profiles_dir(), profile_id)
+
+
+def format_profile(profile_id: str, sort: str = 'cumulative', limit: int = 50) -> str:
+    """
+    Renders a stored profile as text
+
+    :param profile_id: The profile file name
+    :param sort: The pstats sort key
+    :param limit: Number of functions listed
+    :return: The pstats report
+    """
+    stream = io.StringIO()
+    stats = pstats.Stats(get_profile_path(profile_id), stream=stream)
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def init_profiler(app) -> None:
+    """
+    Registers the profiling hooks on the app, once
+
+    :param app: The flask app
+    """
+    if app.extensions.get('profiler'):
+        return
+    app.extensions['profiler'] = True
+    # run first so the login and access checks are part of the profile
+    app.before_request_funcs.setdefault(None, []).insert(0, start_profile)
+    app.after_request(add_profile_header)
+    app.teardown_request(save_profile)
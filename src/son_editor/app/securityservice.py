@@ -1,11 +1,19 @@
+import shlex
+
 from flask import session
+from sqlalchemy import and_
 
 from son_editor.app.database import db_session
 from son_editor.app.exceptions import NotFound, UnauthorizedException
-from son_editor.impl.usermanagement import get_user
 from son_editor.models.project import Project
+from son_editor.models.user import User
 from son_editor.models.workspace import Workspace
+from son_editor.util.cacheutil import TTLCache
 from son_editor.util.constants import PROJECTS
+from son_editor.util.requestutil import get_config
+
+# results of the ownership checks by (login, ws_id, project_id)
+access_cache = TTLCache(get_config().get('access-cache', {}).get('ttl', 5))
 
 
 def check_access(request):
@@ -27,26 +35,53 @@ def check_access(request):
         return
     if 'ws_id' in request.view_args:
         ws_id = request.view_args['ws_id']
-        data_session = db_session()
-        ws = data_session.query(Workspace).filter_by(id=ws_id).first()
-        # Get current user
-        user = get_user(session['user_data']['login'])
-        # If the requested workspace is in his workspaces, he is allowed to access it
-        if ws in user.workspaces:
-            if 'project_id' in request.view_args:
-                pj_id = request.view_args['project_id']
-                pj = data_session.query(Project).filter(Project.id == pj_id).first()
-                if pj in ws.projects:
-                    return
-                else:
-                    raise NotFound("Project not found")
-            elif 'parent_id' in request.view_args and PROJECTS in request.url.split("/"):
-                pj_id = request.view_args['parent_id']
-                pj = data_session.query(Project).filter(Project.id == pj_id).first()
-                if pj in ws.projects:
-                    return
-                else:
-                    raise NotFound("Project not found")
-            return
-        raise NotFound("Workspace not found")
+        pj_id = None
+        if 'project_id' in request.view_args:
+            pj_id = request.view_args['project_id']
+        elif 'parent_id' in request.view_args and PROJECTS in request.url.split("/"):
+            pj_id = request.view_args['parent_id']
+        key = (session['user_data']['login'], ws_id, pj_id)
+        access = access_cache.get(key)
+        if access is None:
+            access = _query_access(*key)
+            access_cache.set(key, access)
+        ws_owned, pj_owned = access
+        if not ws_owned:
+            raise NotFound("Workspace not found")
+        if not pj_owned:
+            raise NotFound("Project not found")
     return
+
+
+def _query_access(login: str, ws_id: int, pj_id: int = None) -> tuple:
+    """
+    Checks in one query whether the user owns the workspace and the project is part of it
+
+    :param login: The login of the user
+    :param ws_id: The workspace ID
+    :param pj_id: The project ID, None if no project is accessed
+    :return: A tuple of whether the user owns the workspace and whether the project is in the workspace
+    """
+    data_session = db_session()
+    ws_owned = data_session.query(Workspace.id). \
+        join(User, Workspace.owner_id == User.id). \
+        filter(Workspace.id == ws_id). \
+        filter(User.name == shlex.quote(login)).exists()
+    if pj_id is None:
+        return data_session.query(ws_owned).scalar(), True
+    pj_in_ws = data_session.query(Project.id). \
+        filter(and_(Project.id == pj_id, Project.workspace_id == ws_id)).exists()
+    return tuple(data_session.query(ws_owned, pj_in_ws).one())
+
+
+def invalidate_access(ws_id: int, pj_id: int = None) -> None:
+    """
+    Removes the cached access checks of a workspace or project after it was created or deleted
+
+    :param ws_id: The workspace ID
+    :param pj_id: The project ID, all checks of the workspace are removed if None
+    """
+    if pj_id is None:
+        access_cache.invalidate(lambda key: key[1] == ws_id)
+    else:
+        access_cache.invalidate(lambda key: key[1] == ws_id and key[2] == pj_id)
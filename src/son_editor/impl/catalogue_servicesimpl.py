@@ -1,11 +1,16 @@
 import json
-
-import requests
+import logging
+import threading
+import time
 
 from son_editor.app.database import db_session
 from son_editor.app.exceptions import NotFound
 from son_editor.models.descriptor import Function, Service
 from son_editor.models.repository import Catalogue
+from son_editor.util import httputil
+from son_editor.util.requestutil import get_config
+
+logger = logging.getLogger(__name__)
 
 # Catalogue methods
 
@@ -15,8 +20,9 @@ VNF_PREFIX = "vnfs"
 CATALOGUE_SPECIFIC_URL = "/{type}/vendor/{vendor}/name/{name}/version/{version}"
 CATALOGUE_LIST_CREATE_SUFFIX = "/{type}"
 
-# Timeout of HTTP requests in seconds
-TIMEOUT = 5
+# cached descriptor lists by (catalogue url, type)
+_listings = {}
+_listings_lock = threading.Lock()
 
 
 ## Some helper functions
@@ -105,6 +111,109 @@ def build_URL(is_vnf, name, vendor, version):
     return service_url
 
 
+## Listing cache
+
+class CatalogueListing:
+    """ The descriptor list of a catalogue as it was last downloaded, indexed by vendor:name:version """
+
+    def __init__(self, descriptors: list, etag: str = None):
+        self.descriptors = descriptors
+        self.by_id = {descriptor['id']: descriptor for descriptor in descriptors}
+        self.etag = etag
+        self.fetched = time.time()
+        self.refreshing = False
+
+
+def get_cache_config() -> dict:
+    """ Returns the "catalogue-cache" configuration """
+    return get_config().get('catalogue-cache', {})
+
+
+def _download_listing(list_url: str, cached: CatalogueListing = None) -> CatalogueListing:
+    """
+    Downloads the descriptor list, sending the ETag of the cached list along
+
+    :param list_url: The list url of the catalogue
+    :param cached: The cached listing, returned again if the catalogue answers 304 Not Modified
+    :return: The current listing
+    """
+    headers = {'content-type': 'application/json'}
+    if cached is not None and cached.etag:
+        headers['If-None-Match'] = cached.etag
+    try:
+        response = httputil.get(list_url, headers=headers,
+                                timeout=(httputil.get_timeout()[0], get_cache_config().get('read-timeout', 5)))
+    except:
+        raise Exception("Could not reach {}".format(list_url))
+    if response.status_code == 304 and cached is not None:
+        cached.fetched = time.time()
+        return cached
+    if response.status_code != 200:
+        raise Exception("External service '{}' delivered unexpected status code '{}', reason: {}".format(
+            list_url, response.status_code, response.text))
+    try:
+        catalogue_list = json.loads(response.text)
+    except:
+        raise Exception("Could not reach {}".format(list_url))
+    # Append an id to the elements, it consists of name,vendor,version
+    return CatalogueListing([{'descriptor': descriptor, 'id': create_id(descriptor)} for descriptor in catalogue_list],
+                            response.headers.get('ETag'))
+
+
+def _refresh_listing(key: tuple, cached: CatalogueListing) -> None:
+    """ Refreshes a stale listing in the background """
+    try:
+        listing = _download_listing(key[0] + key[1], cached)
+        with _listings_lock:
+            # do not overwrite a listing that was invalidated in the meantime
+            if _listings.get(key) is cached:
+                _listings[key] = listing
+    except Exception as err:
+        logger.warning("Could not refresh catalogue listing: {}".format(err))
+    finally:
+        cached.refreshing = False
+
+
+def get_catalogue_listing(catalogue_url: str, is_vnf: bool) -> CatalogueListing:
+    """
+    Returns the descriptor list of the catalogue
+
+    The list is downloaded again once it is older than the configured ttl.
+    Within the following stale period the cached list is returned right away
+    and refreshed in the background
+
+    :param catalogue_url: The catalogue url
+    :param is_vnf: If the VNF or the NS list is requested
+    :return: The listing of the catalogue
+    """
+    key = (catalogue_url, CATALOGUE_LIST_CREATE_SUFFIX.replace("{type}", getType(is_vnf)))
+    ttl = get_cache_config().get('ttl', 60)
+    stale = get_cache_config().get('stale', 30)
+    with _listings_lock:
+        cached = _listings.get(key)
+        if cached is not None:
+            age = time.time() - cached.fetched
+            if age < ttl:
+                return cached
+            if age < ttl + stale:
+                if not cached.refreshing:
+                    cached.refreshing = True
+                    threading.Thread(target=_refresh_listing, args=(key, cached),
+                                     name="catalogue-refresh", daemon=True).start()
+                return cached
+    listing = _download_listing(key[0] + key[1], cached)
+    if ttl > 0:
+        with _listings_lock:
+            _listings[key] = listing
+    return listing
+
+
+def invalidate_listing(catalogue_url: str, is_vnf: bool) -> None:
+    """ Drops the cached descriptor list after the catalogue was changed, only in this worker process """
+    with _listings_lock:
+        _listings.pop((catalogue_url, CATALOGUE_LIST_CREATE_SUFFIX.replace("{type}", getType(is_vnf))), None)
+
+
 ## Actual catalogue HTTP actions
 
 def create_in_catalogue(catalogue_id, function_id, is_vnf):
@@ -124,7 +233,8 @@ def create_in_catalogue(catalogue_id, function_id, is_vnf):
     catalogue = get_catalogue(catalogue_id)
 
     # Create network service on the catalogue
-    response = requests.post(catalogue.url + url_suffix, json=json.loads(descriptor.descriptor), timeout=TIMEOUT)
+    response = httputil.post(catalogue.url + url_suffix, json=json.loads(descriptor.descriptor))
+    invalidate_listing(catalogue.url, is_vnf)
     if response.status_code != 201 and response.status_code != 200:
         raise Exception("External service '{}' delivered unexpected status code '{}', reason: {}".format(
             catalogue.url + url_suffix, response.status_code, response.text))
@@ -141,25 +251,8 @@ def get_all_in_catalogue(ws_id, catalogue_id, is_vnf):
     :param is_vnf:
     :return:
     """
-    url_suffix = CATALOGUE_LIST_CREATE_SUFFIX.replace("{type}", getType(is_vnf))
     catalogue = get_catalogue(catalogue_id)
-
-    # Retrieve network services
-    try:
-        response = requests.get(catalogue.url + url_suffix, headers={'content-type': 'application/json'},
-                                timeout=TIMEOUT)
-        catalogue_list = json.loads(response.text)
-    except:
-        raise Exception("Could not reach {}".format(catalogue.url + url_suffix))
-
-    # Append an id to the elements, it consists of name,vendor,version
-    descriptor_list = [{'descriptor': descriptor, 'id': create_id(descriptor)} for descriptor in catalogue_list]
-
-    if response.status_code != 200:
-        raise Exception("External service '{}' delivered unexpected status code '{}', reason: {}".format(
-            catalogue.url + url_suffix, response.status_code, response.text))
-
-    return descriptor_list
+    return list(get_catalogue_listing(catalogue.url, is_vnf).descriptors)
 
 
 def get_in_catalogue(ws_id, catalogue_id, function_id, is_vnf):
@@ -177,7 +270,7 @@ def get_in_catalogue(ws_id, catalogue_id, function_id, is_vnf):
 
     service_url = build_URL(is_vnf, name, vendor, version)
 
-    response = requests.get(catalogue.url + service_url, headers={'content-type': 'application/json'}, timeout=TIMEOUT)
+    response = httputil.get(catalogue.url + service_url, headers={'content-type': 'application/json'})
     descriptor = json.loads(response.text)
     return {'descriptor': descriptor, 'id': create_id(descriptor)}
 
@@ -197,7 +290,8 @@ def update_service_catalogue(ws_id, catalogue_id, descriptor_uid, descriptor_dat
     service_url = build_URL(is_vnf, name, vendor, version)
     descriptor_data = descriptor_data["descriptor"]
 
-    response = requests.put(catalogue.url + service_url, json=descriptor_data, timeout=TIMEOUT)
+    response = httputil.put(catalogue.url + service_url, json=descriptor_data)
+    invalidate_listing(catalogue.url, is_vnf)
     if response.status_code != 200:
         raise Exception(
             "External service '{}' delivered unexpected status code '{}', reason: {}".format(
@@ -219,7 +313,8 @@ def delete_service_catalogue(ws_id, catalogue_id, descriptor_uid, is_vnf):
 
     service_url = build_URL(is_vnf, name, vendor, version)
 
-    response = requests.delete(catalogue.url + service_url, timeout=TIMEOUT)
+    response = httputil.delete(catalogue.url + service_url)
+    invalidate_listing(catalogue.url, is_vnf)
     if response.status_code != 200:
         raise Exception(
             "External service '{}' delivered unexpected status code '{}, reason: {}".format(catalogue.url + service_url,
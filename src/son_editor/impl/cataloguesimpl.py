@@ -31,8 +31,9 @@ def get_catalogues(workspace_id):
     """
     session = db_session()
     catalogues = session.query(Catalogue).filter(Catalogue.workspace_id == workspace_id).all()
+    result = [model.as_dict() for model in catalogues]
     session.commit()
-    return list(map(lambda x: x.as_dict(), catalogues))
+    return result
 
 
 def create_catalogue(workspace_id: int, catalogue_data):
@@ -0,0 +1,206 @@
+"""
+Reverse dependency graph of the descriptors in a project
+
+The graph is built from the descriptor_reference table and kept per project in memory
+together with the transitive dependents computed so far. The services and functions
+implementations update it incrementally after they changed a descriptor. Every transaction
+changing the descriptors of a project increments its descriptor_revision, so a graph older
+than the stored revision, e.g. after a change made by another worker process, is rebuilt
+on the next request.
+"""
+import threading
+
+from son_editor.app.database import db_session
+from son_editor.app.exceptions import NotFound
+from son_editor.models.descriptor import Descriptor, Function, Service, DescriptorReference, \
+    committed_revision_bumps
+from son_editor.models.project import Project
+
+# kinds of the graph nodes, a function and a service may share the same uid
+FUNCTION = 'function'
+SERVICE = 'service'
+
+_graphs = {}
+_lock = threading.RLock()
+
+
+class DependencyGraph:
+    """ The services of one project and the functions and services they reference """
+
+    def __init__(self, revision=None):
+        self.revision = revision
+        # (kind, uid) -> descriptor id of the descriptors existing in the project
+        self.ids = {}
+        # service (kind, uid) -> referenced (kind, uid)
+        self.references = {}
+        # referenced (kind, uid) -> referencing service (kind, uid)
+        self.dependents = {}
+        self._closures = {}
+
+    def set_references(self, service: tuple, targets: set) -> None:
+        for target in self.references.pop(service, set()):
+            self.dependents[target].discard(service)
+        self.references[service] = set(targets)
+        for target in targets:
+            self.dependents.setdefault(target, set()).add(service)
+        self._closures.clear()
+
+    def remove(self, node: tuple) -> None:
+        self.ids.pop(node, None)
+        if node[0] == SERVICE:
+            self.set_references(node, set())
+            del self.references[node]
+        self._closures.clear()
+
+    def all_dependents(self, node: tuple) -> set:
+        """
+        Collects the services depending on the node directly or through nested services
+
+        :param node: The (kind, uid) of the descriptor
+        :return: The (kind, uid) of all depending services
+        """
+        if node not in self._closures:
+            result = set()
+            pending = [node]
+            while pending:
+                for dependent in self.dependents.get(pending.pop(), ()):
+                    if dependent not in result:
+                        result.add(dependent)
+                        pending.append(dependent)
+            result.discard(node)
+            self._closures[node] = result
+        return self._closures[node]
+
+    def nodes(self) -> set:
+        return set(self.ids) | set(self.dependents)
+
+
+def _build_graph(session, project_id: int, revision: int) -> DependencyGraph:
+    graph = DependencyGraph(revision)
+    for model, kind in [(Function, FUNCTION), (Service, SERVICE)]:
+        for descriptor_id, uid in session.query(model.id, model.uid).filter(model.project_id == project_id):
+            graph.ids[(kind, uid)] = descriptor_id
+    references = {}
+    rows = session.query(Service.uid, DescriptorReference.kind, DescriptorReference.vendor,
+                         DescriptorReference.name, DescriptorReference.version). \
+        join(DescriptorReference, Service.references). \
+        filter(Service.project_id == project_id)
+    for uid, kind, vendor, name, version in rows:
+        references.setdefault((SERVICE, uid), set()).add((kind, _uid(vendor, name, version)))
+    for service, targets in references.items():
+        graph.set_references(service, targets)
+    return graph
+
+
+def _uid(vendor, name, version) -> str:
+    return "{}:{}:{}".format(vendor, name, version)
+
+
+def _get_graph(session, project_id: int, revision: int) -> DependencyGraph:
+    """ Returns the cached graph of the project, rebuilding it if the project changed elsewhere """
+    with _lock:
+        graph = _graphs.get(project_id)
+        if graph is None or graph.revision != revision:
+            graph = _build_graph(session, project_id, revision)
+            _graphs[project_id] = graph
+        return graph
+
+
+def _get_current_graph(session, project_id: int):
+    """
+    Returns the cached graph of the project if it is at most one revision older than the stored one
+    and that revision was written by the last commit of the session, drops it otherwise
+
+    :return: The graph and the stored revision, None if the caller must not update the graph
+    """
+    graph = _graphs.get(project_id)
+    if graph is None:
+        return None
+    revision = session.query(Project.descriptor_revision).filter(Project.id == project_id).scalar()
+    previous = revision - 1 if project_id in committed_revision_bumps(session) else revision
+    if graph.revision not in (previous, revision):
+        # changed by another process meanwhile, rebuilt on the next request
+        del _graphs[project_id]
+        return None
+    graph.revision = revision
+    return graph
+
+
+def project_removed(project_id: int) -> None:
+    """
+    Drops the cached graph of a deleted project
+
+    :param project_id: The project ID
+    """
+    with _lock:
+        _graphs.pop(project_id, None)
+
+
+def descriptor_changed(session, descriptor: Descriptor, old_uid: str = None) -> None:
+    """
+    Updates the cached graph after a function or service was created or updated and committed
+
+    :param session: The database session
+    :param descriptor: The function or service
+    :param old_uid: The uid of the descriptor before it was renamed
+    """
+    kind = SERVICE if isinstance(descriptor, Service) else FUNCTION
+    with _lock:
+        graph = _get_current_graph(session, descriptor.project_id)
+        if graph is None:
+            return
+        if old_uid and old_uid != descriptor.uid:
+            graph.remove((kind, old_uid))
+        graph.ids[(kind, descriptor.uid)] = descriptor.id
+        if kind == SERVICE:
+            graph.set_references((kind, descriptor.uid),
+                                 {(ref.kind, _uid(ref.vendor, ref.name, ref.version))
+                                  for ref in descriptor.references})
+
+
+def descriptor_removed(session, descriptor: Descriptor) -> None:
+    """
+    Updates the cached graph after a function or service was deleted and committed
+
+    :param session: The database session
+    :param descriptor: The deleted function or service
+    """
+    kind = SERVICE if isinstance(descriptor, Service) else FUNCTION
+    with _lock:
+        graph = _get_current_graph(session, descriptor.project_id)
+        if graph is None:
+            return
+        graph.remove((kind, descriptor.uid))
+
+
+def get_dependencies(ws_id: int, project_id: int, uid: str = None) -> list:
+    """
+    Lists the services depending on each function and service of the project,
+    directly and transitively through nested services
+
+    :param ws_id: The workspace ID
+    :param project_id: The project ID
+    :param uid: Only list the descriptors with this "vendor:name:version"
+    :return: A list of the descriptors with their dependents
+    """
+    session = db_session()
+    revision = session.query(Project.descriptor_revision).filter(Project.id == project_id). \
+        filter(Project.workspace_id == ws_id).scalar()
+    if revision is None:
+        raise NotFound("Project with id '{}' not found".format(project_id))
+    graph = _get_graph(session, project_id, revision)
+    session.commit()
+    with _lock:
+        nodes = [node for node in graph.nodes() if uid is None or node[1] == uid]
+        if uid is not None and not nodes:
+            raise NotFound("No function or service matching uid {}".format(uid))
+        return [{'kind': kind,
+                 'uid': node_uid,
+                 'id': graph.ids.get((kind, node_uid)),
+                 'dependents': _as_list(graph, graph.dependents.get((kind, node_uid), ())),
+                 'all_dependents': _as_list(graph, graph.all_dependents((kind, node_uid)))}
+                for kind, node_uid in sorted(nodes)]
+
+
+def _as_list(graph: DependencyGraph, nodes) -> list:
+    return [{'uid': uid, 'id': graph.ids.get((kind, uid))} for kind, uid in sorted(nodes)]
@@ -5,33 +5,41 @@ import shlex
 import shutil
 from pathlib import Path
 
-import jsonschema
 from jsonschema import ValidationError
+from sqlalchemy.orm import contains_eager
 from werkzeug.utils import secure_filename
 
 from son_editor.app.database import db_session
 from son_editor.app.exceptions import NameConflict, NotFound, InvalidArgument, StillReferenced
-from son_editor.models.descriptor import Function, Service
+from son_editor.impl import dependenciesimpl
+from son_editor.models.descriptor import Function, Service, DescriptorReference
 from son_editor.models.project import Project
 from son_editor.models.workspace import Workspace
-from son_editor.util.descriptorutil import write_ns_vnf_to_disk, get_file_path, get_schema, get_file_name, SCHEMA_ID_VNF
+from son_editor.util.descriptorutil import write_ns_vnf_to_disk, get_file_path, get_validator, get_file_name, \
+    list_descriptors, SCHEMA_ID_VNF
 
 logger = logging.getLogger(__name__)
 
+# fills function.project.workspace from the joined rows, get_file_path needs both
+WITH_PROJECT = contains_eager(Function.project).contains_eager(Project.workspace)
 
-def get_functions(ws_id: int, project_id: int) -> list:
+
+def get_functions(ws_id: int, project_id: int, fields: list = None, limit: int = None, cursor: int = None) -> tuple:
     """
     Get a list of all functions
 
     :param ws_id: The workspace ID
     :param project_id: The project id
-    :return:
+    :param fields: The fields to list, by default id, uid and descriptor
+    :param limit: The maximum number of functions to return, all if None
+    :param cursor: The cursor returned with the previous page
+    :return: The functions as JSON array and the cursor of the next page
     """
     session = db_session()
-    functions = session.query(Function).join(Project).join(Workspace). \
-        filter(Workspace.id == ws_id). \
-        filter(Function.project_id == project_id).all()
-    return list(map(lambda x: x.as_dict(), functions))
+    result = list_descriptors(session, Function, ws_id, project_id, fields or ['id', 'uid', 'descriptor'],
+                              limit, cursor)
+    session.commit()
+    return result
 
 
 def get_function_project(ws_id: int, project_id: int, vnf_id: int) -> dict:
@@ -45,6 +53,7 @@ def get_function_project(ws_id: int, project_id: int, vnf_id: int) -> dict:
     """
     session = db_session()
     function = session.query(Function).join(Project).join(Workspace). \
+        options(WITH_PROJECT). \
         filter(Workspace.id == ws_id). \
         filter(Function.project_id == project_id). \
         filter(Function.id == vnf_id).first()
@@ -99,6 +108,7 @@ def create_function(ws_id: int, project_id: int, function_data: dict) -> dict:
         session.rollback()
         raise
     session.commit()
+    dependenciesimpl.descriptor_changed(session, function)
     return function.as_dict()
 
 
@@ -126,6 +136,7 @@ def update_function(ws_id: int, prj_id: int, func_id: int, func_data: dict) -> d
     function = session.query(Function). \
         join(Project). \
         join(Workspace). \
+        options(WITH_PROJECT). \
         filter(Workspace.id == ws_id). \
         filter(Project.id == prj_id). \
         filter(Function.id == func_id).first()
@@ -210,6 +221,14 @@ def update_function(ws_id: int, prj_id: int, func_id: int, func_data: dict) -> d
         logger.exception("Could not update descriptor file:")
         raise
     session.commit()
+    if refs and old_uid != new_uid and edit_mode == "create_new":
+        # the referenced function is kept under its old uid
+        dependenciesimpl.descriptor_changed(session, function)
+    else:
+        dependenciesimpl.descriptor_changed(session, function, old_uid)
+        if old_uid != new_uid:
+            for service in refs:
+                dependenciesimpl.descriptor_changed(session, service)
     return function.as_dict()
 
 
@@ -227,21 +246,21 @@ def replace_function_refs(refs, vendor, name, version, new_vendor, new_name, new
     """
     for service in refs:
         service_desc = json.loads(service.descriptor)
-        for ref in service_desc['network_functions']:
-            if ref['vnf_vendor'] == vendor \
-                    and ref['vnf_name'] == name \
-                    and ref['vnf_version'] == version:
+        # the service may reference the function in only one of the lists
+        for ref in service_desc.get('network_functions') or []:
+            if ref.get('vnf_vendor') == vendor \
+                    and ref.get('vnf_name') == name \
+                    and ref.get('vnf_version') == version:
                 ref['vnf_vendor'] = new_vendor
                 ref['vnf_name'] = new_name
                 ref['vnf_version'] = new_version
-        if 'vnf_dependencies' in service_desc:
-            for ref in service_desc['vnf_dependencies']:
-                if ref['vendor'] == vendor \
-                        and ref['name'] == name \
-                        and ref['version'] == version:
-                    ref['vendor'] = new_vendor
-                    ref['name'] = new_name
-                    ref['version'] = new_version
+        for ref in service_desc.get('vnf_dependencies') or []:
+            if ref.get('vendor') == vendor \
+                    and ref.get('name') == name \
+                    and ref.get('version') == version:
+                ref['vendor'] = new_vendor
+                ref['name'] = new_name
+                ref['version'] = new_version
         service.descriptor = json.dumps(service_desc)
 
 
@@ -258,6 +277,7 @@ def delete_function(ws_id: int, project_id: int, function_id: int) -> dict:
     function = session.query(Function). \
         join(Project). \
         join(Workspace). \
+        options(WITH_PROJECT). \
         filter(Workspace.id == ws_id). \
         filter(Project.id == project_id). \
         filter(Function.id == function_id).first()
@@ -288,6 +308,7 @@ def delete_function(ws_id: int, project_id: int, function_id: int) -> dict:
         logger.exception("Could not delete function:")
         raise
     session.commit()
+    dependenciesimpl.descriptor_removed(session, function)
     return function.as_dict()
 
 
@@ -299,23 +320,14 @@ def get_references(function, session):
     :param session: The database session
     :return: A list of services referencing the given function.
     """
-    references = []
-    # fuzzy search to get all services that have all strings
-    maybe_references = session.query(Service). \
-        filter(Service.project == function.project). \
-        filter(Service.descriptor.like("%" + function.name + "%")). \
-        filter(Service.descriptor.like("%" + function.vendor + "%")). \
-        filter(Service.descriptor.like("%" + function.version + "%")).all()
-    # check that strings are really a reference to this function
-    for service in maybe_references:
-        descriptor = json.loads(service.descriptor)
-        if "network_functions" in descriptor:
-            for ref in descriptor["network_functions"]:
-                if ref['vnf_name'] == function.name \
-                        and ref['vnf_vendor'] == function.vendor \
-                        and ref['vnf_version'] == function.version:
-                    references.append(service)
-    return references
+    return session.query(Service). \
+        join(DescriptorReference, Service.references). \
+        filter(Service.project_id == function.project_id). \
+        filter(DescriptorReference.kind == 'function'). \
+        filter(DescriptorReference.vendor == function.vendor). \
+        filter(DescriptorReference.name == function.name). \
+        filter(DescriptorReference.version == function.version). \
+        distinct().all()
 
 
 def validate_vnf(schema_index: int, descriptor: dict) -> None:
@@ -327,9 +339,9 @@ def validate_vnf(schema_index: int, descriptor: dict) -> None:
     :return: Nothing if descriptor id valid
     :raises InvalidArgument: if the schema is not Valid
     """
-    schema = get_schema(schema_index, SCHEMA_ID_VNF)
+    validator = get_validator(schema_index, SCHEMA_ID_VNF)
     try:
-        jsonschema.validate(descriptor, schema)
+        validator.validate(descriptor)
     except ValidationError as ve:
         raise InvalidArgument("Validation failed: <br/> Path: {} <br/> Error: {}".format(list(ve.path), ve.message))
 
@@ -352,6 +364,7 @@ def save_image_file(ws_id, project_id, function_id, file):
         function = session.query(Function). \
             join(Project). \
             join(Workspace). \
+            options(WITH_PROJECT). \
             filter(Workspace.id == ws_id). \
             filter(Project.id == project_id). \
             filter(Function.id == function_id).first()
@@ -377,6 +390,7 @@ def get_image_files(ws_id, project_id, function_id):
     function = session.query(Function). \
         join(Project). \
         join(Workspace). \
+        options(WITH_PROJECT). \
         filter(Workspace.id == ws_id). \
         filter(Project.id == project_id). \
         filter(Function.id == function_id).first()
@@ -408,6 +422,7 @@ def delete_image_file(ws_id, project_id, vnf_id, filename):
     function = session.query(Function). \
         join(Project). \
         join(Workspace). \
+        options(WITH_PROJECT). \
         filter(Workspace.id == ws_id). \
         filter(Project.id == project_id). \
         filter(Function.id == vnf_id).first()
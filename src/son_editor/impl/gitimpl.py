@@ -6,15 +6,17 @@ import time
 from subprocess import Popen, PIPE
 from urllib import parse
 
-import requests
 from flask import session
 
 from son_editor.app.database import db_session, scan_project_dir, sync_project_descriptor
 from son_editor.app.exceptions import NotFound, InvalidArgument, NameConflict
+from son_editor.app.securityservice import invalidate_access
 from son_editor.impl import usermanagement
 from son_editor.models.project import Project
 from son_editor.models.workspace import Workspace
+from son_editor.util import httputil
 from son_editor.util.constants import PROJECT_REL_PATH, Github, REQUIRED_SON_PROJECT_FILES
+from son_editor.util.metricsutil import time_subprocess
 
 logger = logging.getLogger(__name__)
 
@@ -62,10 +64,11 @@ def git_command(git_args: list, cwd: str = None):
     """
     args = ['git']
     args.extend(git_args)
-    git_process = Popen(args,
-                        stdout=PIPE, stderr=PIPE, cwd=cwd)
+    with time_subprocess('git', git_args[0] if git_args else ''):
+        git_process = Popen(args,
+                            stdout=PIPE, stderr=PIPE, cwd=cwd)
 
-    out, err = git_process.communicate()
+        out, err = git_process.communicate()
     exitcode = git_process.returncode
     return out.decode(), err.decode(), exitcode
 
@@ -184,7 +187,9 @@ def setup_git_user_email(project_full_path: str):
     """
     user = usermanagement.get_user(session['user_data']['login'])
     git_command(['config', 'user.name', user.name], cwd=project_full_path)
-    git_command(['config', 'user.email', user.email], cwd=project_full_path)
+    # the email may be missing if it could not be loaded from Github at login
+    email = user.email or "{}@users.noreply.github.com".format(user.name)
+    git_command(['config', 'user.email', email], cwd=project_full_path)
     git_command(['config', 'push.default', 'simple'], cwd=project_full_path)
 
 
@@ -263,7 +268,7 @@ def create_commit_and_push(ws_id: int, project_id: int, remote_repo_name: str):
 
         repo_data = {'name': remote_repo_name}
 
-        request = requests.post(Github.API_URL + Github.API_CREATE_REPO_REL, json=repo_data,
+        request = httputil.post(Github.API_URL + Github.API_CREATE_REPO_REL, json=repo_data,
                                 headers=create_oauth_header())
 
         # Handle exceptions
@@ -291,7 +296,7 @@ def create_commit_and_push(ws_id: int, project_id: int, remote_repo_name: str):
         return commit_and_push(ws_id, project_id, "Initial commit")
     except Exception:
         # Delete newly created repository if commit and push failed.
-        result = requests.delete(build_github_delete(session['user_data']['login'], remote_repo_name),
+        result = httputil.delete(build_github_delete(session['user_data']['login'], remote_repo_name),
                                  headers=create_oauth_header())
         # Reraise
         raise
@@ -334,7 +339,7 @@ def _do_delete(owner, remote_repo_name):
     :param remote_repo_name: The remote repository name
     :return: The APIs answer
     """
-    return requests.delete(build_github_delete(owner, remote_repo_name), headers=create_oauth_header())
+    return httputil.delete(build_github_delete(owner, remote_repo_name), headers=create_oauth_header())
 
 
 def diff(ws_id: int, pj_id: int):
@@ -423,7 +428,7 @@ def list():
     :param ws_id: The workspace ID
     :return: https://developer.github.com/v3/repos/#response
     """
-    result = requests.get(Github.API_URL + Github.API_LIST_REPOS.format(session['user_data']['login']),
+    result = httputil.get(Github.API_URL + Github.API_LIST_REPOS.format(session['user_data']['login']),
                           headers=create_oauth_header())
     return json.loads(result.text)
 
@@ -486,6 +491,7 @@ def clone(ws_id: int, url: str, name: str = None):
                 dbsession.add(pj)
                 scan_project_dir(project_target_path, pj)
                 dbsession.commit()
+                invalidate_access(ws_id, pj.id)
                 # Check if the project is valid
                 result = create_info_dict(out=out)
                 result["id"] = pj.id
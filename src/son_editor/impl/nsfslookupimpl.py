@@ -1,14 +1,73 @@
+import json
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 
 from son_editor.app.database import db_session
-from son_editor.app.exceptions import NotFound
-from son_editor.impl.catalogue_servicesimpl import get_all_in_catalogue
+from son_editor.app.exceptions import NotFound, InvalidArgument
+from son_editor.impl.catalogue_servicesimpl import get_catalogue_listing, get_cache_config
 from son_editor.impl.cataloguesimpl import get_catalogues
-from son_editor.impl.private_catalogue_impl import query_private_nsfs
+from son_editor.impl.private_catalogue_impl import query_private_nsfs, query_private_nsfs_bulk
+from son_editor.models.descriptor import Descriptor, Function, Service, DescriptorReference
 from son_editor.models.project import Project
 
 logger = logging.getLogger(__name__)
 
+# Threads listing the public catalogues concurrently
+LOOKUP_WORKERS = 8
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+# listing latencies by catalogue url
+_latencies = {}
+_latencies_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """ Returns the lookup thread pool of this process, threads do not survive forking the workers """
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=LOOKUP_WORKERS)
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _record_latency(catalogue_url: str, seconds: float, failed: bool) -> None:
+    with _latencies_lock:
+        stats = _latencies.setdefault(catalogue_url, {'requests': 0, 'failures': 0, 'total_seconds': 0.0,
+                                                      'max_seconds': 0.0, 'last_seconds': 0.0})
+        stats['requests'] += 1
+        stats['failures'] += 1 if failed else 0
+        stats['total_seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+        stats['last_seconds'] = seconds
+
+
+def get_catalogue_latencies() -> dict:
+    """
+    Returns the latencies of the catalogue listings done by the lookups of this process
+
+    :return: The number of requests and failures and the total, maximum and last latency in seconds by catalogue url
+    """
+    with _latencies_lock:
+        return {url: dict(stats) for url, stats in _latencies.items()}
+
+
+def _timed_listing(catalogue_url: str, is_vnf: bool):
+    """ Lists the catalogue, recording the latency. Runs in the lookup threads, so it must not use the database """
+    start = time.monotonic()
+    failed = True
+    try:
+        listing = get_catalogue_listing(catalogue_url, is_vnf)
+        failed = False
+        return listing
+    finally:
+        _record_latency(catalogue_url, time.monotonic() - start, failed)
+
 
 def get_project(project_id):
     """
@@ -75,19 +134,146 @@ def find_by_priority(user_data, ws_id, project_id, vendor, name, version, is_vnf
         return function.as_dict()
 
     # 3. Try to find in public catalogue
-    catalogues = get_catalogues(ws_id)
-    for catalogue in catalogues:
-        try:
-            function_list = get_all_in_catalogue(user_data, ws_id, catalogue['id'], is_vnf)
-        except:
-            continue
-        for func in function_list:
-            if func['vendor'] == vendor and func['name'] == name and func['version'] == version:
-                function = func
-                return function.as_dict()
+    uid = "{}:{}:{}".format(vendor, name, version)
+    found = _search_catalogues(get_catalogues(ws_id), {is_vnf: {uid}})
+    if (is_vnf, uid) in found:
+        return found[(is_vnf, uid)][1]
 
     # If none found, raise exception
-    raise NotFound("VNF" if is_vnf else "NS" + " {}:{}:{} not found".format(vendor, name, version))
+    raise NotFound(("VNF" if is_vnf else "NS") + " {}:{}:{} not found".format(vendor, name, version))
+
+
+def _search_catalogues(catalogues: list, wanted: dict) -> dict:
+    """
+    Searches the public catalogues for descriptors
+
+    All catalogues are listed concurrently and the results are checked in priority order.
+    Catalogues that did not answer within the configured lookup timeout, counted from the
+    start of the search, are skipped, their downloads finish in the background
+
+    :param catalogues: The catalogues ordered by priority
+    :param wanted: The uids to search by is_vnf
+    :return: The (catalogue, catalogue entry) found by (is_vnf, uid)
+    """
+    pending = {is_vnf: set(uids) for is_vnf, uids in wanted.items() if uids}
+    executor = _get_executor()
+    futures = [(catalogue, is_vnf, executor.submit(_timed_listing, catalogue['url'], is_vnf))
+               for catalogue in catalogues for is_vnf in sorted(pending)]
+    deadline = time.monotonic() + get_cache_config().get('lookup-timeout', 10)
+    found = {}
+    try:
+        for catalogue, is_vnf, future in futures:
+            if not any(pending.values()):
+                break
+            if not pending[is_vnf]:
+                continue
+            try:
+                listing = future.result(timeout=max(0, deadline - time.monotonic()))
+            except TimeoutError:
+                logger.warning("Catalogue {} did not answer within the lookup timeout".format(catalogue['url']))
+                continue
+            except:
+                logger.exception("Could not list catalogue {}:".format(catalogue['url']))
+                continue
+            for uid in list(pending[is_vnf]):
+                entry = listing.by_id.get(uid)
+                if entry is not None:
+                    found[(is_vnf, uid)] = (catalogue, entry)
+                    pending[is_vnf].discard(uid)
+    finally:
+        # only listings still queued behind busy lookup threads can be cancelled
+        for _, _, future in futures:
+            future.cancel()
+    return found
+
+
+def _parse_references(references: dict) -> dict:
+    """ Reads the "functions" and "services" lists of vendor / name / version objects into uids by is_vnf """
+    wanted = {True: set(), False: set()}
+    for key, is_vnf in [('functions', True), ('services', False)]:
+        entries = references.get(key) or []
+        if not isinstance(entries, list):
+            raise InvalidArgument("'{}' must be a list".format(key))
+        for entry in entries:
+            try:
+                parts = [entry['vendor'], entry['name'], entry['version']]
+            except (KeyError, TypeError):
+                parts = [None]
+            if None in parts:
+                raise InvalidArgument("Each of '{}' needs a vendor, name and version".format(key))
+            wanted[is_vnf].add("{}:{}:{}".format(*parts))
+    return wanted
+
+
+def resolve_references(ws_id: int, project_id: int, references: dict) -> dict:
+    """
+    Resolves many functions and services at once by descending priority
+     1. project
+     2. private catalogue
+     3. public catalogues.
+
+    Instead of looking up every descriptor on its own, the project and the private catalogue
+    are queried once for all of them and the public catalogues are swept once
+
+    :param ws_id: The Workspace ID
+    :param project_id: The project ID
+    :param references: Either "functions" and "services" lists of vendor / name / version objects
+                       or the "service_id" of a project service whose references are resolved
+    :return: The "functions" and "services" by uid, each with its source and descriptor
+             or None if it was not found
+    """
+    if not isinstance(references, dict):
+        raise InvalidArgument("The references must be an object")
+    session = db_session()
+    project = session.query(Project).filter(Project.id == project_id). \
+        filter(Project.workspace_id == ws_id).first()
+    if project is None:
+        raise NotFound("Project {} does not exist".format(project_id))
+    if references.get('service_id') is not None:
+        service = session.query(Service).filter(Service.id == references['service_id']). \
+            filter(Service.project_id == project_id).first()
+        if service is None:
+            raise NotFound("Service with id '{}' not found".format(references['service_id']))
+        wanted = {True: set(), False: set()}
+        rows = session.query(DescriptorReference.kind, DescriptorReference.vendor,
+                             DescriptorReference.name, DescriptorReference.version). \
+            filter(DescriptorReference.service_id == service.id). \
+            filter(DescriptorReference.vendor.isnot(None)). \
+            filter(DescriptorReference.name.isnot(None)). \
+            filter(DescriptorReference.version.isnot(None))
+        for kind, vendor, name, version in rows:
+            wanted[kind == 'function'].add("{}:{}:{}".format(vendor, name, version))
+    else:
+        wanted = _parse_references(references)
+    uids = wanted[True] | wanted[False]
+    result = {True: {uid: None for uid in wanted[True]}, False: {uid: None for uid in wanted[False]}}
+
+    def resolved(is_vnf, uid, source, descriptor_id, descriptor):
+        if uid in result[is_vnf] and result[is_vnf][uid] is None:
+            result[is_vnf][uid] = {'source': source, 'id': descriptor_id, 'descriptor': descriptor}
+
+    if uids:
+        # 1. project, the outer join tells functions from services
+        rows = session.query(Descriptor.id, Descriptor.uid, Descriptor.descriptor, Function.__table__.c.id). \
+            outerjoin(Function.__table__, Function.__table__.c.id == Descriptor.id). \
+            filter(Descriptor.project_id == project_id). \
+            filter(Descriptor.uid.in_(uids))
+        for descriptor_id, uid, descriptor, function_id in rows:
+            resolved(function_id is not None, uid, 'project', descriptor_id, json.loads(descriptor))
+
+        # 2. private catalogue
+        triples = [tuple(uid.split(':', 2)) for uid in uids]
+        for (is_vnf, uid), private in query_private_nsfs_bulk(ws_id, triples).items():
+            resolved(is_vnf, uid, 'private', private['id'], private['descriptor'])
+
+        # 3. public catalogues
+        missing = {is_vnf: {uid for uid, entry in entries.items() if entry is None}
+                   for is_vnf, entries in result.items()}
+        for (is_vnf, uid), (catalogue, entry) in _search_catalogues(get_catalogues(ws_id), missing).items():
+            result[is_vnf][uid] = {'source': 'catalogue', 'catalogue_id': catalogue['id'],
+                                   'id': entry['id'], 'descriptor': entry['descriptor']}
+    session.commit()
+    return {'functions': result[True], 'services': result[False]}
 
 
 def find_network_service(user_data, ws_id, project_id, vendor, name, version):
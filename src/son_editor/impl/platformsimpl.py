@@ -31,8 +31,9 @@ def get_platforms(workspace_id: int) -> list:
     """
     session = db_session()
     platforms = session.query(Platform).filter(Platform.workspace_id == workspace_id).all()
+    result = [model.as_dict() for model in platforms]
     session.commit()
-    return list(map(lambda x: x.as_dict(), platforms))
+    return result
 
 
 def create_platform(workspace_id: int, platform_data) -> dict:
@@ -1,10 +1,11 @@
 import json
 
+from sqlalchemy import and_, or_
+
 from son_editor.app.database import db_session
 from son_editor.app.exceptions import InvalidArgument
 from son_editor.models.private_descriptor import PrivateDescriptor
 from son_editor.models.private_descriptor import PrivateService, PrivateFunction
-from son_editor.impl.usermanagement import get_user
 from son_editor.models.workspace import Workspace
 from son_editor.util.descriptorutil import write_private_descriptor
 
@@ -23,24 +24,19 @@ def publish_private_nsfs(ws_id: int, descriptor: dict, is_vnf: bool):
     except KeyError as ke:
         raise InvalidArgument("Missing key {} in descriptor data".format(str(ke)))
 
+    session = db_session()
     try:
-        session = db_session
         # create or update descriptor in database
         model = query_private_nsfs(ws_id, vendor, name, version, is_vnf)  # type: PrivateDescriptor
         if model is None:
-            if is_vnf:
-                model = PrivateFunction()
-            else:
-                model = PrivateService()
-
-            model.__init__(ws_id, vendor, name, version)
+            model_class = PrivateFunction if is_vnf else PrivateService
+            model = model_class(ws_id=ws_id, vendor=vendor, name=name, version=version)
             session.add(model)
         model.descriptor = json.dumps(descriptor)
         workspace = session.query(Workspace).filter(Workspace.id == ws_id).first()
         if workspace is not None:
             write_private_descriptor(workspace.path, is_vnf, descriptor)
             session.commit()
-            return
     except:
         session.rollback()
         raise
@@ -58,23 +54,55 @@ def query_private_nsfs(ws_id, vendor, name, version, is_vnf):
     :return: The requested descriptor if found, None if nothing found
     """
     session = db_session()
-    if is_vnf:
-        descriptor = session.query(PrivateFunction).filter(PrivateFunction.name == name and
-                                                           PrivateFunction.vendor == vendor and
-                                                           PrivateFunction.version == version and
-                                                           PrivateFunction.workspace.id == ws_id and
-                                                           PrivateFunction.workspace.owner == get_user(
-                                                               session['user_data'])).first()
-    else:
-        descriptor = session.query(PrivateService).filter(
-            PrivateService.name == name and
-            PrivateService.vendor == vendor and
-            PrivateService.version == version and
-            PrivateFunction.workspace.id == ws_id and
-            PrivateFunction.workspace.owner == get_user(session['user_data'])).first()
+    model = PrivateFunction if is_vnf else PrivateService
+    # the filter columns match the ix_private_descriptor_lookup index
+    descriptor = session.query(model). \
+        filter(model.ws_id == ws_id). \
+        filter(model.vendor == vendor). \
+        filter(model.name == name). \
+        filter(model.version == version).first()
     return descriptor
 
 
+# Triples per OR clause of the bulk lookup, keeps the statement below the SQLite expression depth limit
+BULK_CHUNK_SIZE = 200
+
+
+def query_private_nsfs_bulk(ws_id: int, triples, is_vnf: bool = None) -> dict:
+    """
+    Finds many functions and services in the private catalogue at once
+
+    Every triple is matched through the ix_private_descriptor_lookup index
+
+    :param ws_id: The workspace ID
+    :param triples: The (vendor, name, version) tuples to find
+    :param is_vnf: Only find functions if True, only services if False, both if None
+    :return: The found descriptors in the format of as_dict by (is_vnf, uid)
+    """
+    session = db_session()
+    triples = list(set(triples))
+    function_id = PrivateFunction.__table__.c.id
+    found = {}
+    for start in range(0, len(triples), BULK_CHUNK_SIZE):
+        chunk = triples[start:start + BULK_CHUNK_SIZE]
+        # the outer join tells functions from services
+        query = session.query(PrivateDescriptor.id, PrivateDescriptor.vendor, PrivateDescriptor.name,
+                              PrivateDescriptor.version, PrivateDescriptor.descriptor, function_id). \
+            outerjoin(PrivateFunction.__table__, function_id == PrivateDescriptor.id). \
+            filter(PrivateDescriptor.ws_id == ws_id). \
+            filter(or_(*[and_(PrivateDescriptor.vendor == vendor,
+                              PrivateDescriptor.name == name,
+                              PrivateDescriptor.version == version) for vendor, name, version in chunk]))
+        if is_vnf is not None:
+            query = query.filter(function_id.isnot(None) if is_vnf else function_id.is_(None))
+        for descriptor_id, vendor, name, version, descriptor, vnf_id in query:
+            uid = "{}:{}:{}".format(vendor, name, version)
+            found[(vnf_id is not None, uid)] = {'id': descriptor_id, 'name': name, 'vendor': vendor,
+                                                'version': version, 'uid': uid,
+                                                'descriptor': json.loads(descriptor)}
+    return found
+
+
 def get_private_nsfs_list(ws_id, is_vnf):
     """
     Get a list of all private services or functions
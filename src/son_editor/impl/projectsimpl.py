@@ -8,12 +8,17 @@ import shlex
 import shutil
 from subprocess import Popen, PIPE
 
+from sqlalchemy.orm import joinedload, subqueryload
+
 from son_editor.app.database import db_session, scan_project_dir
 from son_editor.app.exceptions import NotFound, NameConflict
-from son_editor.impl import gitimpl
+from son_editor.app.securityservice import invalidate_access
+from son_editor.impl import gitimpl, dependenciesimpl
+from son_editor.models.descriptor import Service
 from son_editor.models.project import Project
 from son_editor.models.workspace import Workspace
 from son_editor.util.descriptorutil import sync_project_descriptor
+from son_editor.util.metricsutil import time_subprocess
 from son_editor.util.requestutil import get_config, rreplace
 
 WORKSPACES_DIR = os.path.expanduser(get_config()["workspaces-location"])
@@ -32,8 +37,9 @@ def get_projects(ws_id: int) -> list:
     projects = session.query(Project). \
         join(Workspace). \
         filter(Workspace.id == ws_id).all()
+    result = [model.as_dict() for model in projects]
     session.commit()
-    return list(map(lambda x: x.as_dict(), projects))
+    return result
 
 
 def get_project(ws_id, pj_id):
@@ -49,9 +55,10 @@ def get_project(ws_id, pj_id):
         filter(Workspace.id == ws_id). \
         filter(Project.id == pj_id). \
         first()
+    result = project.as_dict() if project else None
     session.commit()
-    if project:
-        return project.as_dict()
+    if result:
+        return result
     else:
         raise NotFound("No project with id {} could be found".format(pj_id))
 
@@ -97,11 +104,12 @@ def create_project(ws_id: int, project_data: dict) -> dict:
         session.rollback()
         raise
     # create workspace on disk
-    proc = Popen(['son-workspace',
-                  '--workspace', workspace.path,
-                  '--project', get_project_path(workspace.path, project_name)],
-                 stdout=PIPE, stderr=PIPE)
-    out, err = proc.communicate()
+    with time_subprocess('son-workspace', 'project'):
+        proc = Popen(['son-workspace',
+                      '--workspace', workspace.path,
+                      '--project', get_project_path(workspace.path, project_name)],
+                     stdout=PIPE, stderr=PIPE)
+        out, err = proc.communicate()
     exitcode = proc.returncode
 
     if err.decode().find('exists') >= 0:
@@ -112,6 +120,7 @@ def create_project(ws_id: int, project_data: dict) -> dict:
     if exitcode == 0 and not project_exists:
         sync_project_descriptor(project)
         session.commit()
+        invalidate_access(workspace.id, project.id)
         scan_project_dir(get_project_path(workspace.path, project_name), project)
         return project.as_dict()
     else:
@@ -130,7 +139,8 @@ def update_project(project_data, project_id):
     :return: The updated project descriptor
     """
     session = db_session()
-    project = session.query(Project).filter(Project.id == project_id).first()
+    project = session.query(Project).options(joinedload(Project.workspace)). \
+        filter(Project.id == project_id).first()
     if project is None:
         raise NotFound("Project with id {} could not be found".format(project_id))
 
@@ -194,7 +204,12 @@ def delete_project(project_id: int) -> dict:
     :return: The deleted project descriptor
     """
     session = db_session()
-    project = session.query(Project).filter(Project.id == int(project_id)).first()
+    # the delete cascades to the functions, services and their references, load them all at once
+    project = session.query(Project). \
+        options(joinedload(Project.workspace),
+                subqueryload(Project.functions),
+                subqueryload(Project.services).subqueryload(Service.references)). \
+        filter(Project.id == int(project_id)).first()
     if project:
         path = get_project_path(project.workspace.path, project.rel_path)
 
@@ -202,6 +217,8 @@ def delete_project(project_id: int) -> dict:
         session.delete(project)
     db_session.commit()
     if project:
+        invalidate_access(project.workspace_id, project.id)
+        dependenciesimpl.project_removed(project.id)
         return project.as_dict()
     else:
         raise NotFound("Project with id {} was not found".format(project_id))
@@ -4,33 +4,41 @@ import os
 import shlex
 import shutil
 
-import jsonschema
 from jsonschema import ValidationError
+from sqlalchemy.orm import joinedload
 
 from son_editor.app.database import db_session
 from son_editor.app.exceptions import NotFound, NameConflict, InvalidArgument, StillReferenced
-from son_editor.models.descriptor import Service
+from son_editor.impl import dependenciesimpl
+from son_editor.models.descriptor import Service, DescriptorReference
 from son_editor.models.project import Project
 from son_editor.models.workspace import Workspace
-from son_editor.util.descriptorutil import write_ns_vnf_to_disk, get_file_path, get_schema, SCHEMA_ID_NS
+from son_editor.util.descriptorutil import write_ns_vnf_to_disk, get_file_path, get_validator, list_descriptors, \
+    SCHEMA_ID_NS
 
 logger = logging.getLogger(__name__)
 
 
-def get_services(ws_id: int, project_id: int) -> list:
+def get_services(ws_id: int, project_id: int, fields: list = None, limit: int = None, cursor: int = None) -> tuple:
     """
     Get a list of all services in this Project
 
     :param ws_id: The workspace ID
     :param project_id: The project ID
-    :return: A list of service descriptors as dicts
+    :param fields: The fields to list, by default id, uid, descriptor and meta
+    :param limit: The maximum number of services to return, all if None
+    :param cursor: The cursor returned with the previous page
+    :return: The services as JSON array and the cursor of the next page
     """
     session = db_session()
     project = session.query(Project).filter_by(id=project_id).first()
-    session.commit()
     if project:
-        return list(map(lambda x: x.as_dict(), project.services))
+        result = list_descriptors(session, Service, ws_id, project_id,
+                                  fields or ['id', 'uid', 'descriptor', 'meta'], limit, cursor)
+        session.commit()
+        return result
     else:
+        session.commit()
         raise NotFound("No project matching id {}".format(project_id))
 
 
@@ -44,7 +52,7 @@ def create_service(ws_id: int, project_id: int, service_data: dict) -> dict:
     :return: The created service descriptor
     """
     session = db_session()
-    project = session.query(Project).filter_by(id=project_id).first()
+    project = session.query(Project).options(joinedload(Project.workspace)).filter_by(id=project_id).first()
 
     if project:
         # Retrieve post parameters
@@ -85,6 +93,7 @@ def create_service(ws_id: int, project_id: int, service_data: dict) -> dict:
             session.rollback()
             raise
         session.commit()
+        dependenciesimpl.descriptor_changed(session, service)
         return service.as_dict()
 
     else:
@@ -106,6 +115,7 @@ def update_service(ws_id, project_id, service_id, service_data):
     """
     session = db_session()
     project = session.query(Project). \
+        options(joinedload(Project.workspace)). \
         filter(Project.id == project_id).first()
     service = session.query(Service). \
         join(Project). \
@@ -119,8 +129,8 @@ def update_service(ws_id, project_id, service_id, service_data):
         old_uid = get_uid(service.vendor, service.name, service.version)
         # Parse parameters and update record
         if 'descriptor' in service_data:
-            # validate service descriptor
-            workspace = session.query(Workspace).filter(Workspace.id == ws_id).first()
+            # validate service descriptor, the service query made sure the project is in this workspace
+            workspace = project.workspace
             validate_service_descriptor(workspace.schema_index, service_data["descriptor"])
             try:
                 newName = shlex.quote(service_data["descriptor"]["name"])
@@ -157,6 +167,8 @@ def update_service(ws_id, project_id, service_id, service_data):
 
         write_ns_vnf_to_disk("nsd", service)
         session.commit()
+        # a referenced service is kept under its old uid
+        dependenciesimpl.descriptor_changed(session, service, None if refs else old_uid)
         return service.as_dict()
     else:
         raise NotFound("Could not update service '{}', because no record was found".format(service_id))
@@ -196,7 +208,8 @@ def delete_service(project_id: int, service_id: int) -> dict:
     :return: The descriptor of the deleted service
     """
     session = db_session()
-    project = session.query(Project).filter(Project.id == project_id).first()
+    project = session.query(Project).options(joinedload(Project.workspace)). \
+        filter(Project.id == project_id).first()
 
     if project is None:
         raise NotFound("Could not delete service: project with id {} not found".format(service_id))
@@ -221,6 +234,7 @@ def delete_service(project_id: int, service_id: int) -> dict:
         logger.exception("Could not delete service:")
         raise
     session.commit()
+    dependenciesimpl.descriptor_removed(session, service)
     return service.as_dict()
 
 
@@ -232,24 +246,15 @@ def get_references(service, session):
     :param session:  the db_session
     :return: a list of services referencing the given service
     """
-    references = []
-    # fuzzy search to get all services that have all strings
-    maybe_references = session.query(Service). \
-        filter(Service.project == service.project). \
+    return session.query(Service). \
+        join(DescriptorReference, Service.references). \
+        filter(Service.project_id == service.project_id). \
         filter(Service.id != service.id). \
-        filter(Service.descriptor.like("%" + service.name + "%")). \
-        filter(Service.descriptor.like("%" + service.vendor + "%")). \
-        filter(Service.descriptor.like("%" + service.version + "%")).all()
-    # check that strings are really a reference to this function
-    for ref_service in maybe_references:
-        descriptor = json.loads(ref_service.descriptor)
-        if "network_services" in descriptor:
-            for ref in descriptor["network_services"]:
-                if ref['ns_name'] == service.name \
-                        and ref['ns_vendor'] == service.vendor \
-                        and ref['ns_version'] == service.version:
-                    references.append(service)
-    return references
+        filter(DescriptorReference.kind == 'service'). \
+        filter(DescriptorReference.vendor == service.vendor). \
+        filter(DescriptorReference.name == service.name). \
+        filter(DescriptorReference.version == service.version). \
+        distinct().all()
 
 
 def get_service(ws_id, parent_id, service_id):
@@ -278,8 +283,8 @@ def validate_service_descriptor(schema_index: int, descriptor: dict) -> None:
     :param descriptor: the service descriptor
     :raises: InvalidArgument: if the validation fails
     """
-    schema = get_schema(schema_index, SCHEMA_ID_NS)
+    validator = get_validator(schema_index, SCHEMA_ID_NS)
     try:
-        jsonschema.validate(descriptor, schema)
+        validator.validate(descriptor)
     except ValidationError as ve:
         raise InvalidArgument("Validation failed: <br/> Path: {} <br/> Error: {}".format(list(ve.path), ve.message))
@@ -4,24 +4,32 @@ Created on 05.08.2016
 @author: Jonas
 '''
 import json
+import logging
 import shlex
+import time
 
-import flask
 import requests
 
 from son_editor.app.database import db_session
 from son_editor.app.exceptions import UnauthorizedException
 from son_editor.models.user import User
+from son_editor.util import httputil
+from son_editor.util.cacheutil import TTLCache
 from son_editor.util.requestutil import get_config
 
+logger = logging.getLogger(__name__)
+
+# Attempts to load the user's email before giving up
+EMAIL_ATTEMPTS = 3
+# logins whose email could not be loaded, so the next logins do not wait for GitHub again
+email_failures = TTLCache(600)
+
 
 def get_user(login: str):
     """
     Gets the user from the Database if it exists or
-    creates a new user in the Database using the
-    login data from the session. If the database does
-    not yet have the full user Data it is queried
-    from Github using the access Token
+    creates a new user in the Database. The email of the user
+    is loaded from Github at login by load_user_email
 
     :return: The database user model
     """
@@ -30,30 +38,71 @@ def get_user(login: str):
     user_name = shlex.quote(login)
 
     user = session.query(User).filter(User.name == user_name).first()
+    if user is None or user.email is None:
+        _check_authorized(user_name)
     # for now: if user does not exist we will create a user
     # (that has no access to anything he has not created)
     if user is None:
         user = User(name=user_name)
         session.add(user)
-    if user.email is None:
-
-        if 'users' in get_config()['authentication']:
-            # check if user is in list of authorized users
-            if user_name not in get_config()['authentication']['users']:
-                raise UnauthorizedException(
-                    user_name + " was not found in the list of valid users,"
-                                "Please ask the admin of this server to add "
-                                "you to the list of valid users")
-
-        headers = {"Accept": "application/json",
-                   "Authorization": "token " + flask.session['access_token']}
-        result = requests.get('https://api.github.com/user/emails', headers=headers)
-        user_emails = json.loads(result.text)
-
-        for email in user_emails:
-            if email['primary']:
-                user.email = shlex.quote(email['email'])
-                break
-
-    session.commit()
+        session.commit()
+    return user
+
+
+def _check_authorized(user_name: str) -> None:
+    if 'users' in get_config()['authentication']:
+        # check if user is in list of authorized users
+        if user_name not in get_config()['authentication']['users']:
+            raise UnauthorizedException(
+                user_name + " was not found in the list of valid users,"
+                            "Please ask the admin of this server to add "
+                            "you to the list of valid users")
+
+
+def load_user_email(user_data: dict, access_token: str):
+    """
+    Stores the primary email of the user if it is not known yet
+
+    Uses the public email of the Github profile if there is one and asks
+    the Github emails API otherwise. Failures are retried a few times and then
+    remembered for a while, so they do not slow down every login
+
+    :param user_data: The Github profile of the user
+    :param access_token: The Github access token of the user
+    :return: The database user model
+    """
+    user = get_user(user_data['login'])
+    if user.email is not None or email_failures.get(user.name):
+        return user
+    email = user_data.get('email')
+    if not email:
+        email = _request_primary_email(access_token)
+    if email:
+        user.email = shlex.quote(email)
+        db_session().commit()
+    else:
+        email_failures.set(user.name, True)
     return user
+
+
+def _request_primary_email(access_token: str):
+    """ Requests the primary email from the Github emails API, None if it cannot be loaded """
+    headers = {"Accept": "application/json",
+               "Authorization": "token " + access_token}
+    for attempt in range(EMAIL_ATTEMPTS):
+        if attempt > 0:
+            time.sleep(0.5 * 2 ** attempt)
+        try:
+            result = httputil.get('https://api.github.com/user/emails', headers=headers)
+        except requests.RequestException as err:
+            logger.warning("Could not load user emails from Github: {}".format(err))
+            continue
+        if result.status_code >= 500:
+            logger.warning("Could not load user emails from Github: status {}".format(result.status_code))
+            continue
+        if result.status_code == 200:
+            for email in json.loads(result.text):
+                if email['primary']:
+                    return email['email']
+        return None
+    return None
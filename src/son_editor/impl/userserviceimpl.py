@@ -1,11 +1,12 @@
 import json
 import logging
 
-import requests
 from flask import request, redirect
 from flask import session
 
 from son_editor.app.exceptions import UnauthorizedException
+from son_editor.impl.usermanagement import load_user_email
+from son_editor.util import httputil
 from son_editor.util.requestutil import get_config
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,7 @@ def login():
     """ Login the User with a referral code from the github oauth process"""
     session['session_code'] = request.args.get('code')
     if _request_access_token() and _load_user_data():
+        load_user_email(session['user_data'], session['access_token'])
         logger.info("User " + session['user_data']['login'] + " logged in")
         if request.referrer is not None and 'github' not in request.referrer:
             origin = origin_from_referrer(request.referrer)
@@ -29,7 +31,7 @@ def _request_access_token():
             'client_secret': get_config()['authentication']['ClientSecret'],
             'code': session['session_code']}
     headers = {"Accept": "application/json"}
-    access_result = requests.post('https://github.com/login/oauth/access_token',
+    access_result = httputil.post('https://github.com/login/oauth/access_token',
                                   json=data, headers=headers)
     json_result = json.loads(access_result.text)
     if 'access_token' in json_result:
@@ -44,7 +46,7 @@ def _load_user_data():
     if 'access_token' in session:
         headers = {"Accept": "application/json",
                    "Authorization": "token " + session['access_token']}
-        user_data_result = requests.get('https://api.github.com/user', headers=headers)
+        user_data_result = httputil.get('https://api.github.com/user', headers=headers)
         user_data = json.loads(user_data_result.text)
         session['user_data'] = user_data
         logger.debug("user_data: %s" % user_data)
@@ -11,15 +11,19 @@ import stat
 from os import path
 from subprocess import Popen, PIPE
 
-import requests
 from requests.exceptions import ConnectionError
+from sqlalchemy.orm import subqueryload
 
 from son_editor.app.database import db_session
 from son_editor.app.exceptions import NameConflict, NotFound, InvalidArgument, ExtNotReachable
+from son_editor.app.securityservice import invalidate_access
+from son_editor.impl import dependenciesimpl
 from son_editor.impl.usermanagement import get_user
 from son_editor.models.repository import Platform, Catalogue
 from son_editor.models.workspace import Workspace
+from son_editor.util import httputil
 from son_editor.util.descriptorutil import update_workspace_descriptor
+from son_editor.util.metricsutil import time_subprocess
 from son_editor.util.requestutil import get_config, rreplace
 
 WORKSPACES_DIR = path.expanduser(get_config()["workspaces-location"])
@@ -37,10 +41,14 @@ def get_workspaces(login: str) -> list:
     """
     session = db_session()
     user = get_user(login)
+    # as_dict lists the catalogues and platforms, load them for all workspaces at once
     workspaces = session.query(Workspace). \
+        options(subqueryload(Workspace.catalogues), subqueryload(Workspace.platforms)). \
         filter(Workspace.owner == user).all()
+    # serialized before the commit expires the loaded rows
+    result = [model.as_dict() for model in workspaces]
     session.commit()
-    return list(map(lambda x: x.as_dict(), workspaces))
+    return result
 
 
 def get_workspace(ws_id: int) -> dict:
@@ -53,9 +61,10 @@ def get_workspace(ws_id: int) -> dict:
     session = db_session()
     workspace = session.query(Workspace). \
         filter(Workspace.id == ws_id).first()
+    result = workspace.as_dict() if workspace is not None else None
     session.commit()
-    if workspace is not None:
-        return workspace.as_dict()
+    if result is not None:
+        return result
     else:
         raise NotFound("No workspace with id " + ws_id + " exists")
 
@@ -107,9 +116,10 @@ def create_workspace(login: str, workspace_data: dict) -> dict:
         session.rollback()
         raise
     # create workspace on disk
-    proc = Popen(['son-workspace', '--init', '--workspace', wsPath], stdout=PIPE, stderr=PIPE)
+    with time_subprocess('son-workspace', 'init'):
+        proc = Popen(['son-workspace', '--init', '--workspace', wsPath], stdout=PIPE, stderr=PIPE)
 
-    out, err = proc.communicate()
+        out, err = proc.communicate()
     exitcode = proc.returncode
 
     if out.decode().find('existing') >= 0:
@@ -120,6 +130,7 @@ def create_workspace(login: str, workspace_data: dict) -> dict:
     if exitcode == 0 and not workspace_exists:
         update_workspace_descriptor(ws)
         session.commit()
+        invalidate_access(ws.id)
         return ws.as_dict()
     else:
         session.rollback()
@@ -239,11 +250,15 @@ def delete_workspace(wsid):
     session = db_session()
     workspace = session.query(Workspace).filter(Workspace.id == int(wsid)).first()
     if workspace:
+        project_ids = [project.id for project in workspace.projects]
         path = workspace.path
         shutil.rmtree(path, onerror=on_rm_error)
         session.delete(workspace)
     db_session.commit()
     if workspace:
+        invalidate_access(workspace.id)
+        for project_id in project_ids:
+            dependenciesimpl.project_removed(project_id)
         return workspace.as_dict()
     else:
         raise NotFound("Workspace with id {} was not found".format(wsid))
@@ -268,7 +283,7 @@ def test_url(name, url):
     :raises ExtNotReachable: if the external server could not be contacted 
     """
     try:
-        response = requests.get(url)
+        response = httputil.get(url)
         if response.status_code != 200:
             raise ExtNotReachable("Could not reach server {} at url '{}':{}".format(url, name, response.text))
     except ConnectionError as e:
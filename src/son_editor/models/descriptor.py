@@ -1,10 +1,11 @@
 import json
 from json import JSONEncoder
 from sqlalchemy import Column, Integer, String, ForeignKey, Text
-from sqlalchemy import UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Index, event
+from sqlalchemy.orm import relationship, validates, Session
 
 from son_editor.app.database import Base
+from son_editor.models.project import Project
 
 
 class Descriptor(Base):
@@ -23,7 +24,10 @@ class Descriptor(Base):
     project_id = Column(Integer, ForeignKey('project.id'))
     descriptor = Column(Text())
 
-    UniqueConstraint('project_id', 'uid', name='uix_1')
+    # functions and services share the table, so the uid is only unique per kind
+    # and the lookup indexes cannot be unique
+    __table_args__ = (Index('ix_descriptor_project_uid', 'project_id', 'uid'),
+                      Index('ix_descriptor_lookup', 'project_id', 'vendor', 'name', 'version'))
 
     def __init__(self, name=None, version=None, vendor=None, descriptor=None):
         self.name = name
@@ -40,6 +44,20 @@ class Descriptor(Base):
         return {'id': self.id, 'uid': self.uid,
                 'descriptor': json.loads(self.descriptor)}
 
+    def as_json(self) -> str:
+        """ Serializes the same data as as_dict, splicing in the stored descriptor text without parsing it """
+        return '{{"id": {}, "uid": {}, "descriptor": {}}}'.format(json.dumps(self.id), json.dumps(self.uid),
+                                                                 self.descriptor or 'null')
+
+    @validates('descriptor')
+    def _validate_descriptor(self, key, descriptor):
+        self.descriptor_changed(descriptor)
+        return descriptor
+
+    def descriptor_changed(self, descriptor):
+        """ Called whenever the descriptor text is written, subclasses may derive data from it """
+        pass
+
 
 class Function(Descriptor):
     """The Model for the function Descriptor"""
@@ -69,6 +87,7 @@ class Service(Descriptor):
     id = Column(Integer, ForeignKey('descriptor.id'), primary_key=True)
     project = relationship("Project", back_populates="services")
     meta = Column(Text())
+    references = relationship("DescriptorReference", back_populates="service", cascade="all, delete-orphan")
 
     def __init__(self, name=None, version=None, vendor=None, descriptor=None, project=None, meta="{}"):
         super(Service, self).__init__(name, version, vendor, descriptor)
@@ -84,7 +103,108 @@ class Service(Descriptor):
     def __repr__(self):
         return '<Service {}>'.format(self.uid)
 
+    def descriptor_changed(self, descriptor):
+        """ Keeps the references in sync with the descriptor whenever it is written """
+        try:
+            refs = get_descriptor_references(json.loads(descriptor))
+        except (TypeError, ValueError, AttributeError):
+            refs = set()
+        self.references = [DescriptorReference(kind, vendor, name, version)
+                           for kind, vendor, name, version in refs]
+
     def as_dict(self):
         result = super().as_dict()
         result["meta"] = json.loads(self.meta)
         return result
+
+    def as_json(self) -> str:
+        return super().as_json()[:-1] + ', "meta": {}}}'.format(self.meta or 'null')
+
+
+class DescriptorReference(Base):
+    """
+    A reference of a service descriptor to a function or service by vendor, name and version,
+    taken from its network_functions, vnf_dependencies, network_services and services_dependencies.
+    Allows to look up the services referencing a descriptor without reading the descriptors.
+    """
+
+    __tablename__ = 'descriptor_reference'
+    id = Column(Integer, primary_key=True)
+    service_id = Column(Integer, ForeignKey('service.id'))
+    service = relationship("Service", back_populates="references")
+    kind = Column(String(10))
+    vendor = Column(String(50))
+    name = Column(String(50))
+    version = Column(String(50))
+
+    __table_args__ = (Index('ix_descriptor_reference_target', 'vendor', 'name', 'version'),)
+
+    def __init__(self, kind=None, vendor=None, name=None, version=None):
+        self.kind = kind
+        self.vendor = vendor
+        self.name = name
+        self.version = version
+
+    def __repr__(self):
+        return '<DescriptorReference {} {}:{}:{}>'.format(self.kind, self.vendor, self.name, self.version)
+
+
+def get_descriptor_references(descriptor: dict) -> set:
+    """
+    Collects the references of a service descriptor
+
+    :param descriptor: The service descriptor
+    :return: A set of (kind, vendor, name, version) tuples, kind is either "function" or "service"
+    """
+    refs = set()
+    for ref in descriptor.get('network_functions') or []:
+        refs.add(('function', ref.get('vnf_vendor'), ref.get('vnf_name'), ref.get('vnf_version')))
+    for ref in descriptor.get('vnf_dependencies') or []:
+        refs.add(('function', ref.get('vendor'), ref.get('name'), ref.get('version')))
+    for ref in descriptor.get('network_services') or []:
+        refs.add(('service', ref.get('ns_vendor'), ref.get('ns_name'), ref.get('ns_version')))
+    for ref in descriptor.get('services_dependencies') or []:
+        refs.add(('service', ref.get('vendor'), ref.get('name'), ref.get('version')))
+    return refs
+
+
+def _changed_project_ids(session) -> set:
+    """ Returns the ids of the projects whose descriptors or references are written by the flush """
+    project_ids = set()
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if instance in session.dirty and not session.is_modified(instance):
+            continue
+        if isinstance(instance, DescriptorReference):
+            instance = instance.service
+        if isinstance(instance, Descriptor):
+            project = getattr(instance, 'project', None)
+            project_ids.add(project.id if project is not None else instance.project_id)
+    project_ids.discard(None)
+    return project_ids
+
+
+@event.listens_for(Session, 'before_flush')
+def _bump_descriptor_revision(session, flush_context, instances):
+    """ Increments the descriptor revision of the changed projects once per transaction """
+    bumped = session.info.setdefault('bumped_revisions', set())
+    project_ids = _changed_project_ids(session) - bumped
+    if project_ids:
+        table = Project.__table__
+        session.execute(table.update().where(table.c.id.in_(project_ids)).
+                        values(descriptor_revision=table.c.descriptor_revision + 1))
+        bumped.update(project_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _commit_descriptor_revision(session):
+    session.info['committed_revisions'] = session.info.pop('bumped_revisions', set())
+
+
+@event.listens_for(Session, 'after_rollback')
+def _rollback_descriptor_revision(session):
+    session.info.pop('bumped_revisions', None)
+
+
+def committed_revision_bumps(session) -> set:
+    """ Returns the ids of the projects whose descriptor revision the last commit of the session incremented """
+    return session.info.get('committed_revisions', set())
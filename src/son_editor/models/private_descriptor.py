@@ -1,7 +1,7 @@
 import json
 from json import JSONEncoder
 from sqlalchemy import Column, Integer, String, ForeignKey, Text
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index
 from sqlalchemy.orm import relationship
 
 from son_editor.app.database import Base
@@ -12,16 +12,17 @@ class PrivateDescriptor(Base):
     service and function descriptors in the private catalogue"""
 
     __tablename__ = 'private_descriptor'
-    id = Column(Integer, ForeignKey('base_descriptor.id'), primary_key=True)
-    ws_id = Column(Integer, ForeignKey('workspace.id'))
     id = Column(Integer, primary_key=True)
+    ws_id = Column(Integer, ForeignKey('workspace.id'))
     name = Column(String(50))
     vendor = Column(String(50))
     version = Column(String(50))
     uid = Column(String(150))
     descriptor = Column(Text())
 
-    UniqueConstraint('ws_id', 'uid', name='uix_1')
+    # functions and services share the table and may have the same vendor, name and version,
+    # so neither the uid nor the lookup index can be unique per workspace
+    __table_args__ = (Index('ix_private_descriptor_lookup', 'ws_id', 'vendor', 'name', 'version'),)
 
     def __init__(self, ws_id=None, name=None, version=None, vendor=None, descriptor=None):
         self.name = name
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, ForeignKey, Text
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index
 from sqlalchemy.orm import relationship
 
 from son_editor.app.database import Base
@@ -22,9 +22,11 @@ class Project(Base):
     rel_path = Column(String(255))
     repo_url = Column(Text())
     workspace_id = Column(Integer, ForeignKey('workspace.id'))
+    # incremented by every transaction changing the project's descriptors, see models.descriptor
+    descriptor_revision = Column(Integer, nullable=False, default=0, server_default='0')
     workspace = relationship("Workspace", back_populates="projects")
 
-    UniqueConstraint('workspace_id', 'name', name='uix_1')
+    __table_args__ = (Index('uix_project_workspace_name', 'workspace_id', 'name', unique=True),)
     services = relationship("Service", back_populates="project", cascade="all, delete-orphan")
     functions = relationship("Function", back_populates="project", cascade="all, delete-orphan")
 
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Float
+
+from son_editor.app.database import Base
+
+
+class ScanIndexEntry(Base):
+    """
+    The scan index entry remembers the state of a descriptor file on disk
+    at the time it was last scanned. If modification time, size or content hash
+    have not changed, the file does not need to be parsed again on the next startup.
+    """
+    __tablename__ = 'scan_index'
+    id = Column(Integer, primary_key=True)
+    path = Column(String(1024), unique=True)
+    mtime = Column(Float)
+    size = Column(Integer)
+    digest = Column(String(40))
+
+    def __init__(self, path=None, mtime=None, size=None, digest=None):
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.digest = digest
+
+    def __repr__(self):
+        return '<ScanIndexEntry {}>'.format(self.path)
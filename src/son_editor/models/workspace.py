@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, ForeignKey
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index
 from sqlalchemy.orm import relationship
 
 from son_editor.app.database import Base
@@ -25,7 +25,7 @@ class Workspace(Base):
     owner = relationship("User", back_populates="workspaces")
     schema_index = Column(Integer)
 
-    UniqueConstraint('owner_id', 'name', name='uix_1')
+    __table_args__ = (Index('uix_workspace_owner_name', 'owner_id', 'name', unique=True),)
 
     def __init__(self, name=None, path=None, owner=None, schema_index=0):
         self.name = name
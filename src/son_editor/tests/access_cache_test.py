@@ -0,0 +1,44 @@
+import unittest
+
+from son_editor.app import securityservice
+from son_editor.app.database import scan_workspaces_dir
+from son_editor.models.project import Project
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+
+
+class AccessCacheTest(unittest.TestCase):
+    def setUp(self):
+        # Initializes test context
+        self.app = init_test_context()
+        create_logged_in_user(self.app, "access_user")
+        create_project_dir(create_workspace_dir("access_user", "access_ws"), "access_pj")
+        create_workspace_dir("other_user", "other_ws")
+        db_session().add(User(name="other_user"))
+        db_session().commit()
+        scan_workspaces_dir()
+        project = db_session().query(Project).filter(Project.name == "access_pj").first()
+        self.ws_id = project.workspace_id
+        self.pj_id = project.id
+        self.other_ws_id = db_session().query(Workspace).filter(Workspace.name == "other_ws").first().id
+
+    def get_functions(self, ws_id, pj_id):
+        return self.app.get("/" + constants.WORKSPACES + "/" + str(ws_id) + "/" +
+                            constants.PROJECTS + "/" + str(pj_id) + "/" + constants.VNFS + "/")
+
+    def test_query_access(self):
+        self.assertEqual((True, True), securityservice._query_access("access_user", self.ws_id, self.pj_id))
+        self.assertEqual((True, True), securityservice._query_access("access_user", self.ws_id))
+        self.assertEqual((True, False), securityservice._query_access("access_user", self.ws_id, self.pj_id + 1))
+        self.assertEqual((False, False), securityservice._query_access("access_user", self.other_ws_id, self.pj_id))
+        self.assertEqual((False, True), securityservice._query_access("other_user", self.ws_id))
+
+    def test_access_is_cached(self):
+        self.assertEqual(200, self.get_functions(self.ws_id, self.pj_id).status_code)
+        self.assertEqual((True, True), securityservice.access_cache.get(("access_user", self.ws_id, self.pj_id)))
+        self.assertEqual(404, self.get_functions(self.other_ws_id, self.pj_id).status_code)
+
+    def test_delete_invalidates(self):
+        self.assertEqual(200, self.get_functions(self.ws_id, self.pj_id).status_code)
+        securityservice.invalidate_access(self.ws_id, self.pj_id)
+        self.assertIsNone(securityservice.access_cache.get(("access_user", self.ws_id, self.pj_id)))
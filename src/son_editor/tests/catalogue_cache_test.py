@@ -0,0 +1,196 @@
+import json
+import socketserver
+import threading
+import time
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from son_editor.app.database import scan_workspaces_dir
+from son_editor.app.exceptions import NotFound
+from son_editor.impl import catalogue_servicesimpl, nsfslookupimpl
+from son_editor.models.project import Project
+from son_editor.models.repository import Catalogue
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+from son_editor.util.requestutil import CONFIG
+
+VNF_LIST = json.dumps([{'vendor': 'de.upb', 'name': 'vnf_{}'.format(i), 'version': '0.1'}
+                       for i in range(100)]).encode()
+
+
+class CatalogueHandler(BaseHTTPRequestHandler):
+    """ Serves the VNF list with an ETag and answers conditional requests """
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_GET(self):
+        CatalogueHandler.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(VNF_LIST)))
+        self.end_headers()
+        self.wfile.write(VNF_LIST)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class CatalogueCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.app = init_test_context()
+        self.server = ThreadingServer(('127.0.0.1', 0), CatalogueHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        CatalogueHandler.requests = []
+        self.url = "http://127.0.0.1:{}".format(self.server.server_port)
+        self.cache_config = CONFIG.get('catalogue-cache')
+        CONFIG['catalogue-cache'] = {'ttl': 60, 'stale': 600}
+
+        create_project_dir(create_workspace_dir("cat_user", "cat_ws"), "cat_pj")
+        db_session().add(User(name="cat_user"))
+        db_session().commit()
+        scan_workspaces_dir()
+        project = db_session().query(Project).filter(Project.name == "cat_pj").first()
+        self.ws_id = project.workspace_id
+        self.pj_id = project.id
+        catalogue = Catalogue("test", self.url, True, project.workspace)
+        db_session().add(catalogue)
+        db_session().commit()
+        self.catalogue_id = catalogue.id
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        CONFIG['catalogue-cache'] = self.cache_config
+
+    def test_listing_is_cached(self):
+        self.assertEqual(100, len(catalogue_servicesimpl.get_all_in_catalogue(self.ws_id, self.catalogue_id, True)))
+        self.assertEqual(100, len(catalogue_servicesimpl.get_all_in_catalogue(self.ws_id, self.catalogue_id, True)))
+        self.assertEqual([("/vnfs", None)], CatalogueHandler.requests)
+
+        catalogue_servicesimpl.invalidate_listing(self.url, True)
+        catalogue_servicesimpl.get_all_in_catalogue(self.ws_id, self.catalogue_id, True)
+        self.assertEqual(2, len(CatalogueHandler.requests))
+
+    def test_stale_while_revalidate(self):
+        listing = catalogue_servicesimpl.get_catalogue_listing(self.url, True)
+        listing.fetched -= 120
+        self.assertIs(listing, catalogue_servicesimpl.get_catalogue_listing(self.url, True))
+        for _ in range(50):
+            if not listing.refreshing:
+                break
+            time.sleep(0.05)
+        self.assertEqual(("/vnfs", '"v1"'), CatalogueHandler.requests[-1])
+        self.assertLess(time.time() - listing.fetched, 60)
+
+    def test_find_by_priority(self):
+        result = nsfslookupimpl.find_vnf(None, self.ws_id, self.pj_id, "de.upb", "vnf_42", "0.1")
+        self.assertEqual("de.upb:vnf_42:0.1", result['id'])
+        self.assertRaises(NotFound, nsfslookupimpl.find_vnf, None, self.ws_id, self.pj_id, "de.upb", "vnf_x", "0.1")
+        self.assertEqual(1, len(CatalogueHandler.requests))
+
+
+def make_handler(source: str, delay: float):
+    """ Creates a handler serving the VNF list marked with the source after waiting delay seconds """
+    body = json.dumps([{'vendor': 'de.upb', 'name': 'vnf_{}'.format(i), 'version': '0.1', 'source': source}
+                       for i in range(10)]).encode()
+
+    class DelayedHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return DelayedHandler
+
+
+class CatalogueFanOutTest(unittest.TestCase):
+    def setUp(self):
+        self.app = init_test_context()
+        self.servers = []
+        self.cache_config = CONFIG.get('catalogue-cache')
+        CONFIG['catalogue-cache'] = {'ttl': 0, 'stale': 0}
+
+        create_project_dir(create_workspace_dir("fan_user", "fan_ws"), "fan_pj")
+        db_session().add(User(name="fan_user"))
+        db_session().commit()
+        scan_workspaces_dir()
+        project = db_session().query(Project).filter(Project.name == "fan_pj").first()
+        self.ws_id = project.workspace_id
+        self.pj_id = project.id
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        CONFIG['catalogue-cache'] = self.cache_config
+
+    def add_catalogue(self, source: str, delay: float) -> str:
+        server = ThreadingServer(('127.0.0.1', 0), make_handler(source, delay))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        url = "http://127.0.0.1:{}".format(server.server_port)
+        workspace = db_session().query(Project).get(self.pj_id).workspace
+        db_session().add(Catalogue(source, url, True, workspace))
+        db_session().commit()
+        return url
+
+    def test_highest_priority_wins(self):
+        slow_url = self.add_catalogue("slow", 0.3)
+        self.add_catalogue("fast", 0)
+        result = nsfslookupimpl.find_vnf(None, self.ws_id, self.pj_id, "de.upb", "vnf_4", "0.1")
+        self.assertEqual("slow", result['descriptor']['source'])
+        latency = nsfslookupimpl.get_catalogue_latencies()[slow_url]
+        self.assertGreaterEqual(latency['last_seconds'], 0.3)
+
+    def test_catalogues_are_queried_concurrently(self):
+        for i in range(3):
+            self.add_catalogue("slow_{}".format(i), 0.4)
+        start = time.monotonic()
+        self.assertRaises(NotFound, nsfslookupimpl.find_vnf, None, self.ws_id, self.pj_id, "de.upb", "vnf_x", "0.1")
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_configured_read_timeout(self):
+        CONFIG['catalogue-cache']['read-timeout'] = 0.1
+        slow_url = self.add_catalogue("slow", 1)
+        start = time.monotonic()
+        self.assertRaises(NotFound, nsfslookupimpl.find_vnf, None, self.ws_id, self.pj_id,
+                          "de.upb", "vnf_4", "0.1")
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual(1, nsfslookupimpl.get_catalogue_latencies()[slow_url]['failures'])
+
+    def test_lookup_timeout(self):
+        CONFIG['catalogue-cache']['lookup-timeout'] = 0.3
+        self.add_catalogue("slow", 1.5)
+        self.add_catalogue("fast", 0)
+        start = time.monotonic()
+        result = nsfslookupimpl.find_vnf(None, self.ws_id, self.pj_id, "de.upb", "vnf_4", "0.1")
+        self.assertEqual("fast", result['descriptor']['source'])
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_unreachable_catalogue_is_skipped(self):
+        server = ThreadingServer(('127.0.0.1', 0), make_handler("closed", 0))
+        unreachable_url = "http://127.0.0.1:{}".format(server.server_port)
+        server.server_close()
+        workspace = db_session().query(Project).get(self.pj_id).workspace
+        db_session().add(Catalogue("closed", unreachable_url, True, workspace))
+        db_session().commit()
+        self.add_catalogue("fallback", 0)
+        result = nsfslookupimpl.find_vnf(None, self.ws_id, self.pj_id, "de.upb", "vnf_4", "0.1")
+        self.assertEqual("fallback", result['descriptor']['source'])
+        self.assertGreaterEqual(nsfslookupimpl.get_catalogue_latencies()[unreachable_url]['failures'], 1)
@@ -1,4 +1,5 @@
 import logging
+import os
 import tempfile
 
 from son_editor.util.requestutil import CONFIG
@@ -7,6 +8,9 @@ logging.info("Setting up config for temporary db")
 
 # Set the temp db location
 handle, CONFIG['database']['location'] = tempfile.mkstemp()
+# or run the tests against an empty database on a server, e.g. "postgresql://postgres@localhost/son_editor_test"
+if os.environ.get('SON_EDITOR_TEST_DATABASE_URL'):
+    CONFIG['database']['url'] = os.environ['SON_EDITOR_TEST_DATABASE_URL']
 
 # import after database location has been set to a temp directory
 from son_editor.app.database import init_db
@@ -15,6 +19,8 @@ from son_editor.app.database import init_db
 CONFIG['testing'] = True
 # set workspacelocation to tempfile to avoid spamming the workspace dir
 CONFIG["workspaces-location"] = tempfile.mkdtemp() + '/'
+# cache schemas in a temporary directory and do not refresh them in the background
+CONFIG["schema-cache"] = {"location": tempfile.mkdtemp() + '/', "ttl": 0}
 
 # Initialize db with the temp location
 init_db()
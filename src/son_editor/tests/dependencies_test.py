@@ -0,0 +1,112 @@
+import json
+import unittest
+
+from sqlalchemy.orm import sessionmaker
+
+from son_editor.app.database import scan_workspaces_dir, engine
+from son_editor.impl import dependenciesimpl, workspaceimpl
+from son_editor.models.descriptor import Service, Function
+from son_editor.models.project import Project
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+
+
+class DependenciesTest(unittest.TestCase):
+    def setUp(self):
+        # Initializes test context
+        self.app = init_test_context()
+        dependenciesimpl._graphs.clear()
+        self.user = create_logged_in_user(self.app, "dep_user")
+        ws_path = create_workspace_dir("dep_user", "dep_ws")
+        pj_path = create_project_dir(ws_path, "dep_pj")
+        write_referencing_descriptors(pj_path, {'network_services': [{'ns_vendor': 'de.upb', 'ns_name': 'service_b',
+                                                                      'ns_version': '0.1'}]})
+        scan_workspaces_dir()
+        self.project = db_session().query(Project).filter(Project.name == "dep_pj").first()
+        self.url = "/" + constants.WORKSPACES + "/" + str(self.project.workspace_id) + "/" + \
+                   constants.PROJECTS + "/" + str(self.project.id) + "/dependencies"
+
+    def get_dependencies(self, uid):
+        result = dependenciesimpl.get_dependencies(self.project.workspace_id, self.project.id, uid)
+        return {node['kind']: ([dep['uid'] for dep in node['dependents']],
+                               [dep['uid'] for dep in node['all_dependents']]) for node in result}
+
+    def test_transitive_dependents(self):
+        self.assertEqual({'function': (["de.upb:service_a:0.1", "de.upb:service_b:0.1"],
+                                       ["de.upb:service_a:0.1", "de.upb:service_b:0.1", "de.upb:service_c:0.1"])},
+                         self.get_dependencies("de.upb:vnf_a:0.1"))
+        self.assertEqual({'service': ([], [])}, self.get_dependencies("de.upb:service_c:0.1"))
+
+    def test_incremental_update(self):
+        self.get_dependencies("de.upb:vnf_a:0.1")
+        session = db_session()
+        service = session.query(Service).filter(Service.name == "service_b").first()
+        descriptor = json.loads(service.descriptor)
+        del descriptor['network_services']
+        service.descriptor = json.dumps(descriptor)
+        session.commit()
+        graph = dependenciesimpl._graphs[self.project.id]
+        dependenciesimpl.descriptor_changed(session, service)
+
+        self.assertEqual({'service': ([], [])}, self.get_dependencies("de.upb:service_a:0.1"))
+        self.assertIs(graph, dependenciesimpl._graphs[self.project.id])
+
+    def test_rebuilds_on_foreign_change(self):
+        self.get_dependencies("de.upb:vnf_a:0.1")
+        session = db_session()
+        session.query(Service).filter(Service.name == "service_c").first().descriptor = "{}"
+        session.commit()
+
+        self.assertEqual({'function': (["de.upb:service_a:0.1", "de.upb:service_b:0.1"],
+                                       ["de.upb:service_a:0.1", "de.upb:service_b:0.1"])},
+                         self.get_dependencies("de.upb:vnf_a:0.1"))
+
+    def test_rebuilds_on_foreign_rename(self):
+        self.get_dependencies("de.upb:vnf_a:0.1")
+        # another worker renames the function without touching the counts or the highest ids
+        other_session = sessionmaker(bind=engine)()
+        try:
+            function = other_session.query(Function).filter(Function.name == "vnf_a").first()
+            function.name = "vnf_x"
+            function.uid = "de.upb:vnf_x:0.1"
+            function_id = function.id
+            other_session.commit()
+        finally:
+            other_session.close()
+
+        result = dependenciesimpl.get_dependencies(self.project.workspace_id, self.project.id, "de.upb:vnf_x:0.1")
+        self.assertEqual(function_id, result[0]['id'])
+        result = dependenciesimpl.get_dependencies(self.project.workspace_id, self.project.id, "de.upb:vnf_a:0.1")
+        self.assertIsNone(result[0]['id'])
+
+    def test_endpoint(self):
+        response = self.app.get(self.url + "?uid=de.upb:service_b:0.1")
+        self.assertEqual(200, response.status_code)
+        result = json.loads(response.data.decode())
+        self.assertEqual(["de.upb:service_c:0.1"], [dep['uid'] for dep in result[0]['dependents']])
+
+        response = self.app.get(self.url + "?uid=de.upb:unknown:0.1")
+        self.assertEqual(404, response.status_code)
+
+    def test_write_after_foreign_change_drops_graph(self):
+        self.get_dependencies("de.upb:vnf_a:0.1")
+        other_session = sessionmaker(bind=engine)()
+        try:
+            other_session.query(Service).filter(Service.name == "service_c").first().descriptor = "{}"
+            other_session.commit()
+        finally:
+            other_session.close()
+        session = db_session()
+        service = session.query(Service).filter(Service.name == "service_b").first()
+        service.meta = '{"changed": true}'
+        session.commit()
+        dependenciesimpl.descriptor_changed(session, service)
+
+        # the update must not mark the graph as current, it misses the change of the other worker
+        self.assertNotIn(self.project.id, dependenciesimpl._graphs)
+        self.assertEqual({'service': ([], [])}, self.get_dependencies("de.upb:service_b:0.1"))
+
+    def test_deleted_workspace_is_evicted(self):
+        self.get_dependencies("de.upb:vnf_a:0.1")
+        workspaceimpl.delete_workspace(self.project.workspace_id)
+        self.assertNotIn(self.project.id, dependenciesimpl._graphs)
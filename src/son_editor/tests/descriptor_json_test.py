@@ -0,0 +1,62 @@
+import json
+import unittest
+
+from son_editor.app.database import scan_workspaces_dir
+from son_editor.models.descriptor import Function, Service
+from son_editor.models.project import Project
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+
+
+class DescriptorJsonTest(unittest.TestCase):
+    def setUp(self):
+        # Initializes test context
+        self.app = init_test_context()
+        self.user = create_logged_in_user(self.app, "json_user")
+        ws_path = create_workspace_dir("json_user", "json_ws")
+        pj_path = create_project_dir(ws_path, "json_pj")
+        nsds = {"service_{}".format(i): get_sample_ns("service_{}".format(i), "de.upb", "0.1")['descriptor']
+                for i in range(3)}
+        vnfds = {"vnf_{}".format(i): get_sample_vnf("vnf_{}".format(i), "de.upb", "0.1")['descriptor']
+                 for i in range(3)}
+        write_descriptor_files(pj_path, nsds, vnfds)
+        scan_workspaces_dir()
+        project = db_session().query(Project).filter(Project.name == "json_pj").first()
+        self.project_id = project.id
+        self.url = "/" + constants.WORKSPACES + "/" + str(project.workspace_id) + "/" + \
+                   constants.PROJECTS + "/" + str(project.id) + "/"
+
+    def test_as_json_matches_as_dict(self):
+        for model in [Function, Service]:
+            for descriptor in db_session().query(model):
+                self.assertEqual(descriptor.as_dict(), json.loads(descriptor.as_json()))
+
+    def test_list_endpoints(self):
+        for model, path in [(Function, constants.VNFS), (Service, constants.SERVICES)]:
+            response = self.app.get(self.url + path + "/")
+            self.assertEqual(200, response.status_code)
+            self.assertEqual("application/json", response.headers['Content-Type'])
+            expected = [descriptor.as_dict() for descriptor in
+                        db_session().query(model).filter(model.project_id == self.project_id)]
+            self.assertEqual(sorted(expected, key=lambda d: d['id']),
+                             sorted(json.loads(response.data.decode()), key=lambda d: d['id']))
+
+    def test_paginated_projection(self):
+        url = self.url + constants.VNFS + "/?fields=id,name,version&limit=2"
+        response = self.app.get(url)
+        self.assertEqual(200, response.status_code)
+        first_page = json.loads(response.data.decode())
+        self.assertEqual(2, len(first_page))
+        self.assertEqual({'id', 'name', 'version'}, set(first_page[0].keys()))
+        cursor = response.headers['X-Next-Cursor']
+
+        response = self.app.get(url + "&cursor=" + cursor)
+        second_page = json.loads(response.data.decode())
+        self.assertEqual(1, len(second_page))
+        self.assertNotIn('X-Next-Cursor', response.headers)
+        self.assertEqual(["vnf_0", "vnf_1", "vnf_2"],
+                         sorted(function['name'] for function in first_page + second_page))
+
+    def test_unknown_field(self):
+        response = self.app.get(self.url + constants.SERVICES + "/?fields=id,project_id")
+        self.assertEqual(400, response.status_code)
@@ -0,0 +1,93 @@
+import json
+import shutil
+import tempfile
+import unittest
+
+from son_editor.app.database import scan_workspaces_dir, _backfill_descriptor_references
+from son_editor.impl import functionsimpl, servicesimpl
+from son_editor.models.descriptor import Function, Service, DescriptorReference
+from son_editor.tests.utils import *
+from son_editor.util import descriptorutil
+from son_editor.util.context import init_test_context
+from son_editor.util.descriptorutil import VNF_SCHEMA_PATH, NS_SCHEMA_PATH
+from son_editor.util.requestutil import CONFIG
+
+
+class DescriptorReferenceTest(unittest.TestCase):
+    def setUp(self):
+        # Initializes test context
+        self.app = init_test_context()
+        ws_path = create_workspace_dir("ref_user", "ref_ws")
+        pj_path = create_project_dir(ws_path, "ref_pj")
+        write_referencing_descriptors(pj_path)
+        scan_workspaces_dir()
+        self.session = db_session()
+
+    def tearDown(self):
+        self.session.rollback()
+
+    def get_service(self, name):
+        return self.session.query(Service).filter(Service.name == name).first()
+
+    def test_function_references(self):
+        function = self.session.query(Function).filter(Function.name == "vnf_a").first()
+        refs = functionsimpl.get_references(function, self.session)
+        self.assertEqual(["service_a", "service_b"], sorted(service.name for service in refs))
+
+    def test_service_references(self):
+        refs = servicesimpl.get_references(self.get_service("service_a"), self.session)
+        self.assertEqual(["service_b"], [service.name for service in refs])
+        self.assertEqual([], servicesimpl.get_references(self.get_service("service_c"), self.session))
+
+    def test_references_follow_descriptor(self):
+        service = self.get_service("service_a")
+        descriptor = json.loads(service.descriptor)
+        descriptor['network_functions'] = []
+        service.descriptor = json.dumps(descriptor)
+        self.session.flush()
+
+        function = self.session.query(Function).filter(Function.name == "vnf_a").first()
+        refs = functionsimpl.get_references(function, self.session)
+        self.assertEqual(["service_b"], [service.name for service in refs])
+
+    def use_bundled_schemas(self):
+        """ Validates against permissive schemas from a bundled directory, so no download is needed """
+        config = {key: CONFIG[key] for key in ['schemas', 'schema-cache']}
+        location = tempfile.mkdtemp()
+        for rel_path in [VNF_SCHEMA_PATH, NS_SCHEMA_PATH]:
+            os.makedirs(os.path.dirname(os.path.join(location, "bundled", "test", rel_path)), exist_ok=True)
+            with open(os.path.join(location, "bundled", "test", rel_path), "w") as stream:
+                stream.write("type: object\n")
+        CONFIG['schemas'] = [{'name': 'test', 'url': 'http://127.0.0.1:1/'}]
+        CONFIG['schema-cache'] = {'location': os.path.join(location, "cache"), 'ttl': 0,
+                                  'bundled': os.path.join(location, "bundled")}
+        descriptorutil.load_schemas()
+
+        def restore():
+            CONFIG.update(config)
+            descriptorutil.schemas.clear()
+            descriptorutil.validators.clear()
+            shutil.rmtree(location, ignore_errors=True)
+
+        self.addCleanup(restore)
+
+    def test_rename_dependency_only_reference(self):
+        self.use_bundled_schemas()
+        function = self.session.query(Function).filter(Function.name == "vnf_a").first()
+        function_data = {'descriptor': get_sample_vnf("vnf_b", "de.upb", "0.1")['descriptor'],
+                         'edit_mode': 'replace_refs'}
+        functionsimpl.update_function(function.project.workspace.id, function.project.id, function.id,
+                                      function_data)
+
+        descriptor = json.loads(self.get_service("service_b").descriptor)
+        self.assertEqual([{'vendor': 'de.upb', 'name': 'vnf_b', 'version': '0.1'}], descriptor['vnf_dependencies'])
+        self.assertNotIn('network_functions', descriptor)
+        descriptor = json.loads(self.get_service("service_a").descriptor)
+        self.assertEqual('vnf_b', descriptor['network_functions'][0]['vnf_name'])
+
+    def test_backfill(self):
+        self.session.query(DescriptorReference).delete()
+        self.session.commit()
+
+        _backfill_descriptor_references()
+        self.assertEqual(3, self.session.query(DescriptorReference).count())
@@ -0,0 +1,65 @@
+import base64
+import json
+import socketserver
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from son_editor.util import httputil
+from son_editor.util.context import init_test_context
+from son_editor.util.requestutil import CONFIG
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingServer(socketserver.ThreadingMixIn, HTTPServer):
+    # the kept-alive connections stay open until the pool is dropped
+    daemon_threads = True
+
+
+class HttpUtilTest(unittest.TestCase):
+    def setUp(self):
+        self.app = init_test_context()
+        self.server = ThreadingServer(('127.0.0.1', 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:{}".format(self.server.server_port)
+        self.config = CONFIG.get('config')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.config is None:
+            CONFIG.pop('config', None)
+        else:
+            CONFIG['config'] = self.config
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            self.assertEqual('ok', httputil.get(self.url + "/catalogue").text)
+        self.assertIs(httputil.get_session(self.url + "/other"), httputil.get_session(self.url))
+        stats = httputil.get_pool_stats()[self.url]
+        self.assertEqual(3, stats['requests'])
+        self.assertEqual(1, stats['connections'])
+        self.assertEqual(2, stats['reused'])
+        self.assertEqual(httputil.get_http_config().get('pool-size', 10), stats['pool_size'])
+
+    def test_metrics_endpoint(self):
+        httputil.get(self.url)
+        self.assertEqual(404, self.app.get("/metrics/http").status_code)
+
+        CONFIG['config'] = {'user': 'admin', 'pwd': 'secret'}
+        auth = base64.b64encode(b"admin:secret").decode()
+        response = self.app.get("/metrics/http", headers={'Authorization': 'Basic ' + auth})
+        self.assertEqual(200, response.status_code)
+        self.assertIn(self.url, json.loads(response.data.decode()))
@@ -0,0 +1,188 @@
+import json
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.orm import sessionmaker
+
+from son_editor.app import migrations
+from son_editor.app.database import engine, Base
+from son_editor.models.descriptor import Function, Service, DescriptorReference
+from son_editor.models.private_descriptor import PrivateFunction
+from son_editor.models.project import Project
+from son_editor.models.user import User
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+
+
+def query_plan(query) -> str:
+    """ Returns the SQLite query plan of the query """
+    statement = query.statement.compile(engine)
+    params = tuple(statement.params[name] for name in statement.positiontup)
+    rows = engine.execute("EXPLAIN QUERY PLAN " + str(statement), params).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+@unittest.skipUnless(engine.dialect.name == 'sqlite', "query plans are checked on SQLite")
+class QueryPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.app = init_test_context()
+
+    def test_function_name_conflict_uses_index(self):
+        # the name conflict check of functionsimpl.create_function
+        query = db_session().query(Function).join(Project).join(Workspace). \
+            filter(Workspace.id == 1). \
+            filter(Function.project_id == 1). \
+            filter(Function.vendor == "de.upb"). \
+            filter(Function.name == "vnf"). \
+            filter(Function.version == "0.1")
+        self.assertIn("ix_descriptor_lookup", query_plan(query))
+
+    def test_uid_lookup_uses_index(self):
+        query = db_session().query(Function.id). \
+            filter(Function.project_id == 1). \
+            filter(Function.uid.in_(["de.upb:vnf:0.1", "de.upb:vnf:0.2"]))
+        self.assertIn("ix_descriptor_project_uid", query_plan(query))
+
+    def test_private_lookup_uses_index(self):
+        query = db_session().query(PrivateFunction). \
+            filter(PrivateFunction.ws_id == 1). \
+            filter(PrivateFunction.vendor == "de.upb"). \
+            filter(PrivateFunction.name == "vnf"). \
+            filter(PrivateFunction.version == "0.1")
+        self.assertIn("ix_private_descriptor_lookup", query_plan(query))
+
+    def test_project_name_lookup_uses_index(self):
+        query = db_session().query(Project).filter(Project.workspace_id == 1).filter(Project.name == "project")
+        self.assertIn("uix_project_workspace_name", query_plan(query))
+
+
+class MigrationsTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.engine = create_engine("sqlite:///" + self.path)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def test_missing_indexes_are_created(self):
+        Base.metadata.create_all(bind=self.engine)
+        self.engine.execute("DROP INDEX ix_descriptor_lookup")
+        self.engine.execute("DROP INDEX uix_project_workspace_name")
+        self.assertEqual({"ix_descriptor_lookup", "uix_project_workspace_name"},
+                         {index.name for index in migrations.missing_indexes(self.engine)})
+        migrations.upgrade(self.engine)
+        self.assertEqual([], migrations.missing_indexes(self.engine))
+        unique = {index['name']: index['unique'] for index in inspect(self.engine).get_indexes('project')}
+        self.assertTrue(unique['uix_project_workspace_name'])
+
+    def test_violated_unique_index_is_retried(self):
+        Base.metadata.create_all(bind=self.engine)
+        migrations.upgrade(self.engine)
+        self.engine.execute(migrations.schema_version.delete().where(migrations.schema_version.c.version >= 2))
+        self.engine.execute("DROP INDEX ix_descriptor_lookup")
+        self.engine.execute("DROP INDEX uix_project_workspace_name")
+        self.engine.execute("INSERT INTO project (name, workspace_id) VALUES ('project', 1), ('project', 1)")
+
+        # the lookup indexes are created, the unique indexes are not recorded as applied
+        self.assertEqual(2, migrations.upgrade(self.engine))
+        self.assertEqual(["uix_project_workspace_name"],
+                         [index.name for index in migrations.missing_indexes(self.engine)])
+
+        self.engine.execute("DELETE FROM project WHERE id = 2")
+        self.assertEqual(migrations.MIGRATIONS[-1][0], migrations.upgrade(self.engine))
+        self.assertEqual([], migrations.missing_indexes(self.engine))
+
+
+# the indexes added by the migrations, dropped to get a database as it was before them
+MIGRATED_INDEXES = ["ix_descriptor_project_uid", "ix_descriptor_lookup", "ix_private_descriptor_lookup",
+                    "uix_project_workspace_name", "uix_workspace_owner_name"]
+
+
+def generate_database(engine, projects: int = 100, functions: int = 80, services: int = 10):
+    """
+    Creates a database like it was before the migrations existed, with the tables of the models
+    but without the schema_version and descriptor_reference tables, the lookup indexes and the
+    descriptor revision of the projects
+
+    :return: The number of function, service and reference rows
+    """
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    user = User("user")
+    workspaces = [Workspace("ws_{}".format(i), "/ws_{}".format(i), user) for i in range(10)]
+    for pj_index in range(projects):
+        project = Project("pj_{}".format(pj_index), "pj_{}".format(pj_index), workspaces[pj_index % 10])
+        for i in range(functions):
+            descriptor = get_sample_vnf("vnf_{}".format(i), "de.upb", "0.1")['descriptor']
+            Function("vnf_{}".format(i), "0.1", "de.upb", json.dumps(descriptor), project)
+        for i in range(services):
+            descriptor = get_sample_ns("ns_{}".format(i), "de.upb", "0.1")['descriptor']
+            descriptor['network_functions'] = [{'vnf_id': "vnf{}".format(j), 'vnf_vendor': 'de.upb',
+                                                'vnf_name': "vnf_{}".format(j), 'vnf_version': '0.1'}
+                                               for j in range(i % 3 + 1)]
+            Service("ns_{}".format(i), "0.1", "de.upb", json.dumps(descriptor), project)
+    session.add(user)
+    session.commit()
+    counts = (session.query(Function).count(), session.query(Service).count(),
+              session.query(DescriptorReference).count())
+    session.close()
+    DescriptorReference.__table__.drop(bind=engine)
+    for index in migrations._model_indexes(MIGRATED_INDEXES):
+        index.drop(bind=engine)
+    engine.execute("ALTER TABLE project DROP COLUMN descriptor_revision")
+    return counts
+
+
+class VersionedMigrationsTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        self.engine = create_engine("sqlite:///" + self.path)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def recorded_versions(self) -> list:
+        return [row[0] for row in self.engine.execute(select([migrations.schema_version.c.version]).
+                                                      order_by(migrations.schema_version.c.version))]
+
+    def test_new_database_is_stamped(self):
+        self.assertIsNone(migrations.get_version(self.engine))
+        latest = migrations.MIGRATIONS[-1][0]
+        self.assertEqual(latest, migrations.upgrade(self.engine))
+        self.assertEqual([version for version, _, _ in migrations.MIGRATIONS], self.recorded_versions())
+        self.assertEqual([], migrations.missing_indexes(self.engine))
+
+    def test_upgrade_generated_database(self):
+        function_count, service_count, reference_count = generate_database(self.engine)
+        self.assertEqual(0, migrations.get_version(self.engine))
+
+        self.assertEqual(migrations.MIGRATIONS[-1][0], migrations.upgrade(self.engine))
+        self.assertEqual([version for version, _, _ in migrations.MIGRATIONS], self.recorded_versions())
+        self.assertEqual([], migrations.missing_indexes(self.engine))
+        # the rows are kept and the references of every service were indexed
+        self.assertEqual(function_count + service_count,
+                         self.engine.execute("SELECT COUNT(*) FROM descriptor").scalar())
+        self.assertEqual(reference_count, self.engine.execute("SELECT COUNT(*) FROM descriptor_reference").scalar())
+        self.assertEqual([0], [row[0] for row in self.engine.execute(
+            "SELECT DISTINCT descriptor_revision FROM project")])
+
+        # applied migrations are not run again
+        self.engine.execute("DELETE FROM descriptor_reference")
+        migrations.upgrade(self.engine)
+        self.assertEqual(0, self.engine.execute("SELECT COUNT(*) FROM descriptor_reference").scalar())
+
+    def test_pending_migrations_only(self):
+        generate_database(self.engine, projects=2)
+        migrations.upgrade(self.engine)
+        self.engine.execute("DROP INDEX ix_descriptor_lookup")
+        self.engine.execute(migrations.schema_version.delete().where(migrations.schema_version.c.version >= 2))
+        self.assertEqual(1, migrations.get_version(self.engine))
+        migrations.upgrade(self.engine)
+        self.assertEqual([], migrations.missing_indexes(self.engine))
+        self.assertEqual([1, 2, 3, 4], self.recorded_versions())
@@ -0,0 +1,98 @@
+import json
+import threading
+import unittest
+
+from son_editor.app.database import scan_workspaces_dir, _scan_private_catalogue
+from son_editor.app.exceptions import NotFound, InvalidArgument
+from son_editor.impl import nsfslookupimpl
+from son_editor.models.descriptor import Function, Service
+from son_editor.models.project import Project
+from son_editor.models.repository import Catalogue
+from son_editor.tests.catalogue_cache_test import ThreadingServer, make_handler
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+from son_editor.util.requestutil import CONFIG
+
+
+def vnf_ref(name: str) -> dict:
+    return {'vnf_id': name, 'vnf_vendor': 'de.upb', 'vnf_name': name, 'vnf_version': '0.1'}
+
+
+class ResolveReferencesTest(unittest.TestCase):
+    def setUp(self):
+        self.app = init_test_context()
+        self.cache_config = CONFIG.get('catalogue-cache')
+        CONFIG['catalogue-cache'] = {'ttl': 60, 'stale': 600}
+        self.server = ThreadingServer(('127.0.0.1', 0), make_handler("public", 0))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        create_project_dir(create_workspace_dir("res_user", "res_ws"), "res_pj")
+        db_session().add(User(name="res_user"))
+        db_session().commit()
+        scan_workspaces_dir()
+        session = db_session()
+        project = session.query(Project).filter(Project.name == "res_pj").first()
+        self.ws_id = project.workspace_id
+        self.pj_id = project.id
+        workspace = project.workspace
+        create_private_catalogue_descriptor(workspace, "de.upb", "vnf_2", "0.1", True)
+        _scan_private_catalogue(workspace.path + "/catalogues", workspace)
+        session.add(Catalogue("public", "http://127.0.0.1:{}".format(self.server.server_port), True, workspace))
+
+        function = Function("vnf_1", "0.1", "de.upb", json.dumps({'vendor': 'de.upb', 'name': 'vnf_1',
+                                                                   'version': '0.1', 'source': 'project'}))
+        function.project = project
+        nsd = {'vendor': 'de.upb', 'name': 'ns', 'version': '0.1',
+               'network_functions': [vnf_ref("vnf_1"), vnf_ref("vnf_2"), vnf_ref("vnf_3"), vnf_ref("vnf_missing")]}
+        service = Service("ns", "0.1", "de.upb", json.dumps(nsd))
+        service.project = project
+        session.add(function)
+        session.add(service)
+        session.commit()
+        self.service_id = service.id
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        CONFIG['catalogue-cache'] = self.cache_config
+
+    def test_resolve_service(self):
+        result = nsfslookupimpl.resolve_references(self.ws_id, self.pj_id, {'service_id': self.service_id})
+        functions = result['functions']
+        self.assertEqual({}, result['services'])
+        self.assertEqual('project', functions['de.upb:vnf_1:0.1']['source'])
+        self.assertEqual('project', functions['de.upb:vnf_1:0.1']['descriptor']['source'])
+        self.assertEqual('private', functions['de.upb:vnf_2:0.1']['source'])
+        self.assertEqual('catalogue', functions['de.upb:vnf_3:0.1']['source'])
+        self.assertEqual('public', functions['de.upb:vnf_3:0.1']['descriptor']['source'])
+        self.assertIsNone(functions['de.upb:vnf_missing:0.1'])
+
+    def test_resolve_triples(self):
+        result = nsfslookupimpl.resolve_references(self.ws_id, self.pj_id, {
+            'functions': [{'vendor': 'de.upb', 'name': 'vnf_2', 'version': '0.1'}],
+            'services': [{'vendor': 'de.upb', 'name': 'ns', 'version': '0.1'},
+                         {'vendor': 'de.upb', 'name': 'vnf_1', 'version': '0.1'}]})
+        self.assertEqual('private', result['functions']['de.upb:vnf_2:0.1']['source'])
+        self.assertEqual(self.service_id, result['services']['de.upb:ns:0.1']['id'])
+        # the project function with the uid is no service, the test catalogue serves it as one
+        self.assertEqual('catalogue', result['services']['de.upb:vnf_1:0.1']['source'])
+
+    def test_invalid_request(self):
+        self.assertRaises(InvalidArgument, nsfslookupimpl.resolve_references, self.ws_id, self.pj_id,
+                          {'functions': [{'vendor': 'de.upb', 'name': 'vnf_2'}]})
+        self.assertRaises(NotFound, nsfslookupimpl.resolve_references, self.ws_id, self.pj_id,
+                          {'service_id': self.service_id + 100})
+        self.assertRaises(NotFound, nsfslookupimpl.resolve_references, self.ws_id, self.pj_id + 100, {})
+        for body in [[], "de.upb:vnf_2:0.1", {'functions': [{'vendor': None, 'name': 'vnf_2', 'version': '0.1'}]}]:
+            self.assertRaises(InvalidArgument, nsfslookupimpl.resolve_references, self.ws_id, self.pj_id, body)
+
+    def test_incomplete_references_are_skipped(self):
+        session = db_session()
+        service = session.query(Service).get(self.service_id)
+        nsd = json.loads(service.descriptor)
+        nsd['network_functions'].append({'vnf_id': 'incomplete', 'vnf_name': 'vnf_1', 'vnf_version': '0.1'})
+        service.descriptor = json.dumps(nsd)
+        session.commit()
+        result = nsfslookupimpl.resolve_references(self.ws_id, self.pj_id, {'service_id': self.service_id})
+        self.assertEqual(4, len(result['functions']))
+        self.assertNotIn('None:vnf_1:0.1', result['functions'])
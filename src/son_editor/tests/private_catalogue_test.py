@@ -0,0 +1,62 @@
+import unittest
+
+from sqlalchemy import inspect
+
+from son_editor.app import migrations
+from son_editor.app.database import scan_workspaces_dir, engine, init_db
+from son_editor.impl import private_catalogue_impl
+from son_editor.models.private_descriptor import PrivateDescriptor, PrivateFunction, PrivateService
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+
+
+class PrivateCatalogueTest(unittest.TestCase):
+    def setUp(self):
+        self.app = init_test_context()
+        create_workspace_dir("private_user", "private_ws")
+        db_session().add(User(name="private_user"))
+        db_session().commit()
+        scan_workspaces_dir()
+        self.ws_id = db_session().query(Workspace).filter(Workspace.name == "private_ws").first().id
+
+    def publish(self, name: str, is_vnf: bool, version: str = "0.1"):
+        private_catalogue_impl.publish_private_nsfs(self.ws_id, {'vendor': 'de.upb', 'name': name,
+                                                                 'version': version}, is_vnf)
+
+    def test_publish_and_query(self):
+        self.publish("vnf_a", True)
+        self.publish("vnf_a", True)
+        self.publish("vnf_a", False)
+        function = private_catalogue_impl.query_private_nsfs(self.ws_id, "de.upb", "vnf_a", "0.1", True)
+        self.assertEqual(("de.upb", "vnf_a", "0.1", "de.upb:vnf_a:0.1"),
+                         (function.vendor, function.name, function.version, function.uid))
+        self.assertEqual(1, db_session().query(PrivateFunction).count())
+        self.assertEqual(1, db_session().query(PrivateService).count())
+        self.assertIsNone(private_catalogue_impl.query_private_nsfs(self.ws_id, "de.upb", "vnf_a", "0.2", True))
+        self.assertIsNone(private_catalogue_impl.query_private_nsfs(self.ws_id + 1, "de.upb", "vnf_a", "0.1", True))
+
+    def test_bulk_query(self):
+        for i in range(5):
+            self.publish("vnf_{}".format(i), True)
+        self.publish("ns_0", False)
+        private_catalogue_impl.BULK_CHUNK_SIZE = 2
+        try:
+            triples = [("de.upb", "vnf_{}".format(i), "0.1") for i in range(4)] + \
+                      [("de.upb", "ns_0", "0.1"), ("de.upb", "vnf_x", "0.1")]
+            found = private_catalogue_impl.query_private_nsfs_bulk(self.ws_id, triples)
+        finally:
+            private_catalogue_impl.BULK_CHUNK_SIZE = 200
+        self.assertEqual({(True, "de.upb:vnf_{}:0.1".format(i)) for i in range(4)} | {(False, "de.upb:ns_0:0.1")},
+                         set(found))
+        self.assertEqual("vnf_2", found[(True, "de.upb:vnf_2:0.1")]['descriptor']['name'])
+        services = private_catalogue_impl.query_private_nsfs_bulk(self.ws_id, triples, is_vnf=False)
+        self.assertEqual({(False, "de.upb:ns_0:0.1")}, set(services))
+
+    def test_missing_index_is_created(self):
+        engine.execute("DROP INDEX ix_private_descriptor_lookup")
+        # pretend the index migration was not applied yet
+        engine.execute(migrations.schema_version.delete().where(migrations.schema_version.c.version >= 2))
+        init_db()
+        indexes = inspect(engine).get_indexes(PrivateDescriptor.__tablename__)
+        self.assertIn({'name': 'ix_private_descriptor_lookup', 'unique': 0,
+                       'column_names': ['ws_id', 'vendor', 'name', 'version']}, indexes)
@@ -0,0 +1,73 @@
+import base64
+import json
+import shutil
+import tempfile
+import time
+import unittest
+
+from son_editor.app import __main__, profiler
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+from son_editor.util.requestutil import CONFIG
+
+
+class ProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.app = init_test_context()
+        create_logged_in_user(self.app, "profile_user")
+        self.location = tempfile.mkdtemp()
+        self.config = CONFIG.get('config')
+        CONFIG['config'] = {'user': 'admin', 'pwd': 'secret'}
+        CONFIG['profiling'] = {'secret': 'profile-secret', 'location': self.location, 'keep': 2}
+        profiler.init_profiler(__main__.app)
+        self.auth = {'Authorization': 'Basic ' + base64.b64encode(b"admin:secret").decode()}
+        self.path = "/" + constants.WORKSPACES + "/"
+
+    def tearDown(self):
+        CONFIG['config'] = self.config
+        CONFIG.pop('profiling', None)
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def sign(self, method='GET', path=None, expires=None):
+        expires = expires if expires is not None else int(time.time()) + 60
+        return {profiler.PROFILE_HEADER: profiler.sign_request('profile-secret', method, path or self.path, expires)}
+
+    def test_signed_header(self):
+        response = self.app.get(self.path, headers=self.sign())
+        self.assertEqual(200, response.status_code)
+        profile_id = response.headers[profiler.PROFILE_ID_HEADER]
+        self.assertIn('workspaces_workspaces', profile_id)
+
+        response = self.app.get("/metrics/profiles", headers=self.auth)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([profile_id], [entry['id'] for entry in json.loads(response.data.decode())])
+
+        response = self.app.get("/metrics/profiles/" + profile_id, headers=self.auth)
+        self.assertEqual(200, response.status_code)
+        self.assertGreater(len(response.data), 0)
+        response = self.app.get("/metrics/profiles/" + profile_id + "?format=text&sort=tottime", headers=self.auth)
+        self.assertIn('function calls', response.data.decode())
+        self.assertEqual(401, self.app.get("/metrics/profiles/" + profile_id).status_code)
+        self.assertEqual(404, self.app.get("/metrics/profiles/missing.prof", headers=self.auth).status_code)
+
+    def test_invalid_signatures(self):
+        headers = [self.sign(method='POST'),
+                   self.sign(path='/workspaces/1'),
+                   self.sign(expires=int(time.time()) - 1),
+                   {profiler.PROFILE_HEADER: 'garbage'}]
+        for header in headers:
+            response = self.app.get(self.path, headers=header)
+            self.assertEqual(200, response.status_code)
+            self.assertNotIn(profiler.PROFILE_ID_HEADER, response.headers)
+        self.assertNotIn(profiler.PROFILE_ID_HEADER, self.app.get(self.path).headers)
+        self.assertEqual([], profiler.list_profiles())
+
+    def test_enabled_flag_keeps_newest(self):
+        CONFIG['profiling']['enabled'] = True
+        ids = [self.app.get(self.path).headers[profiler.PROFILE_ID_HEADER] for _ in range(3)]
+        self.assertEqual(2, len(profiler.list_profiles()))
+        self.assertNotIn(ids[0], [entry['id'] for entry in profiler.list_profiles()])
+
+    def test_unconfigured(self):
+        CONFIG.pop('profiling')
+        self.assertNotIn(profiler.PROFILE_ID_HEADER, self.app.get(self.path, headers=self.sign()).headers)
@@ -0,0 +1,78 @@
+import base64
+import threading
+import unittest
+
+from son_editor.impl.gitimpl import git_command
+from son_editor.tests.catalogue_cache_test import ThreadingServer, make_handler
+from son_editor.tests.utils import *
+from son_editor.util import httputil
+from son_editor.util.context import init_test_context
+from son_editor.util.metricsutil import Histogram, REQUEST_DURATION, SUBPROCESS_DURATION, OUTBOUND_DURATION
+from son_editor.util.requestutil import CONFIG
+
+
+class HistogramTest(unittest.TestCase):
+    def test_render(self):
+        histogram = Histogram('test_seconds', 'A test', ('route',), (0.1, 1))
+        histogram.observe(0.05, route='/a')
+        histogram.observe(0.5, route='/a')
+        histogram.observe(5, route='/a')
+        histogram.observe(0.5, route='say "hi"\n')
+        lines = histogram.render()
+        self.assertEqual(['# HELP test_seconds A test', '# TYPE test_seconds histogram'], lines[:2])
+        self.assertIn('test_seconds_bucket{route="/a",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{route="/a",le="1.0"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="/a",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_sum{route="/a"} 5.55', lines)
+        self.assertIn('test_seconds_count{route="/a"} 3', lines)
+        self.assertIn('test_seconds_count{route="say \\"hi\\"\\n"} 1', lines)
+
+
+class PrometheusMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.app = init_test_context()
+        create_logged_in_user(self.app, "prometheus_user")
+        self.config = CONFIG.get('config')
+        CONFIG['config'] = {'user': 'admin', 'pwd': 'secret'}
+        self.auth = {'Authorization': 'Basic ' + base64.b64encode(b"admin:secret").decode()}
+
+    def tearDown(self):
+        CONFIG['config'] = self.config
+
+    def test_request_duration(self):
+        key = ('workspaces', '/workspaces/', 'GET', '200')
+        before = REQUEST_DURATION.samples().get(key, {'count': 0})['count']
+        self.assertEqual(200, self.app.get("/" + constants.WORKSPACES + "/").status_code)
+        self.assertEqual(before + 1, REQUEST_DURATION.samples()[key]['count'])
+
+        response = self.app.get("/metrics/prometheus", headers=self.auth)
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.headers['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.data.decode()
+        self.assertIn('# TYPE son_editor_request_duration_seconds histogram', text)
+        self.assertIn('son_editor_request_duration_seconds_count{namespace="workspaces",route="/workspaces/",'
+                      'method="GET",status="200"}', text)
+        self.assertEqual(401, self.app.get("/metrics/prometheus").status_code)
+
+    def test_nested_namespace(self):
+        self.app.get("/" + constants.WORKSPACES + "/1/projects/1/functions/")
+        namespaces = {key[0] for key in REQUEST_DURATION.samples()
+                      if key[1] == '/workspaces/<int:ws_id>/projects/<int:project_id>/functions/'}
+        self.assertEqual({'workspaces/<int:ws_id>/projects/<int:project_id>/functions'}, namespaces)
+
+    def test_subprocess_duration(self):
+        before = SUBPROCESS_DURATION.samples().get(('git', '--version'), {'count': 0})['count']
+        out, err, exitcode = git_command(['--version'])
+        self.assertEqual(0, exitcode)
+        self.assertEqual(before + 1, SUBPROCESS_DURATION.samples()[('git', '--version')]['count'])
+
+    def test_outbound_duration(self):
+        server = ThreadingServer(('127.0.0.1', 0), make_handler('metrics', 0))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            host = '127.0.0.1:{}'.format(server.server_port)
+            self.assertEqual(200, httputil.get("http://{}/functions".format(host)).status_code)
+            self.assertEqual(1, OUTBOUND_DURATION.samples()[(host, 'GET')]['count'])
+        finally:
+            server.shutdown()
+            server.server_close()
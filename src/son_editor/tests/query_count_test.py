@@ -0,0 +1,93 @@
+import contextlib
+import unittest
+
+from sqlalchemy import event
+
+from son_editor.app.database import scan_workspaces_dir, engine
+from son_editor.app.securityservice import access_cache
+from son_editor.models.descriptor import Function
+from son_editor.models.project import Project
+from son_editor.models.repository import Catalogue, Platform
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+
+
+@contextlib.contextmanager
+def count_statements():
+    """ Counts the SQL statements sent to the database inside the block """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+class QueryCountTest(unittest.TestCase):
+    """ The statements per request must not grow with the number of rows """
+
+    def setUp(self):
+        self.app = init_test_context()
+        create_logged_in_user(self.app, "count_user")
+
+    def create_workspaces(self, workspaces: int, descriptors: int) -> list:
+        """ Creates workspaces with catalogues, platforms and one project with functions and services """
+        for ws_index in range(workspaces):
+            ws_path = create_workspace_dir("count_user", "ws_{}".format(ws_index))
+            pj_path = create_project_dir(ws_path, "pj")
+            nsds = {"ns_{}".format(i): get_sample_ns("ns_{}".format(i), "de.upb", "0.1")['descriptor']
+                    for i in range(descriptors)}
+            vnfds = {"vnf_{}".format(i): get_sample_vnf("vnf_{}".format(i), "de.upb", "0.1")['descriptor']
+                     for i in range(descriptors)}
+            write_descriptor_files(pj_path, nsds, vnfds)
+        scan_workspaces_dir()
+        session = db_session()
+        for workspace in session.query(Workspace):
+            for i in range(3):
+                session.add(Catalogue("catalogue_{}".format(i), "http://localhost", False, workspace))
+                session.add(Platform("platform_{}".format(i), "http://localhost", False, workspace))
+        for project in session.query(Project):
+            project.publish_to = "personal"
+        session.commit()
+        return [(project.workspace_id, project.id) for project in session.query(Project).order_by(Project.id)]
+
+    def request(self, method: str, url: str) -> list:
+        access_cache.invalidate()
+        db_session.remove()
+        with count_statements() as statements:
+            response = getattr(self.app, method)(url)
+        self.assertEqual(200, response.status_code, response.data)
+        return statements
+
+    def function_url(self, ws_id: int, project_id: int) -> str:
+        function = db_session().query(Function).filter(Function.project_id == project_id).first()
+        return "/{}/{}/{}/{}/{}/{}".format(constants.WORKSPACES, ws_id, constants.PROJECTS, project_id,
+                                           constants.VNFS, function.id)
+
+    def test_workspace_list(self):
+        self.create_workspaces(6, 1)
+        statements = self.request('get', "/" + constants.WORKSPACES + "/")
+        # user, workspaces, catalogues, platforms
+        self.assertLessEqual(len(statements), 4, "\n".join(statements))
+
+    def test_function_endpoints(self):
+        ws_id, project_id = self.create_workspaces(1, 5)[0]
+        url = self.function_url(ws_id, project_id)
+        # access check and the function joined with its project and workspace
+        self.assertLessEqual(len(self.request('get', url)), 2)
+        self.assertLessEqual(len(self.request('get', url + "/upload")), 2)
+
+    def test_delete_project(self):
+        counts = []
+        for descriptors in [2, 8]:
+            ws_id, project_id = self.create_workspaces(1, descriptors)[-1]
+            statements = self.request('delete', "/{}/{}/{}/{}".format(constants.WORKSPACES, ws_id,
+                                                                       constants.PROJECTS, project_id))
+            counts.append(len(statements))
+            init_test_context()
+            create_logged_in_user(self.app, "count_user")
+        self.assertEqual(counts[0], counts[1])
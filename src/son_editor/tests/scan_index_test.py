@@ -0,0 +1,91 @@
+import json
+import unittest
+
+import yaml
+
+from son_editor.app.database import scan_workspaces_dir, ScanIndex
+from son_editor.models.descriptor import Function, Service
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+from son_editor.util.descriptorutil import get_file_path
+from son_editor.util.requestutil import CONFIG
+
+
+class ScanIndexTest(unittest.TestCase):
+    def setUp(self):
+        # Initializes test context
+        self.app = init_test_context()
+        ws_path = create_workspace_dir("scan_user", "scan_ws")
+        pj_path = create_project_dir(ws_path, "scan_pj")
+        self.vnf_path = os.path.join(pj_path, "sources", "vnf", "vnf_folder", "vnf.yml")
+        write_descriptor_files(pj_path, {"service": get_sample_ns("service_a", "de.upb", "0.1")['descriptor']},
+                               {"vnf_folder": get_sample_vnf("vnf_a", "de.upb", "0.1")['descriptor']})
+        self.scan_config = CONFIG.get('workspace-scan')
+
+    def tearDown(self):
+        CONFIG['workspace-scan'] = self.scan_config
+
+    def test_unchanged_files_are_skipped(self):
+        report = scan_workspaces_dir()
+        self.assertEqual({"skipped": 0, "parsed": 2, "removed": 0}, report)
+
+        report = scan_workspaces_dir()
+        self.assertEqual({"skipped": 2, "parsed": 0, "removed": 0}, report)
+
+    def test_changed_files_are_parsed(self):
+        scan_workspaces_dir()
+        function = db_session().query(Function).filter(Function.name == "vnf_a").first()
+        descriptor = get_sample_vnf("vnf_a", "de.upb", "0.1")['descriptor']
+        descriptor['description'] = "changed on disk"
+        with open(get_file_path("vnf", function), "w") as stream:
+            yaml.safe_dump(descriptor, stream)
+
+        report = scan_workspaces_dir()
+        self.assertEqual({"skipped": 1, "parsed": 1, "removed": 0}, report)
+        db_session.expire_all()
+        function = db_session().query(Function).filter(Function.name == "vnf_a").first()
+        self.assertEqual("changed on disk", json.loads(function.descriptor)['description'])
+
+    def test_removed_files_are_dropped_from_index(self):
+        scan_workspaces_dir()
+        service = db_session().query(Service).filter(Service.name == "service_a").first()
+        os.remove(get_file_path("nsd", service))
+
+        report = scan_workspaces_dir()
+        self.assertEqual({"skipped": 1, "parsed": 0, "removed": 1}, report)
+
+    def test_parallel_scan(self):
+        CONFIG['workspace-scan'] = {'processes': 2, 'parallel-threshold': 2}
+        pj_path = os.path.join(os.path.expanduser(get_config()["workspaces-location"]),
+                               "scan_user", "scan_ws", "projects", "scan_pj")
+        vnfds = {"folder_{}".format(i): get_sample_vnf("vnf_{}".format(i), "de.upb", "0.1")['descriptor']
+                 for i in range(10)}
+        write_descriptor_files(pj_path, vnfds=vnfds)
+
+        report = scan_workspaces_dir()
+        self.assertEqual({"skipped": 0, "parsed": 12, "removed": 0}, report)
+        self.assertEqual(11, db_session().query(Function).count())
+        self.assertEqual(1, db_session().query(Service).count())
+
+    def test_private_catalogue_scan(self):
+        from son_editor.models.private_descriptor import PrivateFunction, PrivateService
+        scan_workspaces_dir()
+        workspace = db_session().query(Workspace).filter(Workspace.name == "scan_ws").first()
+        create_private_catalogue_descriptor(workspace, "de.upb", "private_vnf", "0.1", True)
+        create_private_catalogue_descriptor(workspace, "de.upb", "private_ns", "0.1", False)
+
+        report = scan_workspaces_dir()
+        self.assertEqual({"skipped": 2, "parsed": 2, "removed": 0}, report)
+        self.assertEqual(1, db_session().query(PrivateFunction).filter(PrivateFunction.ws_id == workspace.id).count())
+        self.assertEqual(1, db_session().query(PrivateService).filter(PrivateService.ws_id == workspace.id).count())
+
+    def test_rollback_forgets_new_entries(self):
+        session = db_session()
+        index = ScanIndex(session)
+        self.assertTrue(index.needs_parsing(self.vnf_path))
+        index.indexed(self.vnf_path)
+        session.flush()
+
+        index.rollback()
+        self.assertEqual({}, index.entries)
+        self.assertTrue(index.needs_parsing(self.vnf_path))
@@ -0,0 +1,35 @@
+import unittest
+
+from son_editor.app.exceptions import InvalidArgument
+from son_editor.impl.functionsimpl import validate_vnf
+from son_editor.tests.utils import get_sample_vnf
+from son_editor.util import descriptorutil
+from son_editor.util.descriptorutil import SCHEMA_ID_VNF, SCHEMA_ID_NS, get_validator
+
+VNF_SCHEMA = {"$schema": "http://json-schema.org/draft-04/schema#",
+              "type": "object",
+              "properties": {"name": {"type": "string", "pattern": "^[a-z0-9\\-_.]+$"}},
+              "required": ["name", "vendor", "version"]}
+
+
+class SchemaValidationTest(unittest.TestCase):
+    def setUp(self):
+        self.schemas = dict(descriptorutil.schemas)
+        descriptorutil.schemas[SCHEMA_ID_VNF] = [{'name': 'test', 'url': '', 'schema': VNF_SCHEMA}]
+        descriptorutil.schemas[SCHEMA_ID_NS] = [{'name': 'test', 'url': '', 'schema': {}}]
+        descriptorutil.validators.clear()
+
+    def tearDown(self):
+        descriptorutil.schemas.clear()
+        descriptorutil.schemas.update(self.schemas)
+        descriptorutil.validators.clear()
+
+    def test_validator_is_cached(self):
+        validator = get_validator(0, SCHEMA_ID_VNF)
+        self.assertIs(validator, get_validator(0, SCHEMA_ID_VNF))
+        self.assertIsNot(validator, get_validator(0, SCHEMA_ID_NS))
+
+    def test_validate_vnf(self):
+        validate_vnf(0, get_sample_vnf("vnf_a", "de.upb", "0.1")['descriptor'])
+        with self.assertRaises(InvalidArgument):
+            validate_vnf(0, get_sample_vnf("invalid name", "de.upb", "0.1")['descriptor'])
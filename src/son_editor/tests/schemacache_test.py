@@ -0,0 +1,100 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from son_editor.util import descriptorutil, schemacache
+from son_editor.util.descriptorutil import SCHEMA_ID_VNF, SCHEMA_ID_NS, VNF_SCHEMA_PATH, NS_SCHEMA_PATH
+from son_editor.util.requestutil import CONFIG
+
+SCHEMA = b'type: object\nrequired:\n  - name\n'
+
+
+class SchemaHandler(BaseHTTPRequestHandler):
+    """ Serves the schema with an ETag and answers conditional requests """
+    requests = []
+
+    def do_GET(self):
+        SchemaHandler.requests.append(self.path)
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(SCHEMA)
+
+    def log_message(self, *args):
+        pass
+
+
+class SchemaCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.config = {key: CONFIG[key] for key in ['schemas', 'schema-cache']}
+        self.server = HTTPServer(('127.0.0.1', 0), SchemaHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        SchemaHandler.requests = []
+        CONFIG['schemas'] = [{'name': 'test', 'url': 'http://127.0.0.1:{}/'.format(self.server.server_port)}]
+        CONFIG['schema-cache'] = {'location': tempfile.mkdtemp(), 'ttl': 0}
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        CONFIG.update(self.config)
+        descriptorutil.schemas.clear()
+        descriptorutil.validators.clear()
+
+    def test_conditional_refresh(self):
+        url = CONFIG['schemas'][0]['url'] + VNF_SCHEMA_PATH
+        self.assertTrue(schemacache.refresh_schema(url))
+        self.assertFalse(schemacache.refresh_schema(url))
+        self.assertEqual(2, len(SchemaHandler.requests))
+
+    def test_loads_from_cache(self):
+        descriptorutil.load_schemas()
+        self.assertEqual(2, len(SchemaHandler.requests))
+        self.assertEqual(['name'], descriptorutil.schemas[SCHEMA_ID_VNF][0]['schema']['required'])
+
+        descriptorutil.load_schemas()
+        self.assertEqual(2, len(SchemaHandler.requests))
+
+    def test_loads_bundled_schemas(self):
+        bundled = tempfile.mkdtemp()
+        for rel_path in [VNF_SCHEMA_PATH, NS_SCHEMA_PATH]:
+            os.makedirs(os.path.dirname(os.path.join(bundled, 'test', rel_path)))
+            with open(os.path.join(bundled, 'test', rel_path), 'wb') as stream:
+                stream.write(SCHEMA)
+        CONFIG['schema-cache']['bundled'] = bundled
+        CONFIG['schemas'] = [{'name': 'test', 'url': 'http://unreachable.invalid/'}]
+
+        descriptorutil.load_schemas()
+        self.assertEqual(['name'], descriptorutil.schemas[SCHEMA_ID_NS][0]['schema']['required'])
+        self.assertTrue(schemacache.is_stale(CONFIG['schemas'][0]['url'] + NS_SCHEMA_PATH))
+
+    def test_loads_from_store(self):
+        descriptorutil.load_schemas()
+        self.assertTrue(os.path.isfile(os.path.join(schemacache.get_cache_dir(), schemacache.STORE_FILE)))
+        descriptorutil.schemas.clear()
+
+        load_schema = schemacache.load_schema
+        schemacache.load_schema = None
+        try:
+            descriptorutil.load_schemas()
+        finally:
+            schemacache.load_schema = load_schema
+        self.assertEqual(['name'], descriptorutil.schemas[SCHEMA_ID_VNF][0]['schema']['required'])
+
+    def test_store_outdated(self):
+        descriptorutil.load_schemas()
+        self.assertIsNotNone(schemacache.load_store())
+
+        CONFIG['schemas'] = CONFIG['schemas'] + [{'name': 'other', 'url': CONFIG['schemas'][0]['url'] + 'other/'}]
+        self.assertIsNone(schemacache.load_store())
+        CONFIG['schemas'] = CONFIG['schemas'][:1]
+
+        url = CONFIG['schemas'][0]['url'] + VNF_SCHEMA_PATH
+        path = schemacache._cache_path(url) + ".yml"
+        os.utime(path, (0, 0))
+        self.assertIsNone(schemacache.load_store())
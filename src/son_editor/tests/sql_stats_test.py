@@ -0,0 +1,43 @@
+import base64
+import json
+import unittest
+
+from son_editor.app.database import sql_stats, db_session
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+from son_editor.util.requestutil import CONFIG
+
+
+class SqlStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.app = init_test_context()
+        create_logged_in_user(self.app, "sql_user")
+        self.config = CONFIG.get('config')
+        CONFIG['config'] = {'user': 'admin', 'pwd': 'secret'}
+        self.auth = {'Authorization': 'Basic ' + base64.b64encode(b"admin:secret").decode()}
+
+    def tearDown(self):
+        CONFIG['config'] = self.config
+        CONFIG['database'].pop('slow-query-ms', None)
+
+    def test_statements_per_endpoint(self):
+        before = sql_stats.snapshot()['endpoints'].get('workspaces_workspaces', {'requests': 0, 'statements': 0})
+        for _ in range(2):
+            self.assertEqual(200, self.app.get("/" + constants.WORKSPACES + "/").status_code)
+        stats = sql_stats.snapshot()['endpoints']['workspaces_workspaces']
+        self.assertEqual(before['requests'] + 2, stats['requests'])
+        self.assertGreater(stats['statements'], before['statements'])
+        self.assertGreaterEqual(stats['max_statements'], 1)
+
+        response = self.app.get("/metrics/sql", headers=self.auth)
+        self.assertEqual(200, response.status_code)
+        self.assertIn('workspaces_workspaces', json.loads(response.data.decode())['endpoints'])
+        self.assertEqual(401, self.app.get("/metrics/sql").status_code)
+
+    def test_slow_query_log(self):
+        CONFIG['database']['slow-query-ms'] = 1e-6
+        slow_queries = sql_stats.snapshot()['slow_queries']
+        with self.assertLogs('son_editor.app.database', 'WARNING') as logs:
+            db_session().execute("SELECT 1")
+        self.assertIn("Slow query on None", logs.output[0])
+        self.assertEqual(slow_queries + 1, sql_stats.snapshot()['slow_queries'])
@@ -0,0 +1,32 @@
+import sqlite3
+import unittest
+
+from son_editor.app.database import engine, apply_sqlite_pragmas, get_sqlite_pragmas
+from son_editor.util.requestutil import CONFIG
+
+
+class SqlitePragmasTest(unittest.TestCase):
+    @unittest.skipUnless(engine.dialect.name == 'sqlite', "the tests run against another database")
+    def test_engine_connections_use_profile(self):
+        with engine.connect() as connection:
+            self.assertEqual("wal", connection.execute("PRAGMA journal_mode").scalar())
+            self.assertEqual(1, connection.execute("PRAGMA synchronous").scalar())
+            self.assertEqual(5000, connection.execute("PRAGMA busy_timeout").scalar())
+            self.assertEqual(1, connection.execute("PRAGMA foreign_keys").scalar())
+            self.assertEqual(-16000, connection.execute("PRAGMA cache_size").scalar())
+
+    def test_configured_pragmas(self):
+        CONFIG['database']['sqlite-pragmas'] = {'busy_timeout': 100, 'foreign_keys': None}
+        try:
+            pragmas = get_sqlite_pragmas()
+        finally:
+            del CONFIG['database']['sqlite-pragmas']
+        self.assertEqual(100, pragmas['busy_timeout'])
+        self.assertEqual('WAL', pragmas['journal_mode'])
+
+        connection = sqlite3.connect(":memory:")
+        apply_sqlite_pragmas(connection, pragmas)
+        self.assertEqual(100, connection.execute("PRAGMA busy_timeout").fetchone()[0])
+        self.assertEqual(0, connection.execute("PRAGMA foreign_keys").fetchone()[0])
+        self.assertRaises(ValueError, apply_sqlite_pragmas, connection, {'synchronous': 'OFF; DROP TABLE x'})
+        connection.close()
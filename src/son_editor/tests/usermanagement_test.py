@@ -0,0 +1,34 @@
+import unittest
+
+from son_editor.app.exceptions import UnauthorizedException
+from son_editor.impl import usermanagement
+from son_editor.tests.utils import *
+from son_editor.util.context import init_test_context
+from son_editor.util.requestutil import CONFIG
+
+
+class UserManagementTest(unittest.TestCase):
+    def setUp(self):
+        # Initializes test context
+        self.app = init_test_context()
+        self.users = CONFIG['authentication'].get('users')
+        CONFIG['authentication']['users'] = ['new_user']
+        usermanagement.email_failures.invalidate()
+
+    def tearDown(self):
+        CONFIG['authentication']['users'] = self.users
+
+    def test_get_user_reads_local_row(self):
+        user = usermanagement.get_user("new_user")
+        self.assertIsNone(user.email)
+        self.assertEqual(user.id, usermanagement.get_user("new_user").id)
+        self.assertRaises(UnauthorizedException, usermanagement.get_user, "unknown_user")
+
+    def test_public_email_is_stored_at_login(self):
+        usermanagement.load_user_email({'login': "new_user", 'email': "new_user@example.com"}, "fake_access_token")
+        self.assertEqual("new_user@example.com", usermanagement.get_user("new_user").email)
+
+    def test_failures_are_remembered(self):
+        usermanagement.email_failures.set("new_user", True)
+        user = usermanagement.load_user_email({'login': "new_user"}, "fake_access_token")
+        self.assertIsNone(user.email)
@@ -4,6 +4,9 @@ import son_editor.impl.servicesimpl
 import son_editor.impl.workspaceimpl
 import son_editor.impl.cataloguesimpl
 import os
+
+import yaml
+
 from son_editor.app.database import db_session
 from son_editor.impl.usermanagement import get_user
 from son_editor.models.user import User
@@ -176,3 +179,81 @@ def create_project(ws_id: int, project_name: str) -> str:
     :return: ID of the created project
     """
     return son_editor.impl.projectsimpl.create_project(ws_id, {'name': project_name})['id']
+
+
+def create_workspace_dir(user_name: str, ws_name: str) -> str:
+    """
+    Creates a minimal workspace folder structure on disk without calling son-workspace,
+    so it can be picked up by the workspace scan
+
+    :param user_name: The name of the user owning the workspace
+    :param ws_name: The name of the workspace
+    :return: The path of the created workspace
+    """
+    ws_path = os.path.join(os.path.expanduser(get_config()["workspaces-location"]), user_name, ws_name)
+    os.makedirs(os.path.join(ws_path, "projects"))
+    os.makedirs(os.path.join(ws_path, "catalogues"))
+    with open(os.path.join(ws_path, "workspace.yml"), "w") as stream:
+        stream.write('name: "{}"\n'.format(ws_name) +
+                     'catalogue_servers: []\n' +
+                     'service_platforms: {}\n' +
+                     'default_service_platform: ""\n' +
+                     'schema_index: 0\n')
+    return ws_path
+
+
+def create_project_dir(ws_path: str, project_name: str) -> str:
+    """
+    Creates a minimal project folder structure on disk without calling son-workspace
+
+    :param ws_path: The path of the workspace
+    :param project_name: The name of the project
+    :return: The path of the created project
+    """
+    pj_path = os.path.join(ws_path, "projects", project_name)
+    os.makedirs(os.path.join(pj_path, "sources", "nsd"))
+    os.makedirs(os.path.join(pj_path, "sources", "vnf"))
+    with open(os.path.join(pj_path, "project.yml"), "w") as stream:
+        stream.write('name: "{}"\n'.format(project_name) +
+                     'version: "0.1"\n')
+    return pj_path
+
+
+def write_descriptor_files(pj_path: str, nsds: dict = None, vnfds: dict = None) -> None:
+    """
+    Writes descriptors into the sources of a project created with create_project_dir
+
+    :param pj_path: The path of the project
+    :param nsds: The service descriptors by file name without extension, written to sources/nsd
+    :param vnfds: The function descriptors by folder name, written to sources/vnf/<folder>/vnf.yml
+    """
+    for file_name, descriptor in (nsds or {}).items():
+        with open(os.path.join(pj_path, "sources", "nsd", file_name + ".yml"), "w") as stream:
+            yaml.safe_dump(descriptor, stream)
+    for folder, descriptor in (vnfds or {}).items():
+        os.makedirs(os.path.join(pj_path, "sources", "vnf", folder))
+        with open(os.path.join(pj_path, "sources", "vnf", folder, "vnf.yml"), "w") as stream:
+            yaml.safe_dump(descriptor, stream)
+
+
+def write_referencing_descriptors(pj_path: str, service_c_refs: dict = None) -> None:
+    """
+    Writes a function vnf_a, a service_a using it, a service_b depending on both and a service_c,
+    all of vendor de.upb and version 0.1
+
+    :param pj_path: The path of the project
+    :param service_c_refs: The reference fields of service_c, no references by default
+    """
+    services = {
+        "service_a": {'network_functions': [{'vnf_id': 'vnf0', 'vnf_vendor': 'de.upb',
+                                             'vnf_name': 'vnf_a', 'vnf_version': '0.1'}]},
+        "service_b": {'vnf_dependencies': [{'vendor': 'de.upb', 'name': 'vnf_a', 'version': '0.1'}],
+                      'network_services': [{'ns_vendor': 'de.upb', 'ns_name': 'service_a',
+                                            'ns_version': '0.1'}]},
+        "service_c": service_c_refs or {}
+    }
+    nsds = {}
+    for name, refs in services.items():
+        nsds[name] = get_sample_ns(name, "de.upb", "0.1")['descriptor']
+        nsds[name].update(refs)
+    write_descriptor_files(pj_path, nsds, {"vnf_folder": get_sample_vnf("vnf_a", "de.upb", "0.1")['descriptor']})
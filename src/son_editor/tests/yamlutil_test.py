@@ -0,0 +1,24 @@
+import io
+import unittest
+
+import yaml
+
+from son_editor.tests.utils import get_sample_vnf
+from son_editor.util import yamlutil
+
+
+class YamlUtilTest(unittest.TestCase):
+    def test_round_trip(self):
+        descriptor = get_sample_vnf("vnf_a", "de.upb", "0.1")['descriptor']
+        stream = io.StringIO()
+        yamlutil.dump(descriptor, stream, default_flow_style=False)
+        self.assertEqual(descriptor, yamlutil.load(stream.getvalue()))
+
+    def test_same_output_as_python_implementation(self):
+        descriptor = get_sample_vnf("vnf_a", "de.upb", "0.1")['descriptor']
+        self.assertEqual(yaml.safe_dump(descriptor, default_flow_style=False),
+                         yamlutil.dump(descriptor, default_flow_style=False))
+
+    def test_rejects_python_tags(self):
+        with self.assertRaises(yaml.YAMLError):
+            yamlutil.load("!!python/object/apply:os.system ['true']")
@@ -0,0 +1,60 @@
+"""
+Small in-process caches
+
+The caches are per worker process, so they only hold data that may be
+slightly outdated for the duration of their ttl.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """ A thread safe cache whose entries expire ttl seconds after they were set """
+
+    def __init__(self, ttl: float, max_size: int = 4096):
+        """
+        :param ttl: Seconds an entry is valid, 0 disables the cache
+        :param max_size: Maximum number of entries, the oldest entries are dropped first
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """ Returns the value of the key or default if it is missing or expired """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return default
+            return entry[1]
+
+    def set(self, key, value) -> None:
+        if not self.ttl:
+            return
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_size:
+                self._entries.popitem(last=False)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+    def invalidate(self, predicate=None) -> None:
+        """
+        Removes entries from the cache
+
+        :param predicate: Called with the key of each entry, the entry is removed if it returns True.
+                          All entries are removed if None
+        """
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if predicate(key)]:
+                    del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
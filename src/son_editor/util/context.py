@@ -1,5 +1,6 @@
 from son_editor.app import __main__
 from son_editor.app.database import reset_db
+from son_editor.app.securityservice import access_cache
 from son_editor.util.requestutil import CONFIG, get_config
 from os import path
 import shutil
@@ -18,4 +19,5 @@ def init_test_context():
     # Delete existing workspaces
     shutil.rmtree(path.expanduser(CONFIG["workspaces-location"]), ignore_errors=True)
     reset_db()
+    access_cache.invalidate()
     return __main__.app.test_client()
@@ -1,15 +1,40 @@
 import json
 import os
 
-import yaml
-from urllib import request
+import jsonschema
 
-from son_editor.util.requestutil import get_config
+from son_editor.app.exceptions import InvalidArgument
+from son_editor.util import yamlutil, schemacache
+from son_editor.util.requestutil import get_config, raw_json_list
 
 SCHEMA_ID_VNF = "vnf"
 SCHEMA_ID_NS = "ns"
 
+# schema file locations relative to the schema remotes
+VNF_SCHEMA_PATH = "function-descriptor/vnfd-schema.yml"
+NS_SCHEMA_PATH = "service-descriptor/nsd-schema.yml"
+
+# fields of the descriptor lists, the ones holding JSON text are spliced into the response as they are
+DESCRIPTOR_FIELDS = ['id', 'uid', 'name', 'vendor', 'version', 'descriptor']
+JSON_FIELDS = ['descriptor', 'meta']
+
 schemas = {}
+validators = {}
+
+
+def read_ns_vnf_from_disk(file: str) -> dict:
+    """
+    Reads a vnf or network service descriptor from disk
+
+    :param file: the file path of the descriptor
+    :return: the keyword arguments to initialize a descriptor model with
+    """
+    with open(file, 'r') as stream:
+        descriptor = yamlutil.load(stream)
+        return dict(descriptor=json.dumps(descriptor),
+                    name=descriptor['name'],
+                    vendor=descriptor['vendor'],
+                    version=descriptor['version'])
 
 
 def load_ns_vnf_from_disk(file: str, model):
@@ -20,13 +45,8 @@ def load_ns_vnf_from_disk(file: str, model):
     :param model: The database  model of the descriptor
     :return: the given updated model
     """
-    with open(file, 'r') as stream:
-        descriptor = yaml.safe_load(stream)
-        model.__init__(descriptor=json.dumps(descriptor),
-                       name=descriptor['name'],
-                       vendor=descriptor['vendor'],
-                       version=descriptor['version'])
-        return model
+    model.__init__(**read_ns_vnf_from_disk(file))
+    return model
 
 
 def write_ns_vnf_to_disk(folder: str, model) -> None:
@@ -43,7 +63,7 @@ def write_ns_vnf_to_disk(folder: str, model) -> None:
         os.mkdir(target_dir)
     with open(get_file_path(folder, model), 'w') as stream:
         data = json.loads(model.descriptor)
-        yaml.safe_dump(data, stream, default_flow_style=False)
+        yamlutil.dump(data, stream, default_flow_style=False)
 
 
 def get_file_path(folder: str, model) -> str:
@@ -86,7 +106,7 @@ def update_workspace_descriptor(workspace) -> None:
     :param workspace: The workspace model
     """
     with open(os.path.join(workspace.path, "workspace.yml"), "r") as stream:
-        ws_descriptor = yaml.safe_load(stream)
+        ws_descriptor = yamlutil.load(stream)
 
     ws_descriptor['catalogue_servers'] = []
     for cat in workspace.catalogues:
@@ -108,7 +128,7 @@ def update_workspace_descriptor(workspace) -> None:
     ws_descriptor['schemas_remote_master'] = get_config()["schemas"][workspace.schema_index]['url']
 
     with open(os.path.join(workspace.path, "workspace.yml"), "w") as stream:
-        yaml.safe_dump(ws_descriptor, stream)
+        yamlutil.dump(ws_descriptor, stream)
 
 
 def load_workspace_descriptor(workspace) -> None:
@@ -121,7 +141,7 @@ def load_workspace_descriptor(workspace) -> None:
     from son_editor.models.repository import Platform
 
     with open(os.path.join(workspace.path, "workspace.yml"), "r") as stream:
-        ws_descriptor = yaml.safe_load(stream)
+        ws_descriptor = yamlutil.load(stream)
         if 'catalogue_servers' in ws_descriptor:
             catalogues = ws_descriptor['catalogue_servers']
             for catalogue_server in catalogues:
@@ -141,13 +161,13 @@ def load_workspace_descriptor(workspace) -> None:
 def load_project_descriptor(project) -> dict:
     """Loads the project descriptor from disk"""
     with open(os.path.join(project.workspace.path, "projects", project.rel_path, "project.yml"), "r") as stream:
-        return yaml.safe_load(stream)
+        return yamlutil.load(stream)
 
 
 def write_project_descriptor(project, project_descriptor):
     """Writes the project database model to disk"""
     with open(os.path.join(project.workspace.path, "projects", project.rel_path, "project.yml"), "w") as stream:
-        return yaml.safe_dump(project_descriptor, stream)
+        return yamlutil.dump(project_descriptor, stream)
 
 
 def sync_project_descriptor(project) -> None:
@@ -192,31 +212,35 @@ def sync_project_descriptor(project) -> None:
 
 
 def load_schemas():
-    """ Loads the schemas congigured under "schemas" from the schema remotes """
-    schemas[SCHEMA_ID_VNF] = []
-    schemas[SCHEMA_ID_NS] = []
-    for schema in get_config()["schemas"]:
-        # load vnf schema
-        vnf_schema = dict(schema)
-        response = request.urlopen(vnf_schema['url'] + "function-descriptor/vnfd-schema.yml")
-        data = response.read()
-        vnf_schema['schema'] = yaml.safe_load(data.decode('utf-8'))
-        schemas[SCHEMA_ID_VNF].append(vnf_schema)
-        # load ns schema
-        ns_schema = dict(schema)
-        response = request.urlopen(ns_schema['url'] + "service-descriptor/nsd-schema.yml")
-        data = response.read()
-        ns_schema['schema'] = yaml.safe_load(data.decode('utf-8'))
-        schemas[SCHEMA_ID_NS].append(ns_schema)
+    """ Loads the schemas configured under "schemas" from the local schema store or cache,
+    downloading them from the schema remotes if they are not cached yet """
+    stored = schemacache.load_store()
+    if stored is None:
+        vnf_schemas = []
+        ns_schemas = []
+        for schema in get_config()["schemas"]:
+            # load vnf schema
+            vnf_schema = dict(schema)
+            vnf_schema['schema'] = schemacache.load_schema(schema, VNF_SCHEMA_PATH)
+            vnf_schemas.append(vnf_schema)
+            # load ns schema
+            ns_schema = dict(schema)
+            ns_schema['schema'] = schemacache.load_schema(schema, NS_SCHEMA_PATH)
+            ns_schemas.append(ns_schema)
+        stored = {SCHEMA_ID_VNF: vnf_schemas, SCHEMA_ID_NS: ns_schemas}
+        schemacache.write_store(stored, [VNF_SCHEMA_PATH, NS_SCHEMA_PATH])
+    schemas.update(stored)
+    validators.clear()
 
 
 def get_schemas():
     """ Get the schemas
     
-    Will load the schemas if still empty
+    Will load the schemas if still empty and start the background refresh of the schema cache
     """
     if not schemas:
         load_schemas()
+    schemacache.start_refresher([VNF_SCHEMA_PATH, NS_SCHEMA_PATH], load_schemas)
     return schemas
 
 
@@ -230,6 +254,27 @@ def get_schema(schema_index, schema_id: str) -> dict:
     return get_schemas()[schema_id][schema_index]["schema"]
 
 
+def get_validator(schema_index, schema_id: str):
+    """
+    Get a validator for the requested schema
+
+    The validator is built and the schema itself checked only once,
+    until the schemas get reloaded
+    :param schema_index: The schema index referring to the "schema"-index in the configuration file
+    :param schema_id: either "vnf" or "ns"
+    :return: The jsonschema validator for the requested schema
+    """
+    key = (schema_index, schema_id)
+    validator = validators.get(key)
+    if validator is None:
+        schema = get_schema(schema_index, schema_id)
+        validator_class = jsonschema.validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        validator = validator_class(schema)
+        validators[key] = validator
+    return validator
+
+
 def write_private_descriptor(workspace_path: str, is_vnf: bool, descriptor: dict):
     """
     Write the private descriptor into the private cataloge folder on disk
@@ -251,4 +296,46 @@ def write_private_descriptor(workspace_path: str, is_vnf: bool, descriptor: dict
         os.makedirs(dirs)
     file_path = os.path.join(dirs, "descriptor.yml")
     with open(file_path, "w") as stream:
-        return yaml.safe_dump(descriptor, stream)
+        return yamlutil.dump(descriptor, stream)
+
+
+def list_descriptors(session, model, ws_id: int, project_id: int, fields: list, limit: int = None,
+                     cursor: int = None) -> tuple:
+    """
+    Lists the given fields of the functions or services of a project, ordered by id
+
+    Only the requested columns are queried, so the descriptor text is not loaded unless requested
+
+    :param session: The database session
+    :param model: The descriptor model class, Function or Service
+    :param ws_id: The workspace ID
+    :param project_id: The project ID
+    :param fields: The names of the fields to list
+    :param limit: The maximum number of descriptors to return, all if None
+    :param cursor: Only list descriptors with an id greater than the cursor
+    :return: The descriptors as JSON array and the cursor of the next page, None if this is the last page
+    """
+    from son_editor.models.project import Project
+    for field in fields:
+        if not hasattr(model, field) or field not in DESCRIPTOR_FIELDS + JSON_FIELDS:
+            raise InvalidArgument("Unknown field '{}'".format(field))
+    if limit is not None and limit < 1:
+        raise InvalidArgument("The limit has to be at least 1")
+    columns = [getattr(model, field) for field in fields]
+    query = session.query(model.id, *columns). \
+        join(Project, model.project_id == Project.id). \
+        filter(Project.workspace_id == ws_id). \
+        filter(model.project_id == project_id). \
+        order_by(model.id)
+    if cursor is not None:
+        query = query.filter(model.id > cursor)
+    if limit is not None:
+        query = query.limit(limit)
+    items = []
+    last_id = None
+    for row in query:
+        last_id = row[0]
+        items.append("{" + ", ".join('"{}": {}'.format(field, (value or 'null') if field in JSON_FIELDS
+                                     else json.dumps(value)) for field, value in zip(fields, row[1:])) + "}")
+    next_cursor = last_id if limit is not None and len(items) == limit else None
+    return raw_json_list(items), next_cursor
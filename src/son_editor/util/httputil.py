@@ -0,0 +1,124 @@
+"""
+Shared HTTP sessions for the outbound requests to catalogues, platforms and Github
+
+Every base URL (scheme and host) gets one requests.Session per process with a bounded
+connection pool, so repeated requests to the same server reuse kept-alive connections
+instead of opening a new TCP / TLS connection each time. Requests without an explicit
+timeout get the configured connect and read timeouts.
+"""
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from son_editor.util.metricsutil import OUTBOUND_DURATION
+from son_editor.util.requestutil import get_config
+
+_sessions = {}
+# the configured pool size each session was created with, by base url
+_pool_sizes = {}
+_sessions_pid = None
+_lock = threading.Lock()
+
+
+def get_http_config() -> dict:
+    """ Returns the "http" configuration """
+    return get_config().get('http', {})
+
+
+def get_timeout() -> tuple:
+    """ Returns the default (connect, read) timeout in seconds """
+    config = get_http_config()
+    return config.get('connect-timeout', 3.05), config.get('read-timeout', 30)
+
+
+def _base_url(url: str) -> str:
+    parts = urlsplit(url)
+    return "{}://{}".format(parts.scheme, parts.netloc)
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Returns the session of the server the url points to
+
+    :param url: Any url of the server
+    :return: The session shared by all requests to the server in this process
+    """
+    global _sessions_pid
+    base_url = _base_url(url)
+    with _lock:
+        # connections must not be shared with forked worker processes
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _pool_sizes.clear()
+            _sessions_pid = os.getpid()
+        session = _sessions.get(base_url)
+        if session is None:
+            pool_size = get_http_config().get('pool-size', 10)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount(base_url, adapter)
+            _sessions[base_url] = session
+            _pool_sizes[base_url] = pool_size
+        return session
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Sends a request through the shared session of the server
+
+    Accepts the same arguments as requests.request
+
+    :param method: The HTTP method
+    :param url: The url to request
+    :return: The response
+    """
+    kwargs.setdefault('timeout', get_timeout())
+    with OUTBOUND_DURATION.time(host=urlsplit(url).netloc, method=method.upper()):
+        return get_session(url).request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request('PUT', url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return request('DELETE', url, **kwargs)
+
+
+def get_pool_stats() -> dict:
+    """
+    Collects the connection pool usage of the sessions of this process
+
+    :return: The number of requests, opened connections and requests that reused
+             a pooled connection by base url
+    """
+    stats = {}
+    with _lock:
+        sessions = dict(_sessions) if _sessions_pid == os.getpid() else {}
+        pool_sizes = dict(_pool_sizes)
+    for base_url, session in sessions.items():
+        adapter = session.get_adapter(base_url)
+        pools = adapter.poolmanager.pools
+        request_count = 0
+        connection_count = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                request_count += pool.num_requests
+                connection_count += pool.num_connections
+        stats[base_url] = {'requests': request_count,
+                           'connections': connection_count,
+                           'reused': request_count - connection_count,
+                           'pool_size': pool_sizes[base_url]}
+    return stats
@@ -0,0 +1,166 @@
+"""
+Latency histograms in the Prometheus text exposition format
+
+The registry is per worker process, every worker exposes the observations of the
+requests it answered itself.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# the default buckets of the Prometheus client libraries, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# external tools and git remotes run for seconds up to minutes
+SUBPROCESS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, _escape(value)) for name, value in zip(names, values)) + '}'
+
+
+class Histogram:
+    """ A thread safe histogram with a fixed set of label names """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        """
+        :param name: The metric name
+        :param documentation: The help text
+        :param labelnames: The names of the labels each observation is made with
+        :param buckets: The upper bounds of the buckets in ascending order
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Records a value
+
+        :param value: The observed value, usually seconds
+        :param labels: A value for each label name
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """ Observes the time spent in the with block, also if it raises """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> dict:
+        """ Returns the cumulative bucket counts, sum and count by label values """
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        result = {}
+        for key, (counts, total, count) in series.items():
+            cumulative = 0
+            buckets = []
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                buckets.append((bound, cumulative))
+            result[key] = {'buckets': buckets, 'sum': total, 'count': count}
+        return result
+
+    def render(self) -> list:
+        """ Returns the lines of the metric in the text exposition format """
+        lines = ['# HELP {} {}'.format(self.name, self.documentation.replace('\\', '\\\\').replace('\n', '\\n')),
+                 '# TYPE {} histogram'.format(self.name)]
+        labelnames = self.labelnames + ('le',)
+        for key, sample in sorted(self.samples().items()):
+            for bound, count in sample['buckets']:
+                lines.append('{}_bucket{} {}'.format(self.name,
+                                                     _format_labels(labelnames, key + (_format_value(bound),)),
+                                                     count))
+            labels = _format_labels(self.labelnames, key)
+            lines.append('{}_sum{} {}'.format(self.name, labels, _format_value(sample['sum'])))
+            lines.append('{}_count{} {}'.format(self.name, labels, sample['count']))
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    """ The metrics exposed together """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """ Returns the histogram of the name, creating it on first use """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+            return metric
+
+    def render(self) -> str:
+        """ Returns all metrics in the text exposition format """
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'son_editor_request_duration_seconds',
+    'Time spent answering API requests',
+    ('namespace', 'route', 'method', 'status'))
+
+SUBPROCESS_DURATION = REGISTRY.histogram(
+    'son_editor_subprocess_duration_seconds',
+    'Time spent waiting for external tools',
+    ('tool', 'action'),
+    SUBPROCESS_BUCKETS)
+
+OUTBOUND_DURATION = REGISTRY.histogram(
+    'son_editor_outbound_request_duration_seconds',
+    'Time spent on HTTP requests to catalogues, platforms and Github',
+    ('host', 'method'))
+
+
+def time_subprocess(tool: str, action: str):
+    """
+    Times an external tool invocation
+
+    :param tool: The executable, e.g. git or son-package
+    :param action: The subcommand or mode it is run with
+    """
+    return SUBPROCESS_DURATION.time(tool=tool, action=action)
@@ -6,6 +6,7 @@ from subprocess import Popen, PIPE
 from son_editor.app.exceptions import PackException, ExtNotReachable, NameConflict
 from son_editor.models.project import Project
 from son_editor.models.workspace import Workspace
+from son_editor.util.metricsutil import time_subprocess
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +20,10 @@ def pack_project(project: Project) -> str:
     """
     ws_path = project.workspace.path
     pj_path = os.path.join(ws_path, 'projects', project.rel_path)
-    proc = Popen(['son-package', '--workspace', ws_path, '--project', pj_path], stdout=PIPE, stderr=PIPE)
+    with time_subprocess('son-package', 'package'):
+        proc = Popen(['son-package', '--workspace', ws_path, '--project', pj_path], stdout=PIPE, stderr=PIPE)
 
-    out, err = proc.communicate()
+        out, err = proc.communicate()
     out = out.decode()
     err = err.decode()
 
@@ -49,9 +51,11 @@ def push_to_platform(package_path: str, ws: Workspace) -> str:
     """
 
     # TODO use platform id instead of default platform for ws
-    proc = Popen(['son-access', "push", "--workspace", ws.path, '--upload', package_path], stdout=PIPE, stderr=PIPE)
+    with time_subprocess('son-access', 'push'):
+        proc = Popen(['son-access', "push", "--workspace", ws.path, '--upload', package_path], stdout=PIPE,
+                     stderr=PIPE)
 
-    out, err = proc.communicate()
+        out, err = proc.communicate()
     out = out.decode()
     err = err.decode()
 
@@ -4,14 +4,19 @@ Created on 28.07.2016
 @author: Jonas
 '''
 import json
+import logging
 
 from flask import request
 from flask.wrappers import Response, Request
 from pkg_resources import Requirement, resource_string, resource_filename
-import yaml
+
+from son_editor.app.exceptions import InvalidArgument
+from son_editor.util import yamlutil
+
+logger = logging.getLogger(__name__)
 
 config_path = "son_editor/config.yaml"
-CONFIG = yaml.safe_load(resource_string(Requirement.parse("upb-son-editor-backend"), config_path))
+CONFIG = yamlutil.load(resource_string(Requirement.parse("upb-son-editor-backend"), config_path))
 
 
 def update_config(config):
@@ -22,11 +27,19 @@ def update_config(config):
     :return: Message if successful
     """
     global CONFIG
+    schemas_changed = CONFIG.get('schemas') != config.get('schemas')
     CONFIG = config
     filename = resource_filename(Requirement.parse("upb-son-editor-backend"), config_path)
     # write changed config
     with open(filename, "w") as stream:
-        yaml.safe_dump(CONFIG, stream, default_flow_style=False)
+        yamlutil.dump(CONFIG, stream, default_flow_style=False)
+    if schemas_changed:
+        # rebuild the schema store for the new schema list
+        from son_editor.util.descriptorutil import load_schemas
+        try:
+            load_schemas()
+        except Exception as err:
+            logger.warning("Could not load the updated schemas: {}".format(err))
     return {"message": "update successful"}
 
 
@@ -35,6 +48,21 @@ def get_config():
     return CONFIG
 
 
+class RawJson(str):
+    """ A JSON document that prepare_response sends as it is, without parsing or serializing it again """
+    pass
+
+
+def raw_json_list(items: list) -> RawJson:
+    """
+    Joins JSON documents into a JSON array
+
+    :param items: The serialized JSON documents
+    :return: The JSON array
+    """
+    return RawJson("[" + ", ".join(items) + "]")
+
+
 def prepare_response(data=None, code=200) -> Response:
     """
     Sets the necessary headers and status code on the response
@@ -52,7 +80,10 @@ def prepare_response(data=None, code=200) -> Response:
     headers['Access-Control-Allow-Credentials'] = "true"
     headers['Access-Control-Max-Age'] = 1000
     if data is not None:
-        if isinstance(data, dict) or isinstance(data, list):
+        if isinstance(data, RawJson):
+            response.set_data(data)
+            headers['Content-Type'] = 'application/json'
+        elif isinstance(data, dict) or isinstance(data, list):
             response.set_data(json.dumps(data))
             headers['Content-Type'] = 'application/json'
         else:
@@ -62,6 +93,37 @@ def prepare_response(data=None, code=200) -> Response:
     return response
 
 
+def prepare_page_response(data, next_cursor=None) -> Response:
+    """
+    Prepares the response of a paginated list, passing the cursor of the next page in the X-Next-Cursor header
+
+    :param data: The list to be returned to the client
+    :param next_cursor: The cursor of the next page, None if this is the last page
+    :return: The Response object
+    """
+    response = prepare_response(data)
+    response.headers['Access-Control-Expose-Headers'] = "X-Next-Cursor"
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
+
+
+def get_page_args(request: Request) -> dict:
+    """
+    Reads the "fields", "limit" and "cursor" query parameters of a paginated list request
+
+    :param request: The request
+    :return: The fields as list, the limit and the cursor, None if not given
+    """
+    fields = request.args.get('fields')
+    try:
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+        cursor = int(request.args['cursor']) if 'cursor' in request.args else None
+    except ValueError:
+        raise InvalidArgument("limit and cursor have to be integers")
+    return {'fields': fields.split(",") if fields else None, 'limit': limit, 'cursor': cursor}
+
+
 def prepare_error(data=None, code=500) -> tuple:
     """
     Prepares the error response and returns it as a tuple
@@ -0,0 +1,283 @@
+"""
+Local disk cache for the descriptor schemas
+
+Schemas are stored under the configured "schema-cache" location together with the
+ETag / Last-Modified headers of the schema remote. Workers read the cached copy at
+boot and a background thread refreshes it with conditional requests once the
+configured ttl has expired. Schemas that are not cached yet are copied from the
+bundled directory if one is configured, so no network is needed to start up.
+
+The parsed schemas are additionally serialized into one pickle file, the schema store,
+which the worker processes map into memory instead of parsing the YAML files each.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import tempfile
+import threading
+import time
+from urllib import request
+from urllib.error import HTTPError
+
+from son_editor.util import yamlutil
+from son_editor.util.requestutil import get_config
+
+logger = logging.getLogger(__name__)
+
+# File name of the pre-serialized schema store inside the cache directory
+STORE_FILE = "schemas.pickle"
+# Timeout of schema downloads in seconds
+TIMEOUT = 10
+# Maximum seconds between two checks of the background refresher
+REFRESH_INTERVAL = 300
+
+# modification times of the cached files at the time they were loaded by this process
+_loaded = {}
+_refresher_lock = threading.Lock()
+_refresher_pid = None
+
+
+def get_cache_config() -> dict:
+    """ Returns the "schema-cache" configuration """
+    return get_config().get('schema-cache', {})
+
+
+def get_cache_dir() -> str:
+    """ Returns the directory the schemas are cached in """
+    location = get_cache_config().get('location', '~/son-editor/schemas/')
+    return os.path.normpath(os.path.expanduser(location))
+
+
+def _cache_path(url: str) -> str:
+    """ Returns the path of the cached schema without file extension """
+    return os.path.join(get_cache_dir(), hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+
+def _read_meta(url: str) -> dict:
+    """ Reads the metadata stored along with the cached schema """
+    try:
+        with open(_cache_path(url) + ".json", "r") as stream:
+            return json.load(stream)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """ Writes the file by replacing it, so other processes never see a partially written file """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(handle, "wb") as stream:
+            stream.write(data)
+        os.replace(tmp_path, path)
+    except:
+        os.remove(tmp_path)
+        raise
+
+
+def _write_meta(url: str, meta: dict) -> None:
+    _write_atomic(_cache_path(url) + ".json", json.dumps(meta).encode('utf-8'))
+
+
+def load_schema(schema: dict, rel_path: str) -> dict:
+    """
+    Loads a schema from the cache
+
+    If the schema is not cached yet it is copied from the bundled directory
+    or downloaded from the schema remote
+
+    :param schema: The schema configuration containing "name" and "url"
+    :param rel_path: The path of the schema file relative to the schema remote
+    :return: The parsed schema
+    """
+    url = schema['url'] + rel_path
+    path = _cache_path(url) + ".yml"
+    if not os.path.exists(path) and not _copy_bundled(url, schema['name'], rel_path):
+        refresh_schema(url)
+    _loaded[url] = os.stat(path).st_mtime
+    with open(path, "r") as stream:
+        return yamlutil.load(stream)
+
+
+def _copy_bundled(url: str, name: str, rel_path: str) -> bool:
+    """
+    Copies the schema from the bundled directory into the cache
+
+    The bundled directory contains one folder per schema name
+    that mirrors the layout of the schema remote
+
+    :param url: The url of the schema file
+    :param name: The name of the schema configuration
+    :param rel_path: The path of the schema file relative to the schema remote
+    :return: True if a bundled schema was found
+    """
+    bundled = get_cache_config().get('bundled')
+    if not bundled:
+        return False
+    bundled_path = os.path.join(os.path.expanduser(bundled), name, rel_path)
+    if not os.path.isfile(bundled_path):
+        return False
+    with open(bundled_path, "rb") as stream:
+        _write_atomic(_cache_path(url) + ".yml", stream.read())
+    # fetched at 0 lets the refresher update it as soon as the remote is reachable
+    _write_meta(url, {'url': url, 'fetched': 0})
+    logger.info("Loaded bundled schema {}".format(bundled_path))
+    return True
+
+
+def _fingerprint(schema_configs: list) -> str:
+    """ Identifies the configured schema list """
+    return hashlib.sha1(json.dumps(schema_configs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def write_store(schemas: dict, rel_paths: list) -> None:
+    """
+    Serializes the parsed schemas into the schema store
+
+    The store remembers the schema configuration and the modification times of the
+    cached schema files it was built from, so it is rebuilt when either changes
+
+    :param schemas: The parsed schemas by schema id
+    :param rel_paths: The schema files the schemas were loaded from, relative to the schema remotes
+    """
+    mtimes = {}
+    for schema in get_config()["schemas"]:
+        for rel_path in rel_paths:
+            url = schema['url'] + rel_path
+            mtimes[url] = _loaded[url]
+    data = pickle.dumps({'fingerprint': _fingerprint(get_config()["schemas"]),
+                         'mtimes': mtimes,
+                         'schemas': schemas}, pickle.HIGHEST_PROTOCOL)
+    _write_atomic(os.path.join(get_cache_dir(), STORE_FILE), data)
+
+
+def load_store():
+    """
+    Loads the parsed schemas from the schema store
+
+    :return: The parsed schemas by schema id, None if the store is missing or outdated
+    """
+    path = os.path.join(get_cache_dir(), STORE_FILE)
+    try:
+        with open(path, "rb") as stream, mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            store = pickle.loads(data)
+    except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+        return None
+    if store['fingerprint'] != _fingerprint(get_config()["schemas"]):
+        return None
+    for url, mtime in store['mtimes'].items():
+        try:
+            if os.stat(_cache_path(url) + ".yml").st_mtime != mtime:
+                return None
+        except OSError:
+            return None
+    _loaded.update(store['mtimes'])
+    return store['schemas']
+
+
+def refresh_schema(url: str) -> bool:
+    """
+    Downloads the schema if it changed on the schema remote
+
+    Sends the ETag and Last-Modified values of the cached copy along,
+    so unchanged schemas are not transferred again
+
+    :param url: The url of the schema file
+    :return: True if a new version was stored in the cache
+    """
+    path = _cache_path(url) + ".yml"
+    meta = _read_meta(url)
+    headers = {}
+    if os.path.exists(path):
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    try:
+        response = request.urlopen(request.Request(url, headers=headers), timeout=TIMEOUT)
+    except HTTPError as err:
+        if err.code != 304:
+            raise
+        meta['fetched'] = time.time()
+        _write_meta(url, meta)
+        return False
+    data = response.read()
+    # make sure only parsable schemas end up in the cache
+    yamlutil.load(data.decode('utf-8'))
+    _write_atomic(path, data)
+    _write_meta(url, {'url': url,
+                      'etag': response.headers.get('ETag'),
+                      'last_modified': response.headers.get('Last-Modified'),
+                      'fetched': time.time()})
+    logger.info("Updated cached schema {}".format(url))
+    return True
+
+
+def is_stale(url: str) -> bool:
+    """ Checks if the ttl of the cached schema expired """
+    ttl = get_cache_config().get('ttl', 86400)
+    return time.time() - _read_meta(url).get('fetched', 0) > ttl
+
+
+def changed_on_disk(url: str) -> bool:
+    """ Checks if the cached schema was replaced since this process loaded it, e.g. by another worker """
+    try:
+        return os.stat(_cache_path(url) + ".yml").st_mtime != _loaded.get(url)
+    except OSError:
+        return False
+
+
+def refresh_schemas(rel_paths: list) -> bool:
+    """
+    Refreshes all configured schemas whose ttl expired
+
+    :param rel_paths: The schema files to refresh, relative to the schema remotes
+    :return: True if any schema changed since this process loaded it
+    """
+    changed = False
+    for schema in get_config()["schemas"]:
+        for rel_path in rel_paths:
+            url = schema['url'] + rel_path
+            if is_stale(url):
+                try:
+                    refresh_schema(url)
+                except Exception as err:
+                    logger.warning("Could not refresh schema {}: {}".format(url, err))
+            changed = changed or changed_on_disk(url)
+    return changed
+
+
+def start_refresher(rel_paths: list, on_change) -> None:
+    """
+    Starts the background refresher of this process if not running yet
+
+    Does nothing if the configured ttl is 0
+
+    :param rel_paths: The schema files to refresh, relative to the schema remotes
+    :param on_change: Called without arguments whenever a schema changed
+    """
+    global _refresher_pid
+    ttl = get_cache_config().get('ttl', 86400)
+    if not ttl:
+        return
+    with _refresher_lock:
+        # threads do not survive forking, so every worker process needs its own refresher
+        if _refresher_pid == os.getpid():
+            return
+        _refresher_pid = os.getpid()
+    thread = threading.Thread(target=_refresh_loop, args=(rel_paths, on_change, min(ttl, REFRESH_INTERVAL)),
+                              name="schema-refresher", daemon=True)
+    thread.start()
+
+
+def _refresh_loop(rel_paths: list, on_change, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            if refresh_schemas(rel_paths):
+                on_change()
+        except Exception:
+            logger.exception("Schema refresh failed:")
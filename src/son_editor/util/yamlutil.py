@@ -0,0 +1,39 @@
+"""
+YAML codec for descriptors, configuration and schemas.
+
+Uses the libyaml based CSafeLoader / CSafeDumper if PyYAML was built with libyaml
+and falls back to the pure python SafeLoader / SafeDumper otherwise.
+Both produce the same documents, the C implementation is just a lot faster.
+"""
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+
+    LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+    LIBYAML = False
+
+
+def load(stream):
+    """
+    Parses the first YAML document in the stream, only allowing standard YAML tags
+
+    :param stream: A string, bytes or an open file
+    :return: The parsed document
+    """
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def dump(data, stream=None, **kwargs):
+    """
+    Serializes the data as YAML document, only producing standard YAML tags
+
+    :param data: The data to serialize
+    :param stream: An open file to write to, if None the document is returned as string
+    :param kwargs: Formatting options as accepted by yaml.dump, e.g. default_flow_style
+    :return: The document if no stream was given
+    """
+    return yaml.dump(data, stream, Dumper=SafeDumper, **kwargs)